@@ -0,0 +1,189 @@
+"""Shared pieces for the benchmark and load-test scripts."""
+import os
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core import db, instrument, tracker  # noqa: E402
+from core.backends.sqlite_backend import SQLiteBackend  # noqa: E402
+from core.roster import register_roster  # noqa: E402
+
+PITCH_TYPES = ["Fastball", "Slider", "Curveball", "Changeup", "Cutter", "Splitter"]
+PITCH_MIX = [0.52, 0.16, 0.12, 0.12, 0.05, 0.03]
+CALLS = ["Ball Called", "Strike Called", "Strike Swing Miss", "Foul Ball", "In Play"]
+CALL_MIX = [0.36, 0.17, 0.11, 0.18, 0.18]
+TAGGED = ["Groundball", "Flyball", "Linedrive", "Bunt"]
+HIT_DIRECTIONS = ["3-4 Hole", "5-6 Hole", "Center Field", "Left Field", "Right Field", "Left Center",
+                  "Right Center", "Short Stop", "Second Base", "Third Base", "First Base", "Pitcher"]
+IN_PLAY_RESULTS = ["1B", "2B", "3B", "HR", "GroundOut", "FlyOut", "Error", "FC", "SACFly"]
+
+
+class LatencyBackend(SQLiteBackend):
+    """SQLite backend that sleeps rtt_ms (+ jitter) per call, like a remote round trip."""
+
+    def __init__(self, path=":memory:", rtt_ms=0.0, jitter_ms=0.0, seed=0):
+        super().__init__(path)
+        self.rtt = rtt_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self._rng = random.Random(seed)
+
+    def _delay(self):
+        if self.rtt or self.jitter:
+            time.sleep(self.rtt + self._rng.random() * self.jitter)
+
+    def _select(self, *args):
+        self._delay()
+        return super()._select(*args)
+
+    def _insert(self, *args):
+        self._delay()
+        return super()._insert(*args)
+
+    def _upsert(self, *args):
+        self._delay()
+        return super()._upsert(*args)
+
+    def _update(self, *args):
+        self._delay()
+        return super()._update(*args)
+
+    def _delete(self, *args):
+        self._delay()
+        return super()._delete(*args)
+
+    def _rpc(self, *args):
+        self._delay()
+        return super()._rpc(*args)
+
+
+def percentiles(values, points=(50, 90, 99)):
+    """Return {"p50": ms, ..., "max": ms, "mean": ms, "n": count} for seconds in values."""
+    if not values:
+        return {"n": 0}
+    vals = sorted(values)
+    out = {"n": len(vals)}
+    for p in points:
+        k = min(len(vals) - 1, max(0, round(p / 100 * (len(vals) - 1))))
+        out[f"p{p}"] = round(vals[k] * 1000, 3)
+    out["max"] = round(vals[-1] * 1000, 3)
+    out["mean"] = round(sum(vals) / len(vals) * 1000, 3)
+    return out
+
+
+def git_version():
+    try:
+        return subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def synthetic_game(seed=0, atbats=75, runner_rate=0.08):
+    """Return a deterministic list of at-bats for one tracked side of a game.
+
+    Each at-bat is {"slot", "pitcher", "inning", "pitches": [...], "result"}; each
+    pitch is a dict of Tracker inputs plus an optional "runner_event".
+    """
+    rng = random.Random(seed)
+    plays = []
+    for i in range(atbats):
+        balls = strikes = 0
+        pitches, result = [], None
+        while result is None:
+            called = rng.choices(CALLS, CALL_MIX)[0]
+            pitch = {
+                "pitch_type": rng.choices(PITCH_TYPES, PITCH_MIX)[0],
+                "called": called,
+                "velocity": round(rng.gauss(86, 5), 1),
+                "zone": rng.randint(1, 14),
+                "tagged": None,
+                "hitdir": None,
+                "runner_event": None,
+            }
+            if called == "Ball Called":
+                balls += 1
+                result = "Walk" if balls == 4 else None
+            elif called in ("Strike Called", "Strike Swing Miss"):
+                strikes += 1
+                if strikes == 3:
+                    result = "Strikeout Looking" if called == "Strike Called" else "Strikeout Swinging"
+            elif called == "Foul Ball":
+                strikes = min(2, strikes + 1)
+            else:
+                pitch["tagged"] = rng.choice(TAGGED)
+                pitch["hitdir"] = rng.choice(HIT_DIRECTIONS)
+                result = rng.choice(IN_PLAY_RESULTS)
+            if rng.random() < runner_rate:
+                event_type = rng.choice(["Stolen Base", "Stolen Base", "Caught Stealing", "Pickoff"])
+                pitch["runner_event"] = {
+                    "start_base": 1, "end_base": 2 if event_type == "Stolen Base" else 0,
+                    "event_type": event_type,
+                }
+            pitches.append(pitch)
+        plays.append({
+            "slot": i % 9,
+            "pitcher": 0 if i < atbats * 2 // 3 else 1,
+            "inning": i * 9 // atbats + 1,
+            "pitches": pitches,
+            "result": result,
+            "runs": 1 if result == "HR" else 0,
+        })
+    return plays
+
+
+def setup_session(label="Bench", gamedate="2026-06-01"):
+    """Game Setup for one simulated scout: create a game and register a roster.
+
+    Returns a Tracker session state dict ready for play_atbat().
+    """
+    gid = db.create_game(f"{label} Home", f"{label} Away", gamedate)
+    hitters = [{"Name": f"{label} Hitter {i + 1}", "Bats": "Right", "Order": i + 1} for i in range(9)]
+    staff = [{"Name": f"{label} Pitcher {i + 1}", "Throws": "Right"} for i in range(2)]
+    state = tracker.init_state({})
+    state.update(selected_game_id=gid, roster=register_roster(gid, hitters, staff))
+    return state
+
+
+def play_atbat(state, writer, play, timings, after_write=None, traces=None):
+    """Run one synthetic at-bat through the Tracker logic.
+
+    timings maps "start_atbat" / "pitch" / "finish_atbat" to
+    lists that receive each step's wall time in seconds. When traces is a
+    list, each step's instrument trace (backend calls made by the step) is
+    appended to it. after_write() runs (untimed) after every queued write,
+    e.g. to drain an outbox.
+    """
+    def step(name, fn, *args, **kwargs):
+        with instrument.collect(name) as trace:
+            result = fn(*args, **kwargs)
+        timings[name].append(trace.total_ms / 1000)
+        if traces is not None:
+            traces.append(trace.to_dict())
+        return result
+
+    batter = state["roster"].lineup[play["slot"]]
+    state["current_batter_id"] = batter["PlayerID"]
+    state["current_pitcher_id"] = state["roster"].pitchers[play["pitcher"]]["PlayerID"]
+    step("start_atbat", tracker.start_atbat, state, play["inning"], leadoff=play["slot"] == 0)
+
+    for p in play["pitches"]:
+        ev = p["runner_event"]
+        events = []
+        if ev:
+            # Entered with the pitch, so both go out in one write.
+            runner = state["roster"].lineup[(play["slot"] - 1) % 9]
+            events = [(runner["Name"], tracker.runner_event_payload(
+                runner["PlayerID"], ev["start_base"], ev["end_base"], ev["event_type"],
+                ev["event_type"] != "Stolen Base"))]
+        step("pitch", tracker.submit_pitch, state, writer, p["pitch_type"], p["called"],
+             velocity=p["velocity"], zone=p["zone"], tagged=p["tagged"], hitdir=p["hitdir"],
+             runner_events=events)
+        if after_write:
+            after_write()
+
+    step("finish_atbat", tracker.finish_atbat, state, play["result"], runs=play["runs"], earned=play["runs"])
@@ -0,0 +1,104 @@
+"""Time a season-sized bulk import through core.importer.
+
+    python -m bench.import_season --pitches 100000 --rtt-ms 40 --workers 4
+    python -m bench.import_season --workers 1 --chunk 1      # close to row-by-row
+
+Writes a deterministic TrackMan-style CSV (synthetic games back to back),
+imports it into a fresh local SQLite backend that can simulate a network
+round trip per call, and prints a JSON report with throughput and call
+counts.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+from bench.common import LatencyBackend, git_version, synthetic_game
+from core import db
+from core.importer import Importer
+
+CALL_NAMES = {"Ball Called": "BallCalled", "Strike Called": "StrikeCalled", "Strike Swing Miss": "StrikeSwinging",
+              "Foul Ball": "FoulBall", "In Play": "InPlay"}
+HEADER = ["Date", "GameID", "HomeTeam", "AwayTeam", "Inning", "Top/Bottom", "PAofInning", "PitchofPA",
+          "Pitcher", "PitcherThrows", "PitcherTeam", "Batter", "BatterSide", "BatterTeam",
+          "TaggedPitchType", "PitchCall", "KorBB", "TaggedHitType", "PlayResult", "RunsScored", "RelSpeed"]
+
+
+def write_season(path, pitches, seed=0):
+    """Write synthetic games until at least pitches rows; return the row count."""
+    rows, game = 0, 0
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(HEADER)
+        while rows < pitches:
+            game += 1
+            date = f"2025-{3 + game // 30 % 4:02d}-{1 + game % 28:02d}"
+            pa_of_inning, last_inning = 0, None
+            for play in synthetic_game(seed=seed + game):
+                pa_of_inning = 1 if play["inning"] != last_inning else pa_of_inning + 1
+                last_inning = play["inning"]
+                result = play["result"]
+                for i, p in enumerate(play["pitches"], 1):
+                    last = i == len(play["pitches"])
+                    korbb = ("Strikeout" if result.startswith("Strikeout") else
+                             "Walk" if result == "Walk" else "Undefined") if last else "Undefined"
+                    w.writerow([
+                        date, f"G{game}", "Home U", "Away U", play["inning"], "Top", pa_of_inning, i,
+                        f"Pitcher {play['pitcher'] + 1}-{game % 12}", "Right", "Home U",
+                        f"Hitter {play['slot'] + 1}-{game % 30}", "Left", "Away U",
+                        p["pitch_type"], CALL_NAMES[p["called"]], korbb,
+                        (p["tagged"] or "") if last else "", result if last and p["called"] == "In Play" else "",
+                        play["runs"] if last else 0, p["velocity"],
+                    ])
+                    rows += 1
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time a season-sized bulk pitch import.")
+    ap.add_argument("--pitches", type=int, default=100_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--rtt-ms", type=float, default=40.0)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--chunk", type=int, default=2000)
+    ap.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "season.csv")
+        rows = write_season(src, args.pitches, args.seed)
+        db.set_backend(LatencyBackend(os.path.join(tmp, "db.sqlite3"), rtt_ms=args.rtt_ms))
+        db.stats.reset()
+        importer = Importer(os.path.join(tmp, "checkpoint.sqlite3"), args.workers, args.chunk)
+        t0 = time.perf_counter()
+        result = importer.run(src)
+        wall = time.perf_counter() - t0
+
+    report = {
+        "benchmark": "import_season",
+        "version": git_version(),
+        "python": sys.version.split()[0],
+        "params": vars(args),
+        "csv_rows": rows,
+        "atbats": result["atbats"],
+        "pitches": result["pitches"],
+        "wall_s": round(wall, 3),
+        "pitches_per_s": round(result["pitches"] / wall, 1),
+        "round_trips": db.stats.total_calls(),
+        "row_by_row_estimate_s": round(rows * 2 * args.rtt_ms / 1000, 1),
+        "warnings": len(importer.warnings),
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
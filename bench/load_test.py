@@ -0,0 +1,429 @@
+"""Drive concurrent scout sessions through the Tracker against a local PostgREST stand-in.
+
+    python -m bench.load_test                                   # 1, 2, 4, 8 and 16 scouts
+    python -m bench.load_test --sessions 4,16,32 --atbats 30 --out bench/results/load.json
+    python -m bench.load_test --same-game 2 --rtt-ms 20         # two scouts per game, 20 ms per request
+    python -m bench.load_test --mode app --sessions 1,2,4       # full Tracker page reruns
+    python -m bench.load_test --without-pitch-counter           # PitchNo from max(PitchNo) + 1
+
+Each concurrency level starts a fresh bench.standin process and reaches it over
+HTTP through the Supabase backend, so the connection pool, deadlines, retries
+and the PitchNo counter RPC are all on the path. Every scout goes through Game
+Setup (the first scout of a game creates it and registers the roster, the
+others join it), then Start AtBat / Submit Pitch / Finish AtBat for a
+synthetic game.
+
+In logic mode (the default) this process plays the Streamlit server: each
+scout is a thread running core.tracker via bench.common.play_atbat and all of
+them share one outbox, as sessions share a server process. In app mode every
+click is a full rerun of pages/2_Tracker.py through Streamlit's AppTest;
+AppTest cannot run concurrently in one process, so each scout gets its own
+process and server CPU/memory are summed over them.
+
+Per level the JSON report gives throughput (pitches submitted and stored per
+second), latency percentiles per step, how long queued writes took to land,
+writes the backend rejected (outbox dead letters), backend calls and retries, CPU and peak RSS of the server and the stand-in,
+and checks on the stored pitches: duplicate PitchNo values, PitchOfAB runs
+that are not 1..n, PitchNo going backwards within an at-bat, and pitches lost
+or stored twice. The exit code is 1 if any check fails.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bench.common import ROOT, git_version, percentiles, play_atbat, setup_session, synthetic_game
+from core import db, roster, tracker
+
+STEPS = ("setup", "start_atbat", "pitch", "finish_atbat")
+TRACKER_PAGE = os.path.join(ROOT, "pages", "2_Tracker.py")
+
+
+# -----------------------------
+# Stand-in process
+# -----------------------------
+def start_standin(path, rtt_ms=0.0, without_pitch_counter=False):
+    """Start bench.standin on a free port; return (process, base URL)."""
+    cmd = [sys.executable, "-m", "bench.standin", "--db", path, "--delay-ms", str(rtt_ms)]
+    if without_pitch_counter:
+        cmd.append("--without-pitch-counter")
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line:
+        raise RuntimeError("bench.standin exited before it was ready")
+    return proc, json.loads(line)["url"]
+
+
+def proc_usage(pid):
+    """Return {"cpu_s", "peak_rss_mb"} of a live process from /proc (Linux), else None."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status") as f:
+            status = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return None
+    return {"cpu_s": (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK"),
+            "peak_rss_mb": int(status["VmHWM"].split()[0]) / 1024}
+
+
+def _self_usage():
+    return {"cpu_s": time.process_time(),
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+# -----------------------------
+# Scouts
+# -----------------------------
+def _game_label(index, same_game):
+    return f"Load {index // same_game + 1}"
+
+
+def _join_game(label, timeout=60.0):
+    """Wait for another scout to create label's game and roster; return a Tracker session state."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        games = db.get_backend().select("Games", "GameID", where=[("HomeTeam", "eq", f"{label} Home")], limit=1)
+        if games:
+            state = tracker.init_state({"selected_game_id": games[0]["GameID"]})
+            game_roster = tracker.load_roster(state)
+            if len(game_roster.lineup) == 9 and len(game_roster.pitchers) == 2:
+                return state
+            roster.cache.invalidate(state["selected_game_id"])
+        time.sleep(0.02)
+    raise TimeoutError(f"Game {label} was not set up within {timeout:.0f} s")
+
+
+def game_setup(index, same_game):
+    label = _game_label(index, same_game)
+    if index % same_game == 0:
+        return setup_session(label)
+    return _join_game(label)
+
+
+def logic_scout(index, args, writer, start, out):
+    """One scout thread: Game Setup, then every at-bat of its synthetic game through core.tracker."""
+    timings = {step: [] for step in STEPS}
+    result = {"timings": timings, "pitches": 0, "errors": []}
+    out[index] = result
+    think = args.think_ms / 1000.0
+    start.wait()
+    result["started"] = time.perf_counter()
+    try:
+        t0 = time.perf_counter()
+        state = game_setup(index, args.same_game)
+        timings["setup"].append(time.perf_counter() - t0)
+        for play in synthetic_game(seed=args.seed + index, atbats=args.atbats):
+            play_atbat(state, writer, play, timings, after_write=(lambda: time.sleep(think)) if think else None)
+    except Exception as e:
+        result["errors"].append(f"{type(e).__name__}: {e}")
+    result["pitches"] = len(timings["pitch"])
+    result["finished"] = time.perf_counter()
+    return result
+
+
+def _widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def _drop_stale_widgets(block):
+    """Remove widgets AppTest kept from before a fragment's st.rerun().
+
+    AppTest leaves them in its element tree without session state, and the
+    next run fails serializing them; the browser would have dropped them.
+    """
+    from streamlit.testing.v1.element_tree import Widget
+
+    for key, node in list(block.children.items()):
+        if isinstance(node, Widget):
+            try:
+                node.value
+            except KeyError:
+                del block.children[key]
+        elif getattr(node, "children", None):
+            _drop_stale_widgets(node)
+
+
+def app_scout(index, args, url, workdir, start_at):
+    """One scout process: every click is a full Tracker page rerun through AppTest."""
+    os.environ["PITCH_OUTBOX_PATH"] = os.path.join(workdir, f"outbox-{index}.sqlite3")
+    from streamlit.testing.v1 import AppTest
+
+    from core.backends.supabase_backend import SupabaseBackend
+    from core.outbox import get_outbox
+
+    db.set_backend(SupabaseBackend(url, "anon"))
+    timings = {step: [] for step in STEPS + ("open",)}
+    result = {"timings": timings, "pitches": 0, "errors": []}
+    time.sleep(max(0.0, start_at - time.time()))
+    usage0 = _self_usage()
+    result["started"] = time.time()
+
+    def click(step, at, label):
+        _drop_stale_widgets(at._tree)
+        t0 = time.perf_counter()
+        _widget(at.button, label).click().run(timeout=60)
+        timings[step].append(time.perf_counter() - t0)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+    try:
+        t0 = time.perf_counter()
+        state = game_setup(index, args.same_game)
+        timings["setup"].append(time.perf_counter() - t0)
+        game_roster = state["roster"]
+        at = AppTest.from_file(TRACKER_PAGE, default_timeout=60)
+        at.session_state["selected_game_id"] = state["selected_game_id"]
+        t0 = time.perf_counter()
+        at.run()
+        timings["open"].append(time.perf_counter() - t0)
+        for play in synthetic_game(seed=args.seed + index, atbats=args.atbats):
+            _widget(at.selectbox, "Select Batter").set_value(game_roster.lineup[play["slot"]]["Name"])
+            _widget(at.selectbox, "Select Pitcher").set_value(game_roster.pitchers[play["pitcher"]]["Name"])
+            _widget(at.number_input, "Inning").set_value(play["inning"])
+            click("start_atbat", at, "Start AtBat")
+            for p in play["pitches"]:
+                _widget(at.radio, "Select Type").set_value(p["pitch_type"])
+                _widget(at.radio, "Select Result").set_value(p["called"])
+                click("pitch", at, "Submit Pitch")
+                result["pitches"] += 1
+                time.sleep(args.think_ms / 1000.0)
+            _widget(at.selectbox, "Play Result").set_value(play["result"])
+            click("finish_atbat", at, "Finish AtBat")
+    except Exception as e:
+        result["errors"].append(f"{type(e).__name__}: {e}")
+    result["finished"] = time.time()
+    outbox = get_outbox()
+    result["stuck_writes"], result["drain_s"] = _drain(outbox, args.drain_timeout)
+    result["dead_writes"] = outbox.dead_count()
+    result["last_error"] = outbox.last_error
+    result["write_lag"] = _write_lags(outbox.path)
+    usage1 = _self_usage()
+    result["server"] = {"cpu_s": usage1["cpu_s"] - usage0["cpu_s"], "peak_rss_mb": usage1["peak_rss_mb"]}
+    result["calls"] = db.stats.snapshot()
+    return result
+
+
+def _drain(outbox, timeout):
+    """Wait for the outbox to empty; return (writes still pending, seconds waited)."""
+    t0 = time.perf_counter()
+    while outbox.pending_count() and time.perf_counter() - t0 < timeout:
+        time.sleep(0.02)
+    return outbox.pending_count(), time.perf_counter() - t0
+
+
+def _write_lags(path):
+    """Seconds from enqueue to landing of every sent outbox row."""
+    conn = sqlite3.connect(path)
+    try:
+        return [r[0] for r in conn.execute("SELECT sent_at - created_at FROM outbox WHERE sent_at IS NOT NULL")]
+    finally:
+        conn.close()
+
+
+# -----------------------------
+# One concurrency level
+# -----------------------------
+def run_logic_level(args, sessions, url, workdir):
+    """Runs in a fresh process per level; returns the per-scout results and process totals."""
+    os.environ["PITCH_OUTBOX_PATH"] = os.path.join(workdir, "outbox.sqlite3")
+    from core.backends.supabase_backend import SupabaseBackend
+    from core.outbox import get_outbox
+
+    db.set_backend(SupabaseBackend(url, "anon"))
+    outbox = get_outbox()
+    start = threading.Event()
+    scouts = [None] * sessions
+    threads = [threading.Thread(target=logic_scout, args=(i, args, outbox, start, scouts), name=f"scout-{i}")
+               for i in range(sessions)]
+    for t in threads:
+        t.start()
+    usage0 = _self_usage()
+    t0 = time.perf_counter()
+    start.set()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    stuck, drain = _drain(outbox, args.drain_timeout)
+    usage1 = _self_usage()
+    return {
+        "scouts": scouts,
+        "wall_s": wall,
+        "drain_s": drain,
+        "stuck_writes": stuck,
+        "dead_writes": outbox.dead_count(),
+        "last_error": outbox.last_error,
+        "write_lag": _write_lags(outbox.path),
+        "server": {"cpu_s": usage1["cpu_s"] - usage0["cpu_s"], "peak_rss_mb": usage1["peak_rss_mb"]},
+        "calls": db.stats.snapshot(),
+    }
+
+
+def run_app_level(args, sessions, url, workdir):
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(sessions, mp_context=ctx) as pool:
+        start_at = time.time() + 3.0 + 0.25 * sessions  # lets every process finish importing first
+        scouts = list(pool.map(app_scout, range(sessions), [args] * sessions, [url] * sessions,
+                               [workdir] * sessions, [start_at] * sessions))
+    calls = {}
+    for s in scouts:
+        for c in s["calls"]:
+            key = (c["table"], c["op"])
+            total = calls.setdefault(key, {"table": c["table"], "op": c["op"], "calls": 0, "errors": 0,
+                                           "retries": 0, "timeouts": 0})
+            for k in ("calls", "errors", "retries", "timeouts"):
+                total[k] += c.get(k, 0)
+    return {
+        "scouts": scouts,
+        "wall_s": max(s["finished"] for s in scouts) - min(s["started"] for s in scouts),
+        "drain_s": max(s["drain_s"] for s in scouts),
+        "stuck_writes": sum(s["stuck_writes"] for s in scouts),
+        "dead_writes": sum(s["dead_writes"] for s in scouts),
+        "last_error": next((s["last_error"] for s in scouts if s["last_error"]), None),
+        "write_lag": [lag for s in scouts for lag in s["write_lag"]],
+        "server": {"cpu_s": sum(s["server"]["cpu_s"] for s in scouts),
+                   "peak_rss_mb": sum(s["server"]["peak_rss_mb"] for s in scouts)},
+        "calls": list(calls.values()),
+    }
+
+
+def check_pitches(path):
+    """Integrity checks on the stand-in's stored pitches."""
+    conn = sqlite3.connect(path)
+    try:
+        one = lambda sql: conn.execute(sql).fetchone()[0]  # noqa: E731
+        return {
+            "stored": one('SELECT COUNT(*) FROM "Pitches"'),
+            "duplicate_pitch_nos": one('SELECT COUNT(*) FROM (SELECT "PitchNo" FROM "Pitches" '
+                                       'GROUP BY "PitchNo" HAVING COUNT(*) > 1)'),
+            "bad_pitch_of_ab": one('SELECT COUNT(*) FROM (SELECT "AtBatID" FROM "Pitches" GROUP BY "AtBatID" '
+                                   'HAVING COUNT(DISTINCT "PitchOfAB") != COUNT(*) OR MIN("PitchOfAB") != 1 '
+                                   'OR MAX("PitchOfAB") != COUNT(*))'),
+            "pitch_no_backwards": one('SELECT COUNT(*) FROM "Pitches" a JOIN "Pitches" b '
+                                      'ON b."AtBatID" = a."AtBatID" AND b."PitchOfAB" = a."PitchOfAB" + 1 '
+                                      'WHERE b."PitchNo" <= a."PitchNo"'),
+        }
+    finally:
+        conn.close()
+
+
+def run_level(args, sessions):
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "standin.sqlite3")
+        standin, url = start_standin(path, args.rtt_ms, args.without_pitch_counter)
+        try:
+            standin0 = proc_usage(standin.pid)
+            if args.mode == "app":
+                level = run_app_level(args, sessions, url, workdir)
+            else:
+                with ProcessPoolExecutor(1, mp_context=mp.get_context("spawn")) as pool:
+                    level = pool.submit(run_logic_level, args, sessions, url, workdir).result()
+            standin1 = proc_usage(standin.pid)
+        finally:
+            standin.terminate()
+            standin.wait()
+        checks = check_pitches(path)
+    return summarize(sessions, level, checks, standin0, standin1)
+
+
+def summarize(sessions, level, checks, standin0, standin1):
+    scouts = level["scouts"]
+    wall = level["wall_s"]
+    submitted = sum(s["pitches"] for s in scouts)
+    steps = {}
+    for s in scouts:
+        for step, values in s["timings"].items():
+            steps.setdefault(step, []).extend(values)
+    errors = [e for s in scouts for e in s["errors"]]
+    calls = level["calls"]
+    total_calls = sum(c["calls"] for c in calls)
+    checks["lost_pitches"] = max(0, submitted - checks["stored"])
+    checks["extra_pitches"] = max(0, checks["stored"] - submitted)
+    out = {
+        "sessions": sessions,
+        "wall_s": round(wall, 3),
+        "pitches_submitted": submitted,
+        "pitches_per_s": round(submitted / wall, 1) if wall else None,
+        "stored_per_s": round(checks["stored"] / (wall + level["drain_s"]), 1) if wall else None,
+        "latency_ms": {step: percentiles(v) for step, v in steps.items() if v},
+        "write_lag_ms": percentiles(level["write_lag"]),
+        "drain_s": round(level["drain_s"], 3),
+        "stuck_writes": level["stuck_writes"],
+        "dead_writes": level["dead_writes"],
+        "outbox_last_error": level["last_error"],
+        "errors": len(errors),
+        "first_errors": errors[:5],
+        "backend": {
+            "calls": total_calls,
+            "calls_per_pitch": round(total_calls / max(1, submitted), 2),
+            "retries": sum(c.get("retries", 0) for c in calls),
+            "timeouts": sum(c.get("timeouts", 0) for c in calls),
+            "failed": sum(c.get("errors", 0) for c in calls),
+        },
+        "server": {"cpu_s": round(level["server"]["cpu_s"], 2),
+                   "cpu_pct": round(100 * level["server"]["cpu_s"] / wall, 1) if wall else None,
+                   "peak_rss_mb": round(level["server"]["peak_rss_mb"], 1)},
+        "checks": checks,
+    }
+    if standin0 and standin1:
+        cpu = standin1["cpu_s"] - standin0["cpu_s"]
+        out["standin"] = {"cpu_s": round(cpu, 2), "cpu_pct": round(100 * cpu / wall, 1) if wall else None,
+                          "peak_rss_mb": round(standin1["peak_rss_mb"], 1)}
+    return out
+
+
+def failed(level):
+    c = level["checks"]
+    return bool(c["duplicate_pitch_nos"] or c["bad_pitch_of_ab"] or c["pitch_no_backwards"]
+                or c["lost_pitches"] or c["extra_pitches"] or level["errors"] or level["dead_writes"])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Load-test concurrent Tracker sessions against a local backend.")
+    ap.add_argument("--sessions", default="1,2,4,8,16", help="comma-separated concurrency levels")
+    ap.add_argument("--mode", choices=["logic", "app"], default="logic")
+    ap.add_argument("--atbats", type=int, default=20, help="at-bats per scout")
+    ap.add_argument("--same-game", type=int, default=1, help="scouts logging each game")
+    ap.add_argument("--think-ms", type=float, default=0.0, help="pause after every pitch")
+    ap.add_argument("--rtt-ms", type=float, default=0.0, help="delay the stand-in adds to every request")
+    ap.add_argument("--without-pitch-counter", action="store_true",
+                    help="stand-in without sql/001_pitch_numbers.sql (no counter RPC, no unique PitchNo)")
+    ap.add_argument("--drain-timeout", type=float, default=60.0, help="seconds to wait for queued writes")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = ap.parse_args()
+    levels = [int(n) for n in args.sessions.split(",") if n.strip()]
+
+    report = {
+        "benchmark": "load_test",
+        "version": git_version(),
+        "python": sys.version.split()[0],
+        "cpus": os.cpu_count(),
+        "params": vars(args),
+        "levels": [],
+    }
+    for n in levels:
+        report["levels"].append(run_level(args, n))
+        print(f"sessions={n} done", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if any(failed(level) for level in report["levels"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Replay a synthetic game through the Tracker hot path and report its cost.
+
+    python -m bench.replay_game --rtt-ms 60 --out bench/results/replay.json
+    python -m bench.replay_game --writer direct      # synchronous inserts, no outbox
+    python -m bench.replay_game --reruns 50          # also time full Tracker reruns
+    python -m bench.replay_game --path baseline      # the original page's per-pitch calls
+
+A deterministic game (about 75 at-bats, 300 pitches and a few runner events)
+goes through core.tracker (start_atbat, count update and WEL,
+pitch numbering, submit_pitch with its runner events, finish_atbat) against a
+local SQLite backend that can simulate a network round trip. The output is
+JSON so runs from different versions can be diffed or compared by a script;
+--trace-out writes the per-step traces in the same JSON-lines format the app
+exports, so `python -m core.instrument` summarizes both.
+
+--path baseline replays the same game through the calls the Tracker page made
+before core.tracker existed: per pitch, the two max() lookups of the old
+next_pitch_numbers_for, then a synchronous insert_pitch_safe and one insert
+per runner event. Its report is the reference the refactored path is
+compared against.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from bench.common import LatencyBackend, git_version, percentiles, play_atbat, setup_session, synthetic_game
+from core import db, instrument
+from core.counts import apply_call, compute_wel
+from core.outbox import DirectWriter, Outbox
+
+
+def _drain(outbox):
+    while outbox.flush_once():
+        pass
+
+
+def _baseline_pitch_numbers(atbat_id):
+    """The original page's next_pitch_numbers_for: (max(PitchNo) + 1, max(PitchOfAB) + 1)."""
+    be = db.get_backend()
+    r1 = be.select("Pitches", "PitchNo", order=("-PitchNo",), limit=1)
+    r2 = be.select("Pitches", "PitchOfAB", where=[("AtBatID", "eq", atbat_id)], order=("-PitchOfAB",), limit=1)
+    last_global = r1[0]["PitchNo"] if r1 and r1[0]["PitchNo"] is not None else 0
+    last_poab = r2[0]["PitchOfAB"] if r2 and r2[0]["PitchOfAB"] is not None else 0
+    return int(last_global) + 1, int(last_poab) + 1
+
+
+def baseline_atbat(state, play, timings, traces):
+    """Run one synthetic at-bat through the baseline Tracker page's backend calls."""
+    def step(name, fn, *args):
+        with instrument.collect(name) as trace:
+            result = fn(*args)
+        timings[name].append(trace.total_ms / 1000)
+        traces.append(trace.to_dict())
+        return result
+
+    roster = state["roster"]
+    batter = roster.lineup[play["slot"]]["PlayerID"]
+    pitcher = roster.pitchers[play["pitcher"]]["PlayerID"]
+
+    def start():
+        atbat_id = db.create_atbat(state["selected_game_id"], batter, pitcher, play["inning"])
+        numbers = _baseline_pitch_numbers(atbat_id)  # refresh_pitch_numbers() on the next rerun
+        return atbat_id, numbers
+
+    atbat_id, numbers = step("start_atbat", start)
+    balls = strikes = 0
+    for p in play["pitches"]:
+        balls, strikes = apply_call(balls, strikes, p["called"])
+
+        def pitch(numbers=numbers, p=p, balls=balls, strikes=strikes):
+            row = db.insert_pitch_safe(atbat_id, numbers[0], numbers[1], p["pitch_type"], p["velocity"],
+                                       p["zone"], p["called"], balls, strikes, compute_wel(balls, strikes),
+                                       p["tagged"], p["hitdir"], None)[0]
+            ev = p["runner_event"]
+            if ev:
+                runner = roster.lineup[(play["slot"] - 1) % 9]["PlayerID"]
+                db.get_backend().insert("RunnerEvents", {
+                    "PitchID": row["PitchID"], "RunnerID": runner, "StartBase": ev["start_base"],
+                    "EndBase": ev["end_base"] or None, "EventType": ev["event_type"],
+                    "OutRecorded": ev["event_type"] != "Stolen Base",
+                })
+            return _baseline_pitch_numbers(atbat_id)
+
+        numbers = step("pitch", pitch)
+
+    step("finish_atbat", db.update_atbat, atbat_id,
+         {"RunsScored": play["runs"], "EarnedRuns": play["runs"], "PlayResult": play["result"]})
+
+
+def replay(args, workdir):
+    db.set_backend(LatencyBackend(rtt_ms=args.rtt_ms, jitter_ms=args.jitter_ms, seed=args.seed))
+    plays = synthetic_game(seed=args.seed, atbats=args.atbats)
+    state = setup_session()
+
+    if args.path == "baseline":
+        writer, drain_time, after_write = None, [], None
+    elif args.writer == "outbox":
+        writer = Outbox(os.path.join(workdir, "outbox.sqlite3"))
+        drain_time = []
+
+        def after_write():
+            t0 = time.perf_counter()
+            _drain(writer)
+            drain_time.append(time.perf_counter() - t0)
+    else:
+        writer, drain_time, after_write = DirectWriter(), [], None
+
+    timings = {"start_atbat": [], "pitch": [], "finish_atbat": []}
+    traces = []
+    db.stats.reset()
+    t0 = time.perf_counter()
+    for play in plays:
+        if args.path == "baseline":
+            baseline_atbat(state, play, timings, traces)
+        else:
+            play_atbat(state, writer, play, timings, after_write, traces)
+    wall = time.perf_counter() - t0
+
+    if args.trace_out:
+        with open(args.trace_out, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(t) + "\n" for t in traces)
+
+    pitches = len(timings["pitch"])
+    calls = db.stats.snapshot()
+    foreground = {step: [len(t["calls"]) for t in traces if t["name"] == step] for step in timings}
+    return {
+        "atbats": len(plays),
+        "pitches": pitches,
+        "runner_events": sum(1 for play in plays for p in play["pitches"] if p["runner_event"]),
+        "wall_s": round(wall, 4),
+        "latency_ms": {step: percentiles(v) for step, v in timings.items()},
+        "background_flush_ms": percentiles(drain_time),
+        "round_trips": db.stats.total_calls(),
+        "round_trips_per_pitch": round(db.stats.total_calls() / max(1, pitches), 3),
+        "foreground_round_trips": {
+            step: {"total": sum(v), "max": max(v, default=0)} for step, v in foreground.items()
+        },
+        "calls": [
+            {(k[:-2] + "_ms" if k.endswith("_s") else k): (round(v * 1000, 3) if k.endswith("_s") else v)
+             for k, v in c.items()}
+            for c in calls
+        ],
+    }
+
+
+def rerun_times(args, workdir):
+    """Time full Tracker script reruns (Submit Pitch clicks) with Streamlit's AppTest."""
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return {"skipped": "streamlit is not installed"}
+
+    os.environ["PITCH_OUTBOX_PATH"] = os.path.join(workdir, "app_outbox.sqlite3")
+    db.set_backend(LatencyBackend(rtt_ms=args.rtt_ms, jitter_ms=args.jitter_ms, seed=args.seed))
+    state = setup_session("Rerun")
+    state["current_batter_id"] = state["roster"].lineup[0]["PlayerID"]
+    state["current_pitcher_id"] = state["roster"].pitchers[0]["PlayerID"]
+
+    from core import tracker
+    tracker.start_atbat(state, 1)
+
+    page = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pages", "2_Tracker.py")
+    at = AppTest.from_file(page, default_timeout=60)
+    for k, v in state.items():
+        at.session_state[k] = v
+    at.run()
+
+    times = []
+    for i in range(args.reruns):
+        if i and i % 4 == 0:
+            # Keep the at-bat going without ever reaching a terminal count.
+            at.session_state["balls"] = at.session_state["strikes"] = 0
+        button = next(b for b in at.button if b.label == "Submit Pitch")
+        t0 = time.perf_counter()
+        button.click().run()
+        times.append(time.perf_counter() - t0)
+    return percentiles(times)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay a synthetic game through the Tracker hot path.")
+    ap.add_argument("--atbats", type=int, default=75)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--rtt-ms", type=float, default=0.0, help="simulated backend round trip per call")
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--path", choices=["tracker", "baseline"], default="tracker",
+                    help="core.tracker, or the original page's call sequence (ignores --writer)")
+    ap.add_argument("--writer", choices=["outbox", "direct"], default="outbox")
+    ap.add_argument("--reruns", type=int, default=0, help="also time this many Tracker reruns")
+    ap.add_argument("--out", help="write the JSON report here instead of stdout")
+    ap.add_argument("--trace-out", help="write per-step instrument traces here as JSON lines")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        report = {
+            "benchmark": "replay_game",
+            "version": git_version(),
+            "python": sys.version.split()[0],
+            "params": vars(args),
+            "replay": replay(args, workdir),
+        }
+        if args.reruns:
+            report["rerun_ms"] = rerun_times(args, workdir)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
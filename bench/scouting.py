@@ -0,0 +1,70 @@
+"""Time batch scouting reports: serial, across a process pool, and a cached rerun.
+
+    python -m bench.scouting --pitches 50000 --workers 4
+
+Imports a synthetic season (see bench.import_season) into a fresh local
+SQLite backend, then writes HTML reports for every player three times: with
+one worker, with --workers, and again with nothing changed, which should
+skip every report.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from bench.common import git_version
+from bench.import_season import write_season
+from core import db, scouting
+from core.backends.sqlite_backend import SQLiteBackend
+from core.importer import Importer
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time batch scouting report generation.")
+    ap.add_argument("--pitches", type=int, default=50_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--format", choices=["html", "csv"], default="html")
+    ap.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "season.csv")
+        rows = write_season(src, args.pitches, args.seed)
+        db.set_backend(SQLiteBackend(os.path.join(tmp, "db.sqlite3")))
+        Importer(os.path.join(tmp, "checkpoint.sqlite3"), workers=4).run(src)
+        players = db.get_backend().select("Players", "PlayerID, Name, Team")
+
+        runs = {}
+        for name, out, workers in (("serial", "serial", 1), ("parallel", "parallel", args.workers),
+                                   ("cached", "parallel", args.workers)):
+            db.stats.reset()
+            t0 = time.perf_counter()
+            r = scouting.generate(players, os.path.join(tmp, out), args.format, workers)
+            runs[name] = {"wall_s": round(time.perf_counter() - t0, 3), "built": r["built"],
+                          "skipped": r["skipped"], "round_trips": db.stats.total_calls()}
+
+    report = {
+        "benchmark": "scouting",
+        "version": git_version(),
+        "python": sys.version.split()[0],
+        "params": vars(args),
+        "pitches": rows,
+        "players": len(players),
+        "reports": r["reports"],
+        "runs": runs,
+        "speedup": round(runs["serial"]["wall_s"] / max(runs["parallel"]["wall_s"], 1e-9), 2),
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
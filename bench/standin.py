@@ -0,0 +1,240 @@
+"""Local PostgREST-compatible stand-in for the Supabase backend.
+
+    python -m bench.standin --db /tmp/standin.sqlite3 --port 54321
+
+Serves the subset of the PostgREST API that core.backends.supabase_backend
+uses (table selects with embedded resources, eq/neq/gt/gte/lt/lte/in/is
+filters, or=(...), order, limit; insert, upsert with on_conflict, update,
+delete and /rpc/<fn>) on /rest/v1, backed by the SQLite backend's tables,
+indexes, triggers and RPCs. The app and the load tests can then run the real
+HTTP client path (connection pool, deadlines, retries) without a Supabase
+project. Every request is handled on its own thread; SQLite serializes the
+writes, much as row locks on the counter and unique indexes would. Errors
+come back as PostgREST JSON errors with the matching status code.
+"""
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from core.backends.sqlite_backend import SQLiteBackend
+
+PREFIX = "/rest/v1/"
+_RESERVED = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+_FILTER = re.compile(r"^(not\.)?(eq|neq|gt|gte|lt|lte|in|is)\.(.*)$", re.S)
+
+
+class APIError(Exception):
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status, self.code = status, code
+
+
+def split_top(text, sep=","):
+    """Split on sep outside parentheses and double quotes."""
+    parts, depth, quoted, buf = [], 0, False, []
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == sep:
+            parts.append("".join(buf))
+            buf = []
+            continue
+        buf.append(ch)
+    parts.append("".join(buf))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _value(text):
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        return text[1:-1].replace('\\"', '"')
+    if text in ("null", "true", "false"):
+        return {"null": None, "true": True, "false": False}[text]
+    return text  # SQLite's column affinity converts numeric strings on comparison
+
+
+def _condition(column, expr):
+    m = _FILTER.match(expr)
+    if not m or m.group(1):
+        raise APIError(400, "PGRST100", f"Unsupported filter: {column}={expr}")
+    op, raw = m.group(2), m.group(3)
+    if op == "in":
+        return column, "in", [_value(v) for v in split_top(raw.strip("()"))]
+    return column, op, _value(raw)
+
+
+def parse_or(expr):
+    """Turn or=(a.eq.1,and(b.lt.2,c.gt.3)) into the backends' (None, "or", groups) filter."""
+    groups = []
+    for item in split_top(expr.strip()[1:-1]):
+        conds = split_top(item[4:-1]) if item.startswith("and(") else [item]
+        group = []
+        for cond in conds:
+            column, _, rest = cond.partition(".")
+            group.append(_condition(column, rest))
+        groups.append(group)
+    return None, "or", groups
+
+
+def parse_query(query):
+    """Return (params, where) for a PostgREST query string."""
+    params, where = {}, []
+    for key, val in parse_qsl(query, keep_blank_values=True):
+        if key in _RESERVED:
+            params[key] = val
+        elif key == "or":
+            where.append(parse_or(val))
+        else:
+            where.append(_condition(key, val))
+    return params, where
+
+
+def parse_order(text):
+    order = []
+    for item in split_top(text or ""):
+        column, *mods = item.split(".")
+        order.append(("-" if "desc" in mods else "") + column)
+    return tuple(order)
+
+
+class StandIn:
+    """Dispatches PostgREST requests to a SQLiteBackend; counts requests per table and operation."""
+
+    def __init__(self, path, delay_ms=0.0, without_pitch_counter=False):
+        self.backend = SQLiteBackend(path)
+        self.delay = delay_ms / 1000.0
+        self.without_pitch_counter = without_pitch_counter
+        if without_pitch_counter:
+            self.backend.conn.execute("DROP INDEX IF EXISTS pitches_pitchno_key")
+        self.requests = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def handle(self, method, path, query, body, prefer):
+        table = unquote(path[len(PREFIX):]) if path.startswith(PREFIX) else None
+        if not table:
+            raise APIError(404, "PGRST125", f"Invalid path: {path}")
+        if self.delay:
+            time.sleep(self.delay)
+        be = self.backend
+        params, where = parse_query(query)
+        if table.startswith("rpc/"):
+            fn = table[4:]
+            self._count("rpc", fn)
+            if getattr(be, f"rpc_{fn}", None) is None or (fn == "reserve_pitch_numbers"
+                                                          and self.without_pitch_counter):
+                raise APIError(404, "PGRST202", f"Could not find the function public.{fn}")
+            return be._rpc(fn, body or {})
+        self._count(table, method)
+        try:
+            be.columns(table)
+        except ValueError:
+            raise APIError(404, "PGRST205", f"Could not find the table public.{table}")
+        if method == "GET":
+            limit = params.get("limit")
+            return be._select(table, params.get("select") or "*", where, parse_order(params.get("order")),
+                              int(limit) if limit else None)
+        if method == "POST":
+            rows = body if isinstance(body, list) else [body]
+            if "resolution=merge-duplicates" in prefer:
+                return be._upsert(table, rows, params.get("on_conflict") or be.columns(table)[0])
+            return be._insert(table, rows)
+        if method == "PATCH":
+            return be._update(table, body, where)
+        if method == "DELETE":
+            return be._delete(table, where)
+        raise APIError(405, "PGRST117", f"Unsupported method {method}")
+
+    def _count(self, table, op):
+        key = f"{table}.{op}"
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {"uptime_s": round(time.time() - self.started, 3), "requests": dict(self.requests)}
+
+
+def _error(exc):
+    if isinstance(exc, APIError):
+        return exc
+    if isinstance(exc, sqlite3.IntegrityError):
+        code = "23505" if "UNIQUE" in str(exc) else "23503" if "FOREIGN KEY" in str(exc) else "23502"
+        return APIError(409, code, str(exc))
+    if isinstance(exc, sqlite3.OperationalError) and "locked" in str(exc):
+        return APIError(503, "PGRST003", str(exc))
+    return APIError(400, "PGRST100", f"{type(exc).__name__}: {exc}")
+
+
+def make_handler(standin):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+        def _dispatch(self):
+            url = urlsplit(self.path)
+            if url.path == "/_stats":
+                return self._send(200, standin.stats())
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+            try:
+                data = standin.handle(self.command, url.path, url.query, body, self.headers.get("Prefer") or "")
+            except Exception as e:
+                err = _error(e)
+                return self._send(err.status, {"code": err.code, "message": str(err), "details": None,
+                                               "hint": None})
+            self._send(201 if self.command == "POST" and not url.path.startswith(PREFIX + "rpc/") else 200, data)
+
+        def _send(self, status, data):
+            payload = json.dumps(data, default=str).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PATCH = do_DELETE = _dispatch
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(path, host="127.0.0.1", port=0, delay_ms=0.0, without_pitch_counter=False):
+    """Create the server (not yet serving); its port is server.server_address[1]."""
+    server = ThreadingHTTPServer((host, port), make_handler(StandIn(path, delay_ms, without_pitch_counter)))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve a SQLite file over a PostgREST-compatible API.")
+    ap.add_argument("--db", required=True, help="SQLite file (created with the app schema if missing)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    ap.add_argument("--delay-ms", type=float, default=0.0, help="added to every request, like a network hop")
+    ap.add_argument("--without-pitch-counter", action="store_true",
+                    help="serve Pitches as before sql/001_pitch_numbers.sql: no reserve_pitch_numbers RPC "
+                         "and no unique PitchNo index")
+    args = ap.parse_args()
+    server = serve(args.db, args.host, args.port, args.delay_ms, args.without_pitch_counter)
+    print(json.dumps({"url": f"http://{args.host}:{server.server_address[1]}"}), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
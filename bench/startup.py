@@ -0,0 +1,130 @@
+"""Measure cold-start cost: imports, backend setup and each page's first run.
+
+    python -m bench.startup
+    python -m bench.startup --repeat 5 --out bench/results/startup.json
+
+Every sample runs in a fresh interpreter, like the first request to a
+container that just scaled up from zero. Pages run once through Streamlit's
+AppTest against an empty local SQLite backend, so the numbers cover imports
+and script work, not network latency. The Supabase backend is constructed
+against an unreachable URL and its PostgREST client created (ready_ms),
+which is everything a cold start pays before the first query goes out. The
+report also lists the slowest imports on that path (python -X importtime)
+and whether the full supabase package got loaded.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from bench.common import git_version
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["app.py"] + [os.path.join("pages", p) for p in sorted(os.listdir(os.path.join(ROOT, "pages")))
+                      if p.endswith(".py")]
+IMPORTS = ["streamlit", "postgrest", "core.db", "core.backends.supabase_backend"]
+
+_IMPORT = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+print(json.dumps({{"ms": (time.perf_counter() - t0) * 1000}}))
+"""
+
+_BACKEND = """
+import json, sys, time
+t0 = time.perf_counter()
+from core.backends.supabase_backend import SupabaseBackend
+backend = SupabaseBackend("http://127.0.0.1:9", "anon")
+t1 = time.perf_counter()
+backend.client
+print(json.dumps({"ms": (time.perf_counter() - t0) * 1000, "construct_ms": (t1 - t0) * 1000,
+                  "supabase_loaded": "supabase" in sys.modules,
+                  "modules": len(sys.modules)}))
+"""
+
+_PAGE = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file({page!r}, default_timeout=60)
+at.run()
+t2 = time.perf_counter()
+print(json.dumps({{"import_ms": (t1 - t0) * 1000, "first_run_ms": (t2 - t1) * 1000,
+                  "errors": [str(e.value) for e in at.exception]}}))
+"""
+
+
+def _child(code, env=None, importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    proc = subprocess.run(cmd, cwd=ROOT, env={**os.environ, **(env or {})}, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "child failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def _median(samples, key):
+    return round(statistics.median(s[key] for s in samples), 1)
+
+
+def slowest_imports(module, top=10):
+    """Return the top cumulative import times (ms) seen while importing module."""
+    _, stderr = _child(_IMPORT.format(module=module), importtime=True)
+    rows = []
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+            rows.append({"module": name, "cumulative_ms": round(int(cumulative) / 1000, 1)})
+    return sorted(rows, key=lambda r: r["cumulative_ms"], reverse=True)[:top]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Measure cold-start import and first-render times.")
+    ap.add_argument("--repeat", type=int, default=3, help="fresh interpreters per measurement")
+    ap.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = ap.parse_args()
+
+    imports = {m: _median([_child(_IMPORT.format(module=m))[0] for _ in range(args.repeat)], "ms")
+               for m in IMPORTS}
+    backend = [_child(_BACKEND)[0] for _ in range(args.repeat)]
+
+    pages = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {"PITCH_TRACKER_BACKEND": "sqlite", "PITCH_TRACKER_DB": os.path.join(tmp, "db.sqlite3"),
+               "PITCH_OUTBOX_PATH": os.path.join(tmp, "outbox.sqlite3")}
+        for page in PAGES:
+            samples = [_child(_PAGE.format(page=page), env)[0] for _ in range(args.repeat)]
+            pages[page] = {"import_ms": _median(samples, "import_ms"),
+                           "first_run_ms": _median(samples, "first_run_ms"),
+                           "errors": samples[-1]["errors"]}
+
+    report = {
+        "benchmark": "startup",
+        "version": git_version(),
+        "python": sys.version.split()[0],
+        "params": vars(args),
+        "import_ms": imports,
+        "supabase_backend": {
+            "construct_ms": _median(backend, "construct_ms"),
+            "ready_ms": _median(backend, "ms"),
+            "supabase_package_loaded": backend[-1]["supabase_loaded"],
+            "modules_loaded": backend[-1]["modules"],
+            "slowest_imports": slowest_imports("postgrest"),
+        },
+        "pages": pages,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
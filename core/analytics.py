@@ -0,0 +1,204 @@
+"""Per-game, per-pitcher pitching aggregates for the Analytics page.
+
+A game's Pitches (joined to AtBats for the pitcher) are loaded once into a
+pandas frame and reduced with vectorized group-bys into one PitcherLine of
+running totals per pitcher. The lines are shared by every session and kept
+current by core.db write notifications: each inserted pitch is folded into its
+pitcher's line in O(1), so a live game never triggers a reload. Corrections
+(upserts, updates, deletes) and at-bats whose pitcher changed mark the game
+stale and it is reloaded on next use; a TTL covers writes made by other
+processes. Writes that land while a game is loading are held back and
+replayed onto it once it is registered.
+"""
+import threading
+import time
+from collections import Counter
+
+from core import db
+from core.counts import CALLS
+
+STRIKE_CALLS = tuple(c for c in CALLS if c != "Ball Called")
+
+
+class PitcherLine:
+    """Running totals for one pitcher in one game."""
+
+    def __init__(self):
+        self.pitches = 0
+        self.strikes = 0
+        self.types = {}  # PitchType -> [pitches, velo readings, velo sum, velo max]
+        self.wel = Counter()
+        self.zones = Counter()
+
+    def add(self, pitch):
+        self.pitches += 1
+        self.strikes += pitch.get("PitchCalled") in STRIKE_CALLS
+        t = self.types.setdefault(pitch.get("PitchType") or "Unknown", [0, 0, 0.0, None])
+        t[0] += 1
+        velo = pitch.get("Velocity")
+        if velo:
+            t[1] += 1
+            t[2] += velo
+            t[3] = velo if t[3] is None else max(t[3], velo)
+        if pitch.get("WEL"):
+            self.wel[pitch["WEL"]] += 1
+        if pitch.get("Zone") is not None:
+            self.zones[int(pitch["Zone"])] += 1
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build a line from one pitcher's rows of a Pitches frame."""
+        line = cls()
+        line.pitches = len(df)
+        line.strikes = int(df["PitchCalled"].isin(STRIKE_CALLS).sum())
+        velo = df["Velocity"].where(df["Velocity"] > 0)
+        by_type = velo.groupby(df["PitchType"].fillna("Unknown")).agg(["size", "count", "sum", "max"])
+        for ptype, r in by_type.iterrows():
+            line.types[ptype] = [int(r["size"]), int(r["count"]), float(r["sum"]),
+                                 None if r["count"] == 0 else float(r["max"])]
+        line.wel.update(df["WEL"].dropna().value_counts().to_dict())
+        line.zones.update({int(z): int(n) for z, n in df["Zone"].dropna().value_counts().items()})
+        return line
+
+    def summary(self):
+        n = max(self.pitches, 1)
+        mix = [
+            {"PitchType": ptype, "Pitches": cnt, "Mix %": round(100 * cnt / n, 1),
+             "Avg Velo": round(vsum / vn, 1) if vn else None, "Max Velo": vmax}
+            for ptype, (cnt, vn, vsum, vmax) in sorted(self.types.items(), key=lambda kv: -kv[1][0])
+        ]
+        return {
+            "pitches": self.pitches,
+            "strike_pct": round(100 * self.strikes / n, 1),
+            "mix": mix,
+            "wel_pct": {k: round(100 * self.wel[k] / n, 1) for k in ("E", "W", "L")},
+            "zones": dict(sorted(self.zones.items())),
+        }
+
+
+class GameStats:
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.loaded_at = time.monotonic()
+        self.stale = False
+        self.atbat_pitcher = {}
+        self.seen = set()
+        self.lines = {}
+        self.names = {}
+
+    @classmethod
+    def load(cls, game_id):
+        import pandas as pd
+
+        stats = cls(game_id)
+        atbats = db.game_atbats([game_id])
+        stats.atbat_pitcher = {a["AtBatID"]: a["PitcherID"] for a in atbats}
+        pitches = db.load_pitches(atbat_ids=list(stats.atbat_pitcher))
+        if pitches:
+            df = pd.DataFrame(pitches)
+            for col in ("PitchType", "PitchCalled", "Velocity", "WEL", "Zone"):
+                if col not in df:
+                    df[col] = None
+            df["Velocity"] = pd.to_numeric(df["Velocity"], errors="coerce")
+            df["PitcherID"] = df["AtBatID"].map(stats.atbat_pitcher)
+            for pid, group in df.groupby("PitcherID"):
+                stats.lines[int(pid)] = PitcherLine.from_frame(group)
+            stats.seen = set(df["PitchID"])
+        stats.names = db.player_names(set(stats.atbat_pitcher.values()) - {None})
+        return stats
+
+    def add_pitch(self, pitch):
+        pid = self.atbat_pitcher.get(pitch.get("AtBatID"))
+        if pid is None or pitch.get("PitchID") in self.seen:
+            return
+        self.seen.add(pitch.get("PitchID"))
+        self.lines.setdefault(pid, PitcherLine()).add(pitch)
+
+
+class AnalyticsCache:
+    def __init__(self, ttl=900):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._games = {}
+        self._atbat_game = {}
+        self._loading = []  # one list of (table, op, rows) writes per load in progress
+
+    def game(self, game_id):
+        """Return the GameStats for game_id, loading it if missing, stale or expired."""
+        writes = []
+        with self._lock:
+            stats = self._games.get(game_id)
+            if stats and not stats.stale and time.monotonic() - stats.loaded_at <= self.ttl:
+                return stats
+            self._loading.append(writes)
+        try:
+            stats = GameStats.load(game_id)
+        finally:
+            with self._lock:
+                self._loading.remove(writes)
+        with self._lock:
+            self._games[game_id] = stats
+            self._atbat_game.update(dict.fromkeys(stats.atbat_pitcher, game_id))
+            # The load may or may not have seen these; inserts are idempotent, the rest mark it stale.
+            for table, op, rows in writes:
+                self._apply(table, op, rows, only=stats)
+        return stats
+
+    def pitcher(self, game_id, pitcher_id):
+        """Return the summary dict for one pitcher in one game."""
+        stats = self.game(game_id)
+        with self._lock:
+            line = stats.lines.get(pitcher_id)
+            return (line or PitcherLine()).summary()
+
+    def pitchers(self, game_id):
+        """Return [(PitcherID, Name, pitches)] for every pitcher who has thrown in the game."""
+        stats = self.game(game_id)
+        with self._lock:
+            missing = set(stats.lines) - set(stats.names)
+        if missing:
+            names = db.player_names(missing)
+            with self._lock:
+                stats.names.update(names)
+        with self._lock:
+            return [(pid, stats.names.get(pid, f"#{pid}"), line.pitches)
+                    for pid, line in sorted(stats.lines.items(), key=lambda kv: -kv[1].pitches)]
+
+    def invalidate(self, game_id=None):
+        with self._lock:
+            for gid, stats in self._games.items():
+                if game_id is None or gid == game_id:
+                    stats.stale = True
+
+    def on_write(self, table, op, rows):
+        if table not in ("AtBats", "Pitches"):
+            return
+        with self._lock:
+            for writes in self._loading:
+                writes.append((table, op, rows))
+            self._apply(table, op, rows)
+
+    def _apply(self, table, op, rows, only=None):
+        """Fold written rows into the cached games (or only into that GameStats). Call with the lock held."""
+        for r in rows:
+            if table == "AtBats":
+                stats = self._games.get(r.get("GameID"))
+                if stats is None or only not in (None, stats):
+                    continue
+                if op == "insert":
+                    stats.atbat_pitcher[r["AtBatID"]] = r.get("PitcherID")
+                    self._atbat_game[r["AtBatID"]] = stats.game_id
+                elif stats.atbat_pitcher.get(r.get("AtBatID")) != r.get("PitcherID") or op == "delete":
+                    stats.stale = True
+            else:
+                stats = self._games.get(self._atbat_game.get(r.get("AtBatID")))
+                if stats is None or only not in (None, stats):
+                    continue
+                if op == "insert":
+                    stats.add_pitch(r)
+                else:
+                    stats.stale = True
+
+
+cache = AnalyticsCache()
+db.on_write(cache.on_write)
@@ -0,0 +1,68 @@
+"""Backend selection.
+
+The backend is picked once per process from, in order:
+
+* PITCH_TRACKER_BACKEND=sqlite|supabase (and PITCH_TRACKER_DB for the
+  SQLite file),
+* a [backend] section in .streamlit/secrets.toml (kind = "sqlite",
+  path = "..."),
+* Supabase when [supabase] url/key secrets exist, else a local SQLite file.
+"""
+import os
+import threading
+from pathlib import Path
+
+from core.backends.base import (
+    PRIMARY_KEYS, TABLES, Backend, CallStats, call_listeners, stats, write_listeners,
+)
+
+__all__ = [
+    "Backend", "CallStats", "PRIMARY_KEYS", "TABLES", "call_listeners", "get_backend", "set_backend",
+    "stats", "write_listeners",
+]
+
+DEFAULT_SQLITE_PATH = Path(__file__).resolve().parent.parent.parent / "pitch_tracker.sqlite3"
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _secrets():
+    try:
+        import streamlit as st
+        return st.secrets.to_dict()
+    except Exception:
+        return {}
+
+
+def _from_config():
+    secrets = _secrets()
+    conf = secrets.get("backend", {})
+    kind = os.environ.get("PITCH_TRACKER_BACKEND") or conf.get("kind")
+    if kind is None:
+        kind = "supabase" if "supabase" in secrets else "sqlite"
+    if kind == "supabase":
+        from core.backends.supabase_backend import SupabaseBackend
+        return SupabaseBackend(secrets["supabase"]["url"], secrets["supabase"]["key"])
+    if kind == "sqlite":
+        from core.backends.sqlite_backend import SQLiteBackend
+        return SQLiteBackend(os.environ.get("PITCH_TRACKER_DB") or conf.get("path") or DEFAULT_SQLITE_PATH)
+    raise ValueError(f"Unknown backend kind: {kind}")
+
+
+def get_backend():
+    """Return the process-wide backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _from_config()
+    return _backend
+
+
+def set_backend(backend):
+    """Install a backend explicitly (benchmarks, load tests, sync tooling)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+    return backend
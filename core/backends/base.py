@@ -0,0 +1,206 @@
+"""Storage backend interface shared by the Supabase and local SQLite stores.
+
+Filters are sequences of (column, op, value) with op one of eq, neq, gt, gte,
+lt, lte, in, is (value None means IS NULL) or "or" — for "or" the column is
+ignored and the value is a list of AND-groups, each itself a filter list.
+Ordering is a sequence of column names, prefixed with "-" for descending.
+Every call goes through _timed(), which runs it under the deadline, retry and
+circuit-breaker policy in core.backends.resilience, feeds the process-wide
+call stats and notifies the call and write listeners.
+"""
+import threading
+import time
+from collections import deque
+
+from core.backends import resilience
+
+TABLES = ("Games", "Players", "AtBats", "Pitches", "RunnerEvents", "GameRoster")
+PRIMARY_KEYS = {
+    "Games": "GameID",
+    "Players": "PlayerID",
+    "AtBats": "AtBatID",
+    "Pitches": "PitchID",
+    "RunnerEvents": "RunnerEventID",
+    "GameRoster": "RosterID",
+}
+WRITE_OPS = ("insert", "upsert", "update", "delete")
+# Columns that identify a row before it has a primary key; a retried insert
+# looks these up first so rows that already landed are not stored twice.
+NATURAL_KEYS = {
+    "Pitches": ("AtBatID", "PitchOfAB"),
+    "RunnerEvents": ("PitchID", "RunnerID", "EventType"),
+    "GameRoster": ("GameID", "Role", "PlayerID"),
+}
+SAMPLES = 512  # latencies kept per (table, operation) for percentiles
+
+
+class CallStats:
+    """Thread-safe call counts and timings keyed by (table, operation).
+
+    Besides totals it keeps the last SAMPLES latencies of each operation for
+    p50/p99, and counts retries, timeouts, hedged reads and calls the circuit
+    breaker rejected.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ops = {}
+
+    def _op(self, table, op):
+        s = self._ops.get((table, op))
+        if s is None:
+            s = self._ops[(table, op)] = {
+                "calls": 0, "errors": 0, "rows": 0, "total_s": 0.0, "max_s": 0.0,
+                "retries": 0, "timeouts": 0, "hedged": 0, "rejected": 0, "samples": deque(maxlen=SAMPLES),
+            }
+        return s
+
+    def record(self, table, op, seconds, rows=0, ok=True):
+        with self._lock:
+            s = self._op(table, op)
+            s["calls"] += 1
+            s["rows"] += rows
+            s["total_s"] += seconds
+            s["max_s"] = max(s["max_s"], seconds)
+            s["samples"].append(seconds)
+            if not ok:
+                s["errors"] += 1
+
+    def count(self, table, op, what):
+        """Bump one of the retries/timeouts/hedged/rejected counters."""
+        with self._lock:
+            self._op(table, op)[what] += 1
+
+    def percentile(self, table, op, p):
+        """Return the p-th percentile latency (s) of recent calls, or None before 20 samples."""
+        with self._lock:
+            s = self._ops.get((table, op))
+            samples = sorted(s["samples"]) if s else []
+        if len(samples) < 20:
+            return None
+        return samples[min(len(samples) - 1, round(p / 100 * (len(samples) - 1)))]
+
+    def snapshot(self):
+        """Return a list of per-operation dicts, slowest total first."""
+        with self._lock:
+            out = []
+            for (t, op), s in self._ops.items():
+                samples = sorted(s["samples"])
+                out.append({
+                    "table": t, "op": op, **{k: v for k, v in s.items() if k != "samples"},
+                    "avg_s": s["total_s"] / s["calls"] if s["calls"] else 0.0,
+                    "p50_ms": round(samples[len(samples) // 2] * 1000, 2) if samples else None,
+                    "p99_ms": round(samples[min(len(samples) - 1, round(0.99 * (len(samples) - 1)))] * 1000, 2)
+                    if samples else None,
+                })
+        return sorted(out, key=lambda r: r["total_s"], reverse=True)
+
+    def total_calls(self):
+        with self._lock:
+            return sum(s["calls"] for s in self._ops.values())
+
+    def reset(self):
+        with self._lock:
+            self._ops.clear()
+
+
+stats = CallStats()
+
+# Callbacks run as fn(table, op, rows) after every successful write.
+write_listeners = []
+# Callbacks run as fn(table, op, rows, seconds, ok) after every call.
+call_listeners = []
+
+
+_breaker_lock = threading.Lock()
+
+
+class Backend:
+    name = "base"
+    hedge_reads = False  # remote backends race a second select when the first is slow
+
+    @property
+    def breaker(self):
+        """This backend's circuit breaker (see core.backends.resilience)."""
+        if self.__dict__.get("_breaker") is None:
+            with _breaker_lock:
+                if self.__dict__.get("_breaker") is None:
+                    self._breaker = resilience.CircuitBreaker()
+        return self._breaker
+
+    def _timed(self, table, op, fn, *args, idempotent=None, reconcile=None):
+        t0 = time.perf_counter()
+        ok = False
+        result = None
+        try:
+            result = resilience.call(self, stats, table, op, fn, args, idempotent, reconcile)
+            ok = True
+        finally:
+            rows = len(result) if isinstance(result, list) else 0
+            seconds = time.perf_counter() - t0
+            stats.record(table, op, seconds, rows, ok)
+            for listener in call_listeners:
+                listener(table, op, rows, seconds, ok)
+        if op in WRITE_OPS:
+            for listener in write_listeners:
+                listener(table, op, result or [])
+        return result
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def select(self, table, columns="*", where=(), order=(), limit=None):
+        return self._timed(table, "select", self._select, table, columns, where, order, limit)
+
+    def insert(self, table, rows):
+        """Insert one dict or a list of dicts; return the stored rows with their IDs."""
+        rows = [rows] if isinstance(rows, dict) else list(rows)
+        reconcile = self._insert_missing if table in NATURAL_KEYS else None
+        return self._timed(table, "insert", self._insert, table, rows, reconcile=reconcile)
+
+    def upsert(self, table, rows, on_conflict):
+        rows = [rows] if isinstance(rows, dict) else list(rows)
+        return self._timed(table, "upsert", self._upsert, table, rows, on_conflict)
+
+    def update(self, table, values, where):
+        return self._timed(table, "update", self._update, table, values, where)
+
+    def delete(self, table, where):
+        return self._timed(table, "delete", self._delete, table, where)
+
+    def rpc(self, fn, params=None):
+        return self._timed("rpc", fn, self._rpc, fn, params or {})
+
+    def _insert_missing(self, table, rows):
+        """Retry of an insert that may have landed: store only rows whose natural key is new.
+
+        Returns the stored rows in the order of rows, found or inserted.
+        """
+        natural = NATURAL_KEYS[table]
+        parent = natural[0]
+        found = self._select(table, "*", [(parent, "in", sorted({r.get(parent) for r in rows}))], (), None)
+        stored = {tuple(f.get(k) for k in natural): f for f in found}
+        missing = [r for r in rows if tuple(r.get(k) for k in natural) not in stored]
+        inserted = iter(self._insert(table, missing) if missing else [])
+        return [stored.get(tuple(r.get(k) for k in natural)) or next(inserted) for r in rows]
+
+    # -----------------------------
+    # Implemented by each backend
+    # -----------------------------
+    def _select(self, table, columns, where, order, limit):
+        raise NotImplementedError
+
+    def _insert(self, table, rows):
+        raise NotImplementedError
+
+    def _upsert(self, table, rows, on_conflict):
+        raise NotImplementedError
+
+    def _update(self, table, values, where):
+        raise NotImplementedError
+
+    def _delete(self, table, where):
+        raise NotImplementedError
+
+    def _rpc(self, fn, params):
+        raise NotImplementedError
@@ -0,0 +1,245 @@
+"""Deadlines, retries, hedged reads and a circuit breaker for backend calls.
+
+Backend._timed runs every table call and RPC through call():
+
+* Each operation has a deadline (DEADLINES). The time left is published per
+  thread (remaining()) and the Supabase backend turns it into the timeout of
+  each HTTP request, so a slow backend costs the operator at most the
+  deadline, never a frozen screen.
+* Failures worth retrying are retried with jittered exponential backoff
+  (tenacity) until the attempts or the deadline run out. What is safe to
+  retry depends on where the call failed. An error raised before the request
+  reached the database (UNSENT: refused connection, pool timeout, a locked
+  SQLite file, a statement the database rolled back) is retried for every
+  operation. A timeout or dropped connection after it was sent (AMBIGUOUS)
+  is retried only for idempotent operations; inserts into tables with a
+  natural key first look up which rows already landed (Backend.insert), so
+  a retry cannot store a pitch twice. Other errors are raised at once.
+* A circuit breaker per backend opens after a run of UNSENT/AMBIGUOUS
+  failures and then fails calls immediately with BackendUnavailable until a
+  cooldown passes and a probe call gets through. Pages read db.health() to
+  show degraded or offline mode.
+* Selects on remote backends are hedged: when the first attempt is slower
+  than that query's recent p95, a second one is sent and the first answer
+  wins.
+"""
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+UNSENT, AMBIGUOUS = "unsent", "ambiguous"
+
+# Seconds per operation, including retries; RPCs not listed use "rpc".
+DEADLINES = {"select": 5.0, "insert": 8.0, "upsert": 8.0, "update": 8.0, "delete": 8.0, "rpc": 10.0,
+             "rebuild_rollups": 120.0}
+IDEMPOTENT_OPS = ("select", "upsert", "update", "delete")
+ATTEMPTS = 3
+CONNECT_TIMEOUT = 3.0
+
+# PostgreSQL SQLSTATE classes / PostgREST codes for statements that did not commit.
+_ROLLED_BACK = ("08", "40001", "40P01", "53", "57014", "57P", "PGRST000", "PGRST001", "PGRST002", "PGRST003")
+_UNSENT_ERRORS = {"ConnectError", "ConnectTimeout", "PoolTimeout", "ConnectionRefusedError"}
+_AMBIGUOUS_ERRORS = {"TransportError", "TimeoutError", "ConnectionError"}
+# httpx timeouts (TimeoutException and subclasses) do not derive from the builtin TimeoutError.
+_TIMEOUT_ERRORS = {"TimeoutError", "TimeoutException", "ConnectTimeout", "ReadTimeout", "WriteTimeout",
+                   "PoolTimeout"}
+
+_local = threading.local()
+_hedge_pool = None
+_hedge_lock = threading.Lock()
+
+
+class BackendUnavailable(ConnectionError):
+    """The circuit breaker is open: the call was not attempted."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """The operation's deadline passed before any attempt answered."""
+
+
+def classify(exc):
+    """Return UNSENT, AMBIGUOUS or None (not a transient failure; do not retry)."""
+    if isinstance(exc, BackendUnavailable):
+        return None
+    names = {c.__name__ for c in type(exc).__mro__}
+    if names & _UNSENT_ERRORS:
+        return UNSENT
+    if isinstance(exc, sqlite3.OperationalError) and ("locked" in str(exc) or "busy" in str(exc)):
+        return UNSENT
+    code = str(getattr(exc, "code", None) or "")
+    if code.startswith(_ROLLED_BACK):
+        return UNSENT
+    if names & _AMBIGUOUS_ERRORS or code in ("500", "502", "503", "504"):
+        return AMBIGUOUS
+    return None
+
+
+def is_timeout(exc):
+    """True for the builtin TimeoutError (DeadlineExceeded included) and httpx's timeouts."""
+    return bool({c.__name__ for c in type(exc).__mro__} & _TIMEOUT_ERRORS)
+
+
+def remaining():
+    """Seconds left before the current call's deadline, or None outside a call."""
+    deadline = getattr(_local, "deadline", None)
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+class CircuitBreaker:
+    """Closed -> open after `failures` transient failures in a row -> half-open after the cooldown.
+
+    While open every call is rejected. Half-open lets one probe through: success
+    closes the breaker, failure opens it again with a doubled cooldown.
+    """
+
+    def __init__(self, failures=5, cooldown=5.0, max_cooldown=60.0):
+        self.threshold = failures
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.cooldown = cooldown
+        self.opened_at = None
+        self.last_error = None
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "open" if time.monotonic() - self.opened_at < self.cooldown else "half_open"
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.cooldown = self.base_cooldown
+            self._probing = False
+
+    def failure(self, err):
+        with self._lock:
+            self.failures += 1
+            self.last_error = f"{type(err).__name__}: {err}"
+            if self._probing:
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                self.opened_at = time.monotonic()
+            elif self.opened_at is None and self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def retry_in(self):
+        """Seconds until the next probe is allowed (0 unless open)."""
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+
+def _pool():
+    global _hedge_pool
+    if _hedge_pool is None:
+        with _hedge_lock:
+            if _hedge_pool is None:
+                _hedge_pool = ThreadPoolExecutor(8, thread_name_prefix="backend-hedge")
+    return _hedge_pool
+
+
+def _attempt(fn, args, deadline):
+    outer = getattr(_local, "deadline", None)
+    _local.deadline = deadline
+    try:
+        return fn(*args)
+    finally:
+        _local.deadline = outer
+
+
+def _hedged(stats, table, op, fn, args, deadline):
+    """Run fn; if it is slower than this query's recent p95, race a second copy."""
+    p95 = stats.percentile(table, op, 95)
+    hedge_after = min(2.0, max(0.2, p95 if p95 is not None else 1.0))
+    first = _pool().submit(_attempt, fn, args, deadline)
+    futures = {first}
+    done, _ = wait(futures, timeout=min(hedge_after, max(0.0, deadline - time.monotonic())))
+    if not done and deadline - time.monotonic() > 0:
+        stats.count(table, op, "hedged")
+        futures.add(_pool().submit(_attempt, fn, args, deadline))
+    error = None
+    while futures:
+        done, futures = wait(futures, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            raise DeadlineExceeded(f"{table}.{op} took longer than its deadline")
+        for f in done:
+            if f.exception() is None:
+                return f.result()
+            error = f.exception()
+    raise error
+
+
+def call(backend, stats, table, op, fn, args, idempotent=None, reconcile=None):
+    """Run one backend operation under its deadline, retry policy and circuit breaker.
+
+    reconcile, if given, replaces fn on attempts after an AMBIGUOUS failure
+    (an insert that may already have landed).
+    """
+    from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+    if idempotent is None:
+        idempotent = op in IDEMPOTENT_OPS
+    deadline = time.monotonic() + DEADLINES.get(op, DEADLINES["rpc"])
+    breaker = backend.breaker
+    hedge = op == "select" and backend.hedge_reads
+    jitter = wait_random_exponential(multiplier=0.1, max=1.0)
+    last = {"kind": None}
+
+    def retryable(exc):
+        kind = classify(exc)
+        if kind is None or time.monotonic() >= deadline:
+            return False
+        return kind == UNSENT or idempotent or (reconcile is not None and kind == AMBIGUOUS)
+
+    def before_sleep(retry_state):
+        stats.count(table, op, "retries")
+
+    retrying = Retrying(
+        stop=stop_after_attempt(ATTEMPTS),
+        wait=lambda rs: min(jitter(rs), max(0.0, deadline - time.monotonic())),
+        retry=retry_if_exception(retryable),
+        before_sleep=before_sleep,
+        reraise=True,
+    )
+    for attempt in retrying:
+        with attempt:
+            if not breaker.allow():
+                stats.count(table, op, "rejected")
+                raise BackendUnavailable(f"Backend unavailable (retry in {breaker.retry_in():.0f} s): "
+                                         f"{breaker.last_error}")
+            run = reconcile if reconcile is not None and last["kind"] == AMBIGUOUS else fn
+            try:
+                result = (_hedged(stats, table, op, run, args, deadline) if hedge
+                          else _attempt(run, args, deadline))
+            except Exception as e:
+                last["kind"] = kind = classify(e)
+                if is_timeout(e):
+                    stats.count(table, op, "timeouts")
+                if kind is not None:
+                    breaker.failure(e)
+                elif not isinstance(e, BackendUnavailable):
+                    breaker.success()  # the backend answered; the request itself was bad
+                raise
+            breaker.success()
+            return result
@@ -0,0 +1,369 @@
+"""Local SQLite backend with the same tables, columns and ID semantics.
+
+Used for tracking in parks without connectivity (push the file later with
+core.sync), and for running the app, benchmarks and load tests without a
+live service. IDs are integer autoincrement keys as in Postgres, booleans
+come back as bools, and RPCs are implemented in Python against the same
+tables. Selects accept PostgREST-style embedded resources over foreign keys
+("*, Pitches(*, RunnerEvents(*))", "pitcher:Players!PitcherID(Name)"), so
+callers can fetch a parent with its children in one call on either backend.
+The rollup tables are kept current by triggers generated in
+core.backends.sqlite_rollups.
+"""
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from core.backends import sqlite_rollups
+from core.backends.base import Backend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS "Games" (
+    "GameID" INTEGER PRIMARY KEY AUTOINCREMENT,
+    "GameDate" TEXT,
+    "HomeTeam" TEXT,
+    "AwayTeam" TEXT
+);
+CREATE TABLE IF NOT EXISTS "Players" (
+    "PlayerID" INTEGER PRIMARY KEY AUTOINCREMENT,
+    "Name" TEXT NOT NULL,
+    "Team" TEXT,
+    "Throws" TEXT,
+    "Bats" TEXT
+);
+CREATE INDEX IF NOT EXISTS players_name ON "Players" ("Name");
+CREATE TABLE IF NOT EXISTS "AtBats" (
+    "AtBatID" INTEGER PRIMARY KEY AUTOINCREMENT,
+    "GameID" INTEGER NOT NULL REFERENCES "Games" ("GameID"),
+    "BatterID" INTEGER REFERENCES "Players" ("PlayerID"),
+    "PitcherID" INTEGER REFERENCES "Players" ("PlayerID"),
+    "Inning" INTEGER,
+    "LeadOff" BOOLEAN DEFAULT 0,
+    "LeadOffOn" BOOLEAN DEFAULT 0,
+    "RunsScored" INTEGER DEFAULT 0,
+    "EarnedRuns" INTEGER DEFAULT 0,
+    "PlayResult" TEXT
+);
+CREATE INDEX IF NOT EXISTS atbats_game ON "AtBats" ("GameID");
+CREATE TABLE IF NOT EXISTS "Pitches" (
+    "PitchID" INTEGER PRIMARY KEY AUTOINCREMENT,
+    "AtBatID" INTEGER NOT NULL REFERENCES "AtBats" ("AtBatID"),
+    "PitchNo" INTEGER,
+    "PitchOfAB" INTEGER,
+    "PitchType" TEXT,
+    "Velocity" REAL,
+    "Zone" INTEGER,
+    "PitchCalled" TEXT,
+    "WEL" TEXT,
+    "Balls" INTEGER,
+    "Strikes" INTEGER,
+    "TaggedHit" TEXT,
+    "HitDirection" TEXT,
+    "KPI" TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS pitches_pitchno_key ON "Pitches" ("PitchNo");
+CREATE UNIQUE INDEX IF NOT EXISTS pitches_atbat_pitchofab_key ON "Pitches" ("AtBatID", "PitchOfAB");
+CREATE TABLE IF NOT EXISTS "RunnerEvents" (
+    "RunnerEventID" INTEGER PRIMARY KEY AUTOINCREMENT,
+    "PitchID" INTEGER NOT NULL REFERENCES "Pitches" ("PitchID"),
+    "RunnerID" INTEGER REFERENCES "Players" ("PlayerID"),
+    "StartBase" INTEGER,
+    "EndBase" INTEGER,
+    "EventType" TEXT,
+    "OutRecorded" BOOLEAN DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runnerevents_pitch ON "RunnerEvents" ("PitchID");
+CREATE TABLE IF NOT EXISTS "GameRoster" (
+    "RosterID" INTEGER PRIMARY KEY AUTOINCREMENT,
+    "GameID" INTEGER NOT NULL REFERENCES "Games" ("GameID") ON DELETE CASCADE,
+    "PlayerID" INTEGER NOT NULL REFERENCES "Players" ("PlayerID"),
+    "Role" TEXT NOT NULL CHECK ("Role" IN ('H', 'P')),
+    "BatOrder" INTEGER,
+    "Active" BOOLEAN NOT NULL DEFAULT 1,
+    "EnteredInning" INTEGER,
+    "ExitedInning" INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS gameroster_player_key ON "GameRoster" ("GameID", "Role", "PlayerID");
+CREATE TABLE IF NOT EXISTS "PitchNoCounter" (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    last_value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO "PitchNoCounter" VALUES (1, 0);
+"""
+
+BOOL_COLUMNS = {"LeadOff", "LeadOffOn", "OutRecorded", "Active"}
+_OPS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+_EMBED = re.compile(r"^(?:(\w+):)?(\w+)(?:!(\w+))?\((.*)\)$", re.S)
+
+
+def _q(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _split_columns(columns):
+    """Split a select list on top-level commas into plain columns and embed tuples.
+
+    Embeds come back as (alias, table, fk hint, inner select list).
+    """
+    items, depth, start = [], 0, 0
+    for i, ch in enumerate(columns + ","):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            item = columns[start:i].strip()
+            start = i + 1
+            if not item:
+                continue
+            m = _EMBED.match(item)
+            items.append((m.group(1) or m.group(2), m.group(2), m.group(3), m.group(4)) if m else item)
+    return items
+
+
+class SQLiteBackend(Backend):
+    name = "sqlite"
+
+    def __init__(self, path=":memory:"):
+        self.path = str(path)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        if self.path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self.conn.executescript(sqlite_rollups.SCHEMA + sqlite_rollups.triggers())
+        self._columns = {}
+        self._fks = {}
+        if (self.conn.execute('SELECT 1 FROM "AtBats" LIMIT 1').fetchone()
+                and not self.conn.execute('SELECT 1 FROM "GameLines" LIMIT 1').fetchone()):
+            # A file from before the rollup tables existed.
+            self.rpc_rebuild_rollups()
+
+    # -----------------------------
+    # SQL building
+    # -----------------------------
+    def columns(self, table):
+        if table not in self._columns:
+            cols = [r["name"] for r in self.conn.execute(f"PRAGMA table_info({_q(table)})")]
+            if not cols:
+                raise ValueError(f"Unknown table: {table}")
+            self._columns[table] = cols
+        return self._columns[table]
+
+    def _col(self, table, name):
+        if name not in self.columns(table):
+            raise ValueError(f"Unknown column {table}.{name}")
+        return _q(name)
+
+    def _where(self, table, where):
+        sql, params = [], []
+        for col, op, val in where:
+            if op == "or":
+                groups = []
+                for group in val:
+                    g_sql, g_params = self._where(table, group)
+                    groups.append(f"({g_sql or '1'})")
+                    params += g_params
+                sql.append("(" + " OR ".join(groups) + ")")
+            elif op == "in":
+                val = list(val)
+                if not val:
+                    sql.append("0")
+                    continue
+                sql.append(f"{self._col(table, col)} IN ({','.join('?' * len(val))})")
+                params += [self._value(v) for v in val]
+            elif op == "is":
+                sql.append(f"{self._col(table, col)} IS ?")
+                params.append(self._value(val))
+            elif op in _OPS:
+                sql.append(f"{self._col(table, col)} {_OPS[op]} ?")
+                params.append(self._value(val))
+            else:
+                raise ValueError(f"Unsupported filter op: {op}")
+        return " AND ".join(sql), params
+
+    @staticmethod
+    def _value(v):
+        return int(v) if isinstance(v, bool) else v
+
+    def _row(self, row):
+        d = dict(row)
+        for k in BOOL_COLUMNS.intersection(d):
+            if d[k] is not None:
+                d[k] = bool(d[k])
+        return d
+
+    def _run(self, sql, params=()):
+        with self._lock:
+            return [self._row(r) for r in self.conn.execute(sql, params).fetchall()]
+
+    def _select_list(self, table, columns):
+        cols = [c.strip() for c in columns.split(",") if c.strip()]
+        if cols == ["*"]:
+            return "*"
+        return ", ".join(self._col(table, c) for c in cols)
+
+    def foreign_keys(self, table):
+        """Return [(column, referenced table, referenced column)] for table."""
+        if table not in self._fks:
+            self._fks[table] = [(r["from"], r["table"], r["to"]) for r in
+                                self.conn.execute(f"PRAGMA foreign_key_list({_q(table)})")]
+        return self._fks[table]
+
+    def _relation(self, table, target, hint):
+        """Resolve an embed of target into table rows as (many, parent col, child col).
+
+        many is True when target rows point at table (one-to-many, a list per
+        row) and False when table points at target (many-to-one, one object).
+        """
+        out = [(False, col, ref) for col, ref_table, ref in self.foreign_keys(table)
+               if ref_table == target and hint in (None, col)]
+        out += [(True, ref, col) for col, ref_table, ref in self.foreign_keys(target)
+                if ref_table == table and hint in (None, col)]
+        if len(out) != 1:
+            raise ValueError(f"Cannot embed {target} in {table}: "
+                             f"{'ambiguous' if out else 'no'} relationship (use {target}!column)")
+        return out[0]
+
+    def _embed(self, table, rows, embeds):
+        for alias, target, hint, inner in embeds:
+            many, parent_col, child_col = self._relation(table, target, hint)
+            keys = sorted({r[parent_col] for r in rows if r[parent_col] is not None})
+            plain = [c for c in _split_columns(inner) if isinstance(c, str)]
+            extra = "*" not in plain and child_col not in plain
+            children = self._select(target, inner + (f", {child_col}" if extra else ""),
+                                    [(child_col, "in", keys)], (), None) if keys else []
+            grouped = {}
+            for c in children:
+                key = c.pop(child_col) if extra else c[child_col]
+                grouped.setdefault(key, []).append(c)
+            for r in rows:
+                found = grouped.get(r[parent_col], [])
+                r[alias] = found if many else (found[0] if found else None)
+
+    # -----------------------------
+    # Backend API
+    # -----------------------------
+    def _select(self, table, columns, where, order, limit):
+        self.columns(table)
+        items = _split_columns(columns)
+        embeds = [c for c in items if not isinstance(c, str)]
+        if embeds:
+            # Embedded resources: select the join columns too, fill the children in below.
+            plain = [c for c in items if isinstance(c, str)]
+            joins = [self._relation(table, t, h) for _, t, h, _ in embeds]
+            extra = [] if "*" in plain else sorted({j[1] for j in joins} - set(plain))
+            columns = ", ".join(plain + extra)
+        sql = f"SELECT {self._select_list(table, columns)} FROM {_q(table)}"
+        w_sql, params = self._where(table, where)
+        if w_sql:
+            sql += f" WHERE {w_sql}"
+        if order:
+            sql += " ORDER BY " + ", ".join(
+                f"{self._col(table, c.lstrip('-'))} {'DESC' if c.startswith('-') else 'ASC'}" for c in order
+            )
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        rows = self._run(sql, params)
+        if embeds:
+            with self._lock:
+                self._embed(table, rows, embeds)
+            for r in rows:
+                for col in extra:
+                    r.pop(col)
+        return rows
+
+    def _insert_sql(self, table, row, suffix=""):
+        cols = list(row)
+        sql = (f"INSERT INTO {_q(table)} ({', '.join(self._col(table, c) for c in cols)}) "
+               f"VALUES ({', '.join('?' * len(cols))}){suffix} RETURNING *")
+        return sql, [self._value(row[c]) for c in cols]
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _write_many(self, statements):
+        """Run (sql, params) statements in one transaction; return all returned rows."""
+        out = []
+        with self._transaction() as conn:
+            for sql, params in statements:
+                out += [self._row(r) for r in conn.execute(sql, params).fetchall()]
+        return out
+
+    def _insert(self, table, rows):
+        return self._write_many([self._insert_sql(table, r) for r in rows])
+
+    def _upsert(self, table, rows, on_conflict):
+        keys = [c.strip() for c in on_conflict.split(",")]
+        statements = []
+        for r in rows:
+            updates = [c for c in r if c not in keys]
+            action = (f"DO UPDATE SET {', '.join(f'{self._col(table, c)} = excluded.{_q(c)}' for c in updates)}"
+                      if updates else "DO NOTHING")
+            conflict = ", ".join(self._col(table, k) for k in keys)
+            statements.append(self._insert_sql(table, r, f" ON CONFLICT ({conflict}) {action}"))
+        return self._write_many(statements)
+
+    def _update(self, table, values, where):
+        w_sql, w_params = self._where(table, where)
+        sets = ", ".join(f"{self._col(table, c)} = ?" for c in values)
+        sql = f"UPDATE {_q(table)} SET {sets}" + (f" WHERE {w_sql}" if w_sql else "") + " RETURNING *"
+        return self._write_many([(sql, [self._value(v) for v in values.values()] + w_params)])
+
+    def _delete(self, table, where):
+        w_sql, params = self._where(table, where)
+        sql = f"DELETE FROM {_q(table)}" + (f" WHERE {w_sql}" if w_sql else "") + " RETURNING *"
+        return self._write_many([(sql, params)])
+
+    def _rpc(self, fn, params):
+        impl = getattr(self, f"rpc_{fn}", None)
+        if impl is None:
+            raise ValueError(f"Unknown RPC: {fn}")
+        return impl(**params)
+
+    # -----------------------------
+    # RPCs (mirror the functions in sql/)
+    # -----------------------------
+    def rpc_reserve_pitch_numbers(self, n=20):
+        n = int(n)
+        return self._write_many([(
+            'UPDATE "PitchNoCounter" SET last_value = last_value + ? WHERE id = 1 '
+            "RETURNING last_value - ? + 1 AS first", (n, n)
+        )])[0]["first"]
+
+    def rpc_log_pitches(self, pitches):
+        """Insert pitches and the "RunnerEvents" listed on each in one transaction.
+
+        Returns the pitch rows, each with its inserted RunnerEvents rows.
+        """
+        out = []
+        with self._transaction() as conn:
+            for p in pitches:
+                p = dict(p)
+                events = p.pop("RunnerEvents", None) or []
+                row = self._row(conn.execute(*self._insert_sql("Pitches", p)).fetchone())
+                row["RunnerEvents"] = [
+                    self._row(conn.execute(*self._insert_sql("RunnerEvents", {**e, "PitchID": row["PitchID"]}))
+                              .fetchone())
+                    for e in events
+                ]
+                out.append(row)
+        return out
+
+    def rpc_rebuild_rollups(self, game_id=None):
+        self._write_many([(sql, ()) for sql in sqlite_rollups.rebuild_statements(game_id)])
+        if game_id is not None:
+            return 1
+        return self.conn.execute('SELECT count(*) FROM "Games"').fetchone()[0]
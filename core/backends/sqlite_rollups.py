@@ -0,0 +1,189 @@
+"""Rollup tables and the triggers that maintain them, for the SQLite backend.
+
+Mirrors sql/002_rollups.sql. Every Pitches, AtBats and RunnerEvents write
+adds its contribution to the rollups (updates subtract the old row and add
+the new one, deletes subtract), so per-game and per-season lines are always
+one primary-key lookup away. SQLite has no stored procedures, so the trigger
+bodies are generated here from one description of each row's contribution;
+rebuild_statements() replays the same description over existing rows.
+"""
+
+LINE_COLUMNS = (
+    "Pitches", "StrikesCalled", "SwingMiss", "BallsCalled", "Fouls", "InPlay", "VeloN", "VeloSum",
+    "PA", "RunsScored", "EarnedRuns", "StolenBases", "CaughtStealing", "RunnerOuts",
+)
+ROLLUP_TABLES = ("PitchRollup", "PlayResultRollup", "GameLines", "SeasonLines")
+
+_LINE_DDL = ",\n    ".join(f'"{c}" {"REAL" if c == "VeloSum" else "INTEGER"} NOT NULL DEFAULT 0'
+                          for c in LINE_COLUMNS)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS "PitchRollup" (
+    "GameID" INTEGER NOT NULL,
+    "PitcherID" INTEGER NOT NULL,
+    "BatterID" INTEGER NOT NULL,
+    "PitchType" TEXT NOT NULL,
+    "PitchCalled" TEXT NOT NULL,
+    "Pitches" INTEGER NOT NULL DEFAULT 0,
+    "VeloN" INTEGER NOT NULL DEFAULT 0,
+    "VeloSum" REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY ("GameID", "PitcherID", "BatterID", "PitchType", "PitchCalled")
+);
+CREATE TABLE IF NOT EXISTS "PlayResultRollup" (
+    "GameID" INTEGER NOT NULL,
+    "PitcherID" INTEGER NOT NULL,
+    "BatterID" INTEGER NOT NULL,
+    "PlayResult" TEXT NOT NULL,
+    "N" INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY ("GameID", "PitcherID", "BatterID", "PlayResult")
+);
+CREATE TABLE IF NOT EXISTS "GameLines" (
+    "GameID" INTEGER NOT NULL,
+    "PlayerID" INTEGER NOT NULL,
+    "Role" TEXT NOT NULL,
+    {_LINE_DDL},
+    PRIMARY KEY ("GameID", "PlayerID", "Role")
+);
+CREATE TABLE IF NOT EXISTS "SeasonLines" (
+    "Season" INTEGER NOT NULL,
+    "PlayerID" INTEGER NOT NULL,
+    "Role" TEXT NOT NULL,
+    {_LINE_DDL},
+    PRIMARY KEY ("Season", "PlayerID", "Role")
+);
+"""
+
+SEASON = 'COALESCE(CAST(substr(g."GameDate", 1, 4) AS INTEGER), 0)'
+
+
+def _q(name):
+    return '"' + name + '"'
+
+
+def _add(table, keys, values, source):
+    """INSERT ... SELECT that adds values into the row at keys (source must end in a WHERE)."""
+    cols = list(keys) + list(values)
+    sets = ", ".join(f"{_q(c)} = {_q(table)}.{_q(c)} + excluded.{_q(c)}" for c in values)
+    return (f"INSERT INTO {_q(table)} ({', '.join(map(_q, cols))}) "
+            f"SELECT {', '.join(map(str, list(keys.values()) + list(values.values())))} FROM {source} "
+            f"ON CONFLICT ({', '.join(map(_q, keys))}) DO UPDATE SET {sets}")
+
+
+def _lines(player, role, deltas, source):
+    values = {c: deltas.get(c, 0) for c in LINE_COLUMNS}
+    source = f"{source} AND {player} IS NOT NULL"
+    return [
+        _add("GameLines", {"GameID": 'g."GameID"', "PlayerID": player, "Role": f"'{role}'"}, values, source),
+        _add("SeasonLines", {"Season": SEASON, "PlayerID": player, "Role": f"'{role}'"}, values, source),
+    ]
+
+
+def _is(ref, col, value, sign):
+    return f"{sign} * ({ref}.\"{col}\" IS '{value}')"
+
+
+def pitch_statements(ref, sign, source):
+    """Statements adding sign x one Pitches row (alias ref; a = its AtBat, g = its Game)."""
+    velo = f'COALESCE({ref}."Velocity", 0)'
+    deltas = {
+        "Pitches": sign,
+        "StrikesCalled": _is(ref, "PitchCalled", "Strike Called", sign),
+        "SwingMiss": _is(ref, "PitchCalled", "Strike Swing Miss", sign),
+        "BallsCalled": _is(ref, "PitchCalled", "Ball Called", sign),
+        "Fouls": _is(ref, "PitchCalled", "Foul Ball", sign),
+        "InPlay": _is(ref, "PitchCalled", "In Play", sign),
+        "VeloN": f"{sign} * ({velo} > 0)",
+        "VeloSum": f"{sign} * {velo}",
+    }
+    return [
+        _add("PitchRollup", {
+            "GameID": 'g."GameID"',
+            "PitcherID": 'COALESCE(a."PitcherID", 0)',
+            "BatterID": 'COALESCE(a."BatterID", 0)',
+            "PitchType": f"COALESCE({ref}.\"PitchType\", '')",
+            "PitchCalled": f"COALESCE({ref}.\"PitchCalled\", '')",
+        }, {k: deltas[k] for k in ("Pitches", "VeloN", "VeloSum")}, source),
+        *_lines('a."PitcherID"', "P", deltas, source),
+        *_lines('a."BatterID"', "B", deltas, source),
+    ]
+
+
+def atbat_statements(ref, sign, source):
+    """Statements adding sign x one AtBats row (alias ref; g = its Game)."""
+    deltas = {
+        "PA": f'{sign} * ({ref}."PlayResult" IS NOT NULL)',
+        "RunsScored": f'{sign} * COALESCE({ref}."RunsScored", 0)',
+        "EarnedRuns": f'{sign} * COALESCE({ref}."EarnedRuns", 0)',
+    }
+    return [
+        _add("PlayResultRollup", {
+            "GameID": 'g."GameID"',
+            "PitcherID": f'COALESCE({ref}."PitcherID", 0)',
+            "BatterID": f'COALESCE({ref}."BatterID", 0)',
+            "PlayResult": f'{ref}."PlayResult"',
+        }, {"N": sign}, f'{source} AND {ref}."PlayResult" IS NOT NULL'),
+        *_lines(f'{ref}."PitcherID"', "P", deltas, source),
+        *_lines(f'{ref}."BatterID"', "B", deltas, source),
+    ]
+
+
+def runner_statements(ref, sign, source):
+    """Statements adding sign x one RunnerEvents row (alias ref; a = its AtBat, g = its Game)."""
+    deltas = {
+        "StolenBases": _is(ref, "EventType", "Stolen Base", sign),
+        "CaughtStealing": _is(ref, "EventType", "Caught Stealing", sign),
+        "RunnerOuts": f'{sign} * (COALESCE({ref}."OutRecorded", 0) != 0)',
+    }
+    return [
+        *_lines('a."PitcherID"', "P", deltas, source),
+        *_lines(f'{ref}."RunnerID"', "B", deltas, source),
+    ]
+
+
+_ROW_SOURCES = {
+    "Pitches": (pitch_statements,
+                '"AtBats" a JOIN "Games" g ON g."GameID" = a."GameID" WHERE a."AtBatID" = {ref}."AtBatID"'),
+    "AtBats": (atbat_statements, '"Games" g WHERE g."GameID" = {ref}."GameID"'),
+    "RunnerEvents": (runner_statements,
+                     '"Pitches" p JOIN "AtBats" a ON a."AtBatID" = p."AtBatID" '
+                     'JOIN "Games" g ON g."GameID" = a."GameID" WHERE p."PitchID" = {ref}."PitchID"'),
+}
+
+
+def triggers():
+    """DDL (re)creating the insert/update/delete rollup triggers on the three tables."""
+    out = []
+    for table, (stmts, source) in _ROW_SOURCES.items():
+        new = stmts("NEW", 1, source.format(ref="NEW"))
+        old = stmts("OLD", -1, source.format(ref="OLD"))
+        for event, body in (("INSERT", new), ("DELETE", old), ("UPDATE", old + new)):
+            name = f"{table.lower()}_rollup_{event.lower()}"
+            out.append(f"DROP TRIGGER IF EXISTS {name};")
+            out.append(f'CREATE TRIGGER {name} AFTER {event} ON "{table}" BEGIN\n    '
+                       + ";\n    ".join(body) + ";\nEND;")
+    return "\n".join(out)
+
+
+def rebuild_statements(game_id=None):
+    """Statements that recompute the rollups of one game (or all games) from scratch."""
+    games = "1" if game_id is None else f'g."GameID" = {int(game_id)}'
+    seasons = f"SELECT {SEASON} FROM \"Games\" g WHERE {games}"
+    out = []
+    for table in ("PitchRollup", "PlayResultRollup", "GameLines"):
+        out.append(f'DELETE FROM "{table}" WHERE "GameID" IN (SELECT g."GameID" FROM "Games" g WHERE {games})')
+    out += atbat_statements("r", 1, f'"AtBats" r JOIN "Games" g ON g."GameID" = r."GameID" WHERE {games}')
+    out += pitch_statements("r", 1, '"Pitches" r JOIN "AtBats" a ON a."AtBatID" = r."AtBatID" '
+                                     f'JOIN "Games" g ON g."GameID" = a."GameID" WHERE {games}')
+    out += runner_statements("r", 1, '"RunnerEvents" r JOIN "Pitches" p ON p."PitchID" = r."PitchID" '
+                                     'JOIN "AtBats" a ON a."AtBatID" = p."AtBatID" '
+                                     f'JOIN "Games" g ON g."GameID" = a."GameID" WHERE {games}')
+    # Season lines are the sum of their games' lines.
+    out.append(f'DELETE FROM "SeasonLines" WHERE "Season" IN ({seasons})')
+    sums = ", ".join(f'SUM(l."{c}")' for c in LINE_COLUMNS)
+    out.append(
+        f'INSERT INTO "SeasonLines" ("Season", "PlayerID", "Role", {", ".join(map(_q, LINE_COLUMNS))}) '
+        f'SELECT {SEASON}, l."PlayerID", l."Role", {sums} FROM "GameLines" l '
+        f'JOIN "Games" g ON g."GameID" = l."GameID" WHERE {SEASON} IN ({seasons}) '
+        f'GROUP BY {SEASON}, l."PlayerID", l."Role"'
+    )
+    return out
@@ -0,0 +1,113 @@
+"""Supabase (PostgREST) backend.
+
+Only table access and RPCs are used, so this talks to the project's REST
+endpoint with the bare postgrest client instead of supabase.create_client(),
+which would also import and set up auth, storage, functions and realtime on
+every cold start. The client is imported and created on the first query,
+once per server process, on top of a keep-alive HTTP/2 connection pool, so
+reruns reuse connections instead of paying a new TLS handshake per button
+press. Each request's timeout is capped at what is left of the calling
+operation's deadline (core.backends.resilience).
+"""
+import threading
+
+from core.backends import resilience
+from core.backends.base import Backend
+
+
+def _http_client():
+    import httpx
+
+    class DeadlineClient(httpx.Client):
+        def request(self, *args, **kwargs):
+            left = resilience.remaining()
+            if left is not None and "timeout" not in kwargs:
+                if left <= 0:
+                    raise resilience.DeadlineExceeded("No time left before the operation's deadline")
+                kwargs["timeout"] = httpx.Timeout(left, connect=min(left, resilience.CONNECT_TIMEOUT))
+            return super().request(*args, **kwargs)
+
+    return DeadlineClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=20,
+            max_keepalive_connections=10,
+            keepalive_expiry=120,
+        ),
+        timeout=httpx.Timeout(15.0, connect=10.0),
+    )
+
+
+def _or_expr(groups):
+    parts = []
+    for group in groups:
+        conds = [f"{c}.{op}.{v}" for c, op, v in group]
+        parts.append(conds[0] if len(conds) == 1 else f"and({','.join(conds)})")
+    return ",".join(parts)
+
+
+def apply_filters(q, where):
+    for col, op, val in where:
+        if op == "in":
+            q = q.in_(col, list(val))
+        elif op == "is":
+            q = q.is_(col, "null" if val is None else val)
+        elif op == "or":
+            q = q.or_(_or_expr(val))
+        else:
+            q = getattr(q, op)(col, val)
+    return q
+
+
+class SupabaseBackend(Backend):
+    name = "supabase"
+    hedge_reads = True
+
+    def __init__(self, url, key):
+        self.url, self.key = url, key
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """The PostgREST client, imported and connected on first use."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from postgrest import SyncPostgrestClient
+                    from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+
+                    self._client = SyncPostgrestClient(
+                        f"{self.url.rstrip('/')}/rest/v1",
+                        headers={**DEFAULT_POSTGREST_CLIENT_HEADERS, "apiKey": self.key,
+                                 "Authorization": f"Bearer {self.key}"},
+                        http_client=_http_client(),
+                    )
+        return self._client
+
+    def _select(self, table, columns, where, order, limit):
+        q = apply_filters(self.client.table(table).select(columns), where)
+        for col in order:
+            q = q.order(col.lstrip("-"), desc=col.startswith("-"))
+        if limit is not None:
+            q = q.limit(limit)
+        return q.execute().data or []
+
+    def _insert(self, table, rows):
+        keys = sorted({k for r in rows for k in r})
+        rows = [{k: r.get(k) for k in keys} for r in rows]
+        return self.client.table(table).insert(rows).execute().data or []
+
+    def _upsert(self, table, rows, on_conflict):
+        keys = sorted({k for r in rows for k in r})
+        rows = [{k: r.get(k) for k in keys} for r in rows]
+        return self.client.table(table).upsert(rows, on_conflict=on_conflict).execute().data or []
+
+    def _update(self, table, values, where):
+        return apply_filters(self.client.table(table).update(values), where).execute().data or []
+
+    def _delete(self, table, where):
+        return apply_filters(self.client.table(table).delete(), where).execute().data or []
+
+    def _rpc(self, fn, params):
+        return self.client.rpc(fn, params).execute().data
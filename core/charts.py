@@ -0,0 +1,335 @@
+"""Zone heatmaps and spray charts for the Analytics page.
+
+Every player, as a pitcher and as a batter, gets two NumPy count arrays per
+game:
+
+    zones[pitch type, WEL, zone]                 Zone 1-14, 0 = not recorded
+    spray[pitch type, hit direction, tagged hit]
+
+plus a running total over all their games. They are binned once with
+np.bincount from one embedded select, shared by every session, and kept
+current by core.db write notifications: an inserted pitch increments its
+bins, and an edited or deleted pitch takes its old bins back out (and adds
+its new ones), so flipping between players never queries or re-bins. A chart
+is a sum over the selected slices of an array that is already in memory.
+At-bats whose pitcher or batter changed mark the players involved stale; a
+TTL covers writes made by other processes.
+"""
+import threading
+import time
+
+from core import db
+
+PITCH_TYPES = ("Fastball", "Slider", "Curveball", "Changeup", "Cutter", "Splitter", "Other")
+WEL_STATES = ("E", "W", "L", "Other")
+N_ZONES = 15
+HIT_DIRECTIONS = ("3-4 Hole", "5-6 Hole", "Catcher", "Center Field", "First Base", "Left Center", "Left Field",
+                  "Middle", "Pitcher", "Right Center", "Right Field", "Second Base", "Short Stop", "Third Base")
+TAGGED_HITS = ("Bunt", "Flyball", "Groundball", "Linedrive", "Untagged")
+
+ZONE_SHAPE = (len(PITCH_TYPES), len(WEL_STATES), N_ZONES)
+SPRAY_SHAPE = (len(PITCH_TYPES), len(HIT_DIRECTIONS), len(TAGGED_HITS))
+ROLES = ("PitcherID", "BatterID")
+PITCH_COLUMNS = "PitchID, AtBatID, PitchType, Zone, WEL, TaggedHit, HitDirection"
+
+_TYPE = {t: i for i, t in enumerate(PITCH_TYPES)}
+_WEL = {w: i for i, w in enumerate(WEL_STATES)}
+_DIRECTION = {d: i for i, d in enumerate(HIT_DIRECTIONS)}
+_TAGGED = {t: i for i, t in enumerate(TAGGED_HITS)}
+
+
+def bin_codes(pitch):
+    """Return (zone bin, spray bin or None) of a pitch as flat indexes into the arrays."""
+    t = _TYPE.get(pitch.get("PitchType"), len(PITCH_TYPES) - 1)
+    w = _WEL.get(pitch.get("WEL"), len(WEL_STATES) - 1)
+    z = pitch.get("Zone")
+    z = int(z) if z not in (None, "") and 0 < int(z) < N_ZONES else 0
+    d = _DIRECTION.get(pitch.get("HitDirection"))
+    spray = None
+    if d is not None:
+        h = _TAGGED.get(pitch.get("TaggedHit"), len(TAGGED_HITS) - 1)
+        spray = (t * len(HIT_DIRECTIONS) + d) * len(TAGGED_HITS) + h
+    return (t * len(WEL_STATES) + w) * N_ZONES + z, spray
+
+
+class Bins:
+    """Zone and spray counts for one player over one game (or all of them)."""
+
+    def __init__(self, zone_codes=(), spray_codes=()):
+        import numpy as np
+
+        self.zones = np.bincount(np.asarray(zone_codes, dtype=np.int64),
+                                 minlength=np.prod(ZONE_SHAPE)).astype(np.int32).reshape(ZONE_SHAPE)
+        self.spray = np.bincount(np.asarray(spray_codes, dtype=np.int64),
+                                 minlength=np.prod(SPRAY_SHAPE)).astype(np.int32).reshape(SPRAY_SHAPE)
+
+    def add(self, codes, n=1):
+        zone, spray = codes
+        self.zones.flat[zone] += n
+        if spray is not None:
+            self.spray.flat[spray] += n
+
+
+class PlayerCharts:
+    """Binned pitches of one player in one role, per game and in total."""
+
+    def __init__(self):
+        self.loaded_at = time.monotonic()
+        self.stale = False
+        self.games = {}
+        self.total = Bins()
+        self.pitches = {}  # PitchID -> (GameID, codes), to move a pitch's bins when it is edited
+
+    @classmethod
+    def from_pitches(cls, pitches):
+        """Build from [(GameID, pitch)] with one bincount per game."""
+        charts = cls()
+        by_game = {}
+        for game_id, p in pitches:
+            if p["PitchID"] in charts.pitches:
+                continue
+            codes = bin_codes(p)
+            charts.pitches[p["PitchID"]] = (game_id, codes)
+            zone, spray = by_game.setdefault(game_id, ([], []))
+            zone.append(codes[0])
+            if codes[1] is not None:
+                spray.append(codes[1])
+        for game_id, (zone, spray) in by_game.items():
+            charts.games[game_id] = Bins(zone, spray)
+        charts.total = Bins([c[0] for _, c in charts.pitches.values()],
+                            [c[1] for _, c in charts.pitches.values() if c[1] is not None])
+        return charts
+
+    def add(self, game_id, pitch):
+        if pitch["PitchID"] in self.pitches:
+            return
+        codes = bin_codes(pitch)
+        self.pitches[pitch["PitchID"]] = (game_id, codes)
+        self.games.setdefault(game_id, Bins()).add(codes)
+        self.total.add(codes)
+
+    def remove(self, pitch_id):
+        game_id, codes = self.pitches.pop(pitch_id)
+        self.games[game_id].add(codes, -1)
+        self.total.add(codes, -1)
+
+    def bins(self, game_id=None):
+        return self.total if game_id is None else self.games.get(game_id) or Bins()
+
+
+def _mask(names, labels):
+    import numpy as np
+
+    return np.ones(len(labels), bool) if not names else np.isin(labels, list(names))
+
+
+class ChartCache:
+    def __init__(self, ttl=900):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._players = {}  # (role, PlayerID) -> PlayerCharts
+        self._atbats = {}  # AtBatID -> {"GameID", "PitcherID", "BatterID"} of cached players and games
+        self._games = {}  # GameID -> when players() last listed it
+        self._names = {}
+
+    def _fresh(self, key):
+        c = self._players.get(key)
+        return c is not None and not c.stale and time.monotonic() - c.loaded_at <= self.ttl
+
+    def preload(self, player_ids, role="PitcherID"):
+        """Bin every listed player that is not cached yet, in one paged query for all of them."""
+        with self._lock:
+            missing = sorted({pid for pid in player_ids if pid is not None and not self._fresh((role, pid))})
+        if not missing:
+            return
+        atbats = db.player_atbats(missing, role, f"AtBatID, GameID, PitcherID, BatterID, Pitches({PITCH_COLUMNS})")
+        pitches = {pid: [] for pid in missing}
+        for a in atbats:
+            pitches[a[role]].extend((a["GameID"], p) for p in a.get("Pitches") or [])
+        loaded = {pid: PlayerCharts.from_pitches(rows) for pid, rows in pitches.items()}
+        with self._lock:
+            for a in atbats:
+                self._atbats[a["AtBatID"]] = {k: a[k] for k in ("AtBatID", "GameID", *ROLES)}
+            for pid, charts in loaded.items():
+                self._players[(role, pid)] = charts
+
+    def players(self, game_id, role="PitcherID"):
+        """Return [(PlayerID, Name)] of the game's pitchers or batters, binning everyone in it on first use."""
+        with self._lock:
+            listed = self._games.get(game_id)
+        if listed is None or time.monotonic() - listed > self.ttl:
+            atbats = db.game_atbats([game_id], "AtBatID, GameID, PitcherID, BatterID")
+            for r in ROLES:
+                self.preload({a[r] for a in atbats}, r)
+            with self._lock:
+                self._games[game_id] = time.monotonic()
+                self._atbats.update({a["AtBatID"]: a for a in atbats})
+        with self._lock:
+            ids = sorted({a[role] for a in self._atbats.values() if a["GameID"] == game_id} - {None})
+            missing = set(ids) - set(self._names)
+        if missing:
+            names = db.player_names(missing)
+            with self._lock:
+                self._names.update(names)
+        with self._lock:
+            return [(pid, self._names.get(pid, f"#{pid}")) for pid in ids]
+
+    def zone_counts(self, player_id, role="PitcherID", game_id=None, pitch_types=None, wel=None):
+        """Return pitches per zone (index 0 = no zone recorded) for the selected slices."""
+        self.preload([player_id], role)
+        with self._lock:
+            zones = self._players[(role, player_id)].bins(game_id).zones
+            return zones[_mask(pitch_types, PITCH_TYPES)][:, _mask(wel, WEL_STATES)].sum(axis=(0, 1))
+
+    def spray_counts(self, player_id, role="PitcherID", game_id=None, pitch_types=None):
+        """Return balls in play as a [hit direction, tagged hit] array for the selected pitch types."""
+        self.preload([player_id], role)
+        with self._lock:
+            spray = self._players[(role, player_id)].bins(game_id).spray
+            return spray[_mask(pitch_types, PITCH_TYPES)].sum(axis=0)
+
+    def invalidate(self, game_id=None):
+        """Rebin everyone who appeared in game_id (or everyone) on next use."""
+        with self._lock:
+            if game_id is None:
+                self._games.clear()
+                for charts in self._players.values():
+                    charts.stale = True
+                return
+            self._games.pop(game_id, None)
+            for a in self._atbats.values():
+                if a["GameID"] == game_id:
+                    for charts in self._owners(a):
+                        charts.stale = True
+
+    def _owners(self, atbat):
+        return [c for c in (self._players.get((role, atbat.get(role))) for role in ROLES) if c is not None]
+
+    def on_write(self, table, op, rows):
+        if table not in ("AtBats", "Pitches"):
+            return
+        with self._lock:
+            for r in rows:
+                if table == "AtBats":
+                    known = self._atbats.get(r.get("AtBatID"))
+                    if op == "insert":
+                        if r.get("GameID") in self._games or self._owners(r):
+                            self._atbats[r["AtBatID"]] = {k: r.get(k) for k in ("AtBatID", "GameID", *ROLES)}
+                    elif known is not None and (op == "delete" or any(
+                            role in r and r[role] != known[role] for role in ROLES)):
+                        # Its pitches change hands: rebin the old and new players on next use.
+                        for charts in self._owners(known) + self._owners(r):
+                            charts.stale = True
+                        if op == "delete":
+                            del self._atbats[r["AtBatID"]]
+                        else:
+                            known.update({role: r[role] for role in ROLES if role in r})
+                    continue
+                if op != "insert":
+                    # Take an edited or deleted pitch's old bins out before counting it again.
+                    for charts in self._players.values():
+                        if r.get("PitchID") in charts.pitches:
+                            charts.remove(r["PitchID"])
+                if op == "delete":
+                    continue
+                atbat = self._atbats.get(r.get("AtBatID"))
+                if atbat is None:
+                    continue  # no cached player is in this at-bat
+                if not all(k in r for k in ("PitchType", "Zone", "WEL")):
+                    for charts in self._owners(atbat):
+                        charts.stale = True
+                    continue
+                for charts in self._owners(atbat):
+                    charts.add(atbat["GameID"], r)
+
+
+# -----------------------------
+# Rendering (Altair)
+# -----------------------------
+# Zones 1-9 are the strike zone, row by row from the catcher's view; 11-14 are
+# the four quadrants around it. Zone 10 has no place on that grid (the Tracker
+# offers it for pitches nowhere near the zone), so it gets a strip underneath.
+_INNER = {z: ((z - 1) % 3 + 1, (z - 1) // 3 + 1) for z in range(1, 10)}
+_OUTER = {11: (0, 0), 12: (2.5, 0), 13: (0, 2.5), 14: (2.5, 2.5)}
+_OUTER_LABEL = {11: (0.5, 0.5), 12: (4.5, 0.5), 13: (0.5, 4.5), 14: (4.5, 4.5)}
+_STRIP = 10, (0, 5.2, 5, 5.8)  # zone, (x, y, x2, y2)
+
+# (angle from center field in degrees, distance in feet) of each hit direction.
+_SPRAY_POS = {
+    "Catcher": (0, 10), "Pitcher": (0, 60), "Third Base": (-40, 100), "First Base": (40, 100),
+    "5-6 Hole": (-30, 140), "Short Stop": (-18, 145), "Middle": (0, 140), "Second Base": (16, 145),
+    "3-4 Hole": (28, 140), "Left Field": (-33, 290), "Left Center": (-17, 330), "Center Field": (0, 350),
+    "Right Center": (17, 330), "Right Field": (33, 290),
+}
+
+
+def heatmap_chart(counts, height=260):
+    """Return an Altair zone heatmap for a 15-long zone_counts array."""
+    import altair as alt
+
+    total = max(int(counts[1:].sum()), 1)
+    cells = []
+
+    def cell(z, x, y, x2, y2, lx, ly, label):
+        n = int(counts[z])
+        cells.append({"Zone": z, "x": x, "x2": x2, "y": y, "y2": y2, "lx": lx, "ly": ly, "Pitches": n,
+                      "Share": f"{100 * n / total:.0f}%", "label": label.format(n) if n else ""})
+
+    for z, (x, y) in list(_OUTER.items()) + list(_INNER.items()):
+        size = 2.5 if z in _OUTER else 1
+        lx, ly = _OUTER_LABEL.get(z, (x + 0.5, y + 0.5))
+        cell(z, x, y, x + size, y + size, lx, ly, "{}")
+    z, (x, y, x2, y2) = _STRIP
+    cell(z, x, y, x2, y2, (x + x2) / 2, (y + y2) / 2, f"Zone {z}: {{}}")
+    data = alt.Data(values=cells)
+    scale_x = alt.Scale(domain=[0, 5])
+    scale_y = alt.Scale(domain=[0, y2], reverse=True)
+    rect = alt.Chart(data).mark_rect(stroke="white", strokeWidth=1.5).encode(
+        x=alt.X("x:Q", scale=scale_x, axis=None), x2="x2:Q",
+        y=alt.Y("y:Q", scale=scale_y, axis=None), y2="y2:Q",
+        color=alt.Color("Pitches:Q", scale=alt.Scale(scheme="reds", domainMin=0), legend=None),
+        tooltip=["Zone:O", "Pitches:Q", "Share:N"],
+    )
+    text = alt.Chart(data).mark_text(fontSize=13).encode(
+        x=alt.X("lx:Q", scale=scale_x), y=alt.Y("ly:Q", scale=scale_y), text="label:N")
+    return (rect + text).properties(width=height, height=round(height * y2 / 5))
+
+
+def spray_chart(spray, height=320):
+    """Return an Altair spray chart for a [hit direction, tagged hit] spray_counts array."""
+    import math
+
+    import altair as alt
+
+    points = []
+    for d, direction in enumerate(HIT_DIRECTIONS):
+        angle, dist = _SPRAY_POS[direction]
+        for h, tagged in enumerate(TAGGED_HITS):
+            n = int(spray[d, h])
+            if n:
+                a = math.radians(angle + (h - 2) * 3)  # fan tagged types out a little
+                points.append({"Direction": direction, "Tagged": tagged, "Balls in play": n,
+                               "x": dist * math.sin(a), "y": dist * math.cos(a)})
+    field = [{"x": -260, "y": 260, "part": "left"}, {"x": 0, "y": 0, "part": "left"},
+             {"x": 0, "y": 0, "part": "right"}, {"x": 260, "y": 260, "part": "right"}]
+    field += [{"x": 90 * sx, "y": 90 * sy, "part": "diamond"}
+              for sx, sy in ((0, 0), (0.707, 0.707), (0, 1.414), (-0.707, 0.707), (0, 0))]
+    field += [{"x": 368 * math.sin(math.radians(a)), "y": 368 * math.cos(math.radians(a)), "part": "fence"}
+              for a in range(-45, 46, 5)]
+    scale_x = alt.Scale(domain=[-280, 280])
+    scale_y = alt.Scale(domain=[-10, 390])
+    lines = alt.Chart(alt.Data(values=field)).mark_line(color="#9a9a9a").encode(
+        x=alt.X("x:Q", scale=scale_x, axis=None), y=alt.Y("y:Q", scale=scale_y, axis=None),
+        detail="part:N", order=alt.Order("index:Q"),
+    ).transform_window(index="row_number()", groupby=["part"])
+    dots = alt.Chart(alt.Data(values=points)).mark_circle(opacity=0.8).encode(
+        x=alt.X("x:Q", scale=scale_x), y=alt.Y("y:Q", scale=scale_y),
+        size=alt.Size("Balls in play:Q", scale=alt.Scale(range=[60, 900]), legend=None),
+        color=alt.Color("Tagged:N", scale=alt.Scale(domain=list(TAGGED_HITS))),
+        tooltip=["Direction:N", "Tagged:N", "Balls in play:Q"],
+    )
+    return (lines + dots).properties(width=height * 1.4, height=height)
+
+
+cache = ChartCache()
+db.on_write(cache.on_write)
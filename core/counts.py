@@ -0,0 +1,175 @@
+"""Ball/strike count engine.
+
+The count rules are compiled once into a state-transition table: a count is a
+state number balls * 4 + strikes (20 states, 0-0 through 4-3) and every pitch
+result maps each state to the next one. The Tracker steps it one pitch at a
+time; recompute() runs the same table over whole DataFrames of Pitches with
+NumPy, one vectorized step per pitch position across every at-bat at once,
+so a game or a season can be rebuilt and audited in one pass.
+
+Stored Balls/Strikes/WEL on a pitch are the count *after* that pitch.
+
+    python -m core.counts --game 12          # audit one game
+    python -m core.counts --all --fix        # rewrite every wrong row
+"""
+import argparse
+
+CALLS = ("Strike Called", "Strike Swing Miss", "Ball Called", "Foul Ball", "In Play")
+NO_CHANGE = len(CALLS)  # code for unknown/missing results
+N_STATES = 20
+
+
+def state_of(balls, strikes):
+    return int(balls) * 4 + int(strikes)
+
+
+def _rule(balls, strikes, called):
+    if called == "Ball Called":
+        balls = min(4, balls + 1)
+    elif called in ("Strike Called", "Strike Swing Miss"):
+        strikes = min(3, strikes + 1)
+    elif called == "Foul Ball" and strikes < 2:
+        strikes += 1
+    elif called == "In Play" and strikes < 3:
+        strikes += 1
+    return balls, strikes
+
+
+def _wel_rule(balls, strikes):
+    if (balls, strikes) in ((0, 0), (0, 1), (1, 0), (1, 1)):
+        return "E"
+    if (balls, strikes) in ((0, 2), (1, 2)):
+        return "W"
+    if (balls, strikes) in ((2, 0), (2, 1)):
+        return "L"
+    return None
+
+
+# TRANSITIONS[state][call code] -> next state; the last column is "no change".
+TRANSITIONS = tuple(
+    tuple(state_of(*_rule(s // 4, s % 4, c)) for c in CALLS) + (s,)
+    for s in range(N_STATES)
+)
+WEL = tuple(_wel_rule(s // 4, s % 4) for s in range(N_STATES))
+_CALL_CODE = {c: i for i, c in enumerate(CALLS)}
+
+
+def call_code(called):
+    return _CALL_CODE.get(called, NO_CHANGE)
+
+
+def apply_call(balls, strikes, called):
+    """Return the (balls, strikes) count after a pitch with result called."""
+    s = TRANSITIONS[state_of(balls, strikes)][call_code(called)]
+    return s // 4, s % 4
+
+
+def compute_wel(balls, strikes):
+    return WEL[state_of(balls, strikes)]
+
+
+def replay(calls, balls=0, strikes=0):
+    """Yield (balls, strikes, WEL) after each result in calls, from a starting count."""
+    s = state_of(balls, strikes)
+    for called in calls:
+        s = TRANSITIONS[s][call_code(called)]
+        yield s // 4, s % 4, WEL[s]
+
+
+def recount_tail(pitches, start=0):
+    """Recompute Balls/Strikes/WEL of pitches[start:] in place.
+
+    pitches is one at-bat's pitch dicts in PitchOfAB order; the replay starts
+    from the stored count of pitches[start - 1]. Returns the indices whose
+    values changed.
+    """
+    prev = pitches[start - 1] if start else {}
+    calls = [p.get("PitchCalled") for p in pitches[start:]]
+    changed = []
+    for i, (b, s, wel) in enumerate(replay(calls, prev.get("Balls") or 0, prev.get("Strikes") or 0), start):
+        p = pitches[i]
+        if (p.get("Balls"), p.get("Strikes"), p.get("WEL")) != (b, s, wel):
+            p.update(Balls=b, Strikes=s, WEL=wel)
+            changed.append(i)
+    return changed
+
+
+# -----------------------------
+# Vectorized batch mode
+# -----------------------------
+def recompute(pitches, order="PitchNo"):
+    """Recompute Balls, Strikes, WEL and PitchOfAB for many at-bats at once.
+
+    pitches is a DataFrame with AtBatID, PitchCalled and the order column.
+    Returns a copy (sorted by AtBatID, order) with the four columns rebuilt.
+    """
+    import numpy as np
+
+    df = pitches.sort_values(["AtBatID", order], kind="stable").reset_index(drop=True)
+    if df.empty:
+        return df.assign(Balls=[], Strikes=[], WEL=[], PitchOfAB=[])
+
+    codes = df["PitchCalled"].map(_CALL_CODE).fillna(NO_CHANGE).to_numpy(dtype=np.int8)
+    group, _ = df["AtBatID"].factorize(sort=False)
+    pos = df.groupby(group, sort=False).cumcount().to_numpy()
+
+    n_ab, width = group.max() + 1, pos.max() + 1
+    moves = np.full((n_ab, width), NO_CHANGE, dtype=np.int8)
+    moves[group, pos] = codes
+
+    table = np.array(TRANSITIONS, dtype=np.int8)
+    states = np.empty((n_ab, width), dtype=np.int8)
+    s = np.zeros(n_ab, dtype=np.int8)
+    for k in range(width):
+        s = table[s, moves[:, k]]
+        states[:, k] = s
+    after = states[group, pos]
+
+    wel = np.array(WEL, dtype=object)
+    return df.assign(
+        Balls=after // 4,
+        Strikes=after % 4,
+        WEL=wel[after],
+        PitchOfAB=pos + 1,
+    )
+
+
+def diff(pitches, order="PitchNo"):
+    """Return the recomputed rows whose stored Balls/Strikes/WEL/PitchOfAB differ."""
+    import pandas as pd
+
+    fixed = recompute(pitches, order)
+    stored = pitches.set_index("PitchID").loc[fixed["PitchID"]].reset_index()
+    changed = pd.Series(False, index=fixed.index)
+    for col in ("Balls", "Strikes", "PitchOfAB"):
+        changed |= pd.to_numeric(stored[col], errors="coerce").fillna(-1).to_numpy() != fixed[col].to_numpy()
+    changed |= stored["WEL"].fillna("").to_numpy() != fixed["WEL"].fillna("").to_numpy()
+    return fixed[changed.to_numpy()]
+
+
+def main():
+    import pandas as pd
+
+    from core import db
+
+    ap = argparse.ArgumentParser(description="Audit or rebuild stored counts on Pitches.")
+    scope = ap.add_mutually_exclusive_group(required=True)
+    scope.add_argument("--game", type=int, action="append", help="GameID (repeatable)")
+    scope.add_argument("--all", action="store_true")
+    ap.add_argument("--fix", action="store_true", help="write corrected rows back")
+    args = ap.parse_args()
+
+    pitches = pd.DataFrame(db.load_pitches(game_ids=args.game))
+    if pitches.empty:
+        print("No pitches found.")
+        return
+    bad = diff(pitches)
+    print(f"{len(pitches)} pitches in {pitches['AtBatID'].nunique()} at-bats; {len(bad)} rows differ.")
+    if args.fix and len(bad):
+        rows = bad.astype(object).where(bad.notna(), None).to_dict("records")
+        db.update_pitches(rows)
+        print(f"Rewrote {len(rows)} rows.")
+
+
+if __name__ == "__main__":
+    main()
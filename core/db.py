@@ -0,0 +1,391 @@
+"""Shared data access for the Game Setup and Tracker pages.
+
+Streamlit re-executes page scripts on every click, but imported modules stay
+loaded for the life of the server process, so every rerun (and every session)
+shares one backend from core.backends and its pooled connections. Pages call
+the helpers here and never talk to a backend directly.
+"""
+from core.backends import get_backend, set_backend, stats, write_listeners  # noqa: F401
+from core.backends.resilience import BackendUnavailable, DeadlineExceeded, classify
+
+
+_missing_rpcs = set()  # RPCs whose sql/ file has not been applied to this backend
+
+
+def _rpc_missing(e):
+    """True if e says the RPC does not exist (PostgREST PGRST202, or the SQLite backend's error)."""
+    return "PGRST202" in str(e) or "Unknown RPC" in str(e)
+
+
+def on_write(fn):
+    """Register fn(table, op, rows) to run after every successful write."""
+    write_listeners.append(fn)
+    return fn
+
+
+def health():
+    """Return (state, detail): "ok", "degraded" (recent failures) or "offline" (circuit breaker open)."""
+    breaker = get_backend().breaker
+    state = breaker.state
+    if state == "open":
+        return "offline", f"next try in {breaker.retry_in():.0f} s — {breaker.last_error}"
+    if state == "half_open" or breaker.failures:
+        return "degraded", breaker.last_error
+    return "ok", None
+
+
+def error_message(e):
+    """Short text for an operator when a backend call failed."""
+    if isinstance(e, BackendUnavailable):
+        return "the database is unreachable right now; try again in a few seconds"
+    if isinstance(e, DeadlineExceeded) or classify(e) is not None:
+        return "the database did not answer in time; try again"
+    return str(e)
+
+
+# -----------------------------
+# Helpers shared by both pages
+# -----------------------------
+def ensure_player(name, team=None, throws=None, bats=None):
+    """Return PlayerID for name; create if missing."""
+    if not name or str(name).strip() == "":
+        return None
+    be = get_backend()
+    r = be.select("Players", "PlayerID", where=[("Name", "eq", name)])
+    if r:
+        return r[0]["PlayerID"]
+    payload = {"Name": name}
+    if team:
+        payload["Team"] = team
+    if throws:
+        payload["Throws"] = throws
+    if bats:
+        payload["Bats"] = bats
+    created = be.insert("Players", payload)
+    return created[0]["PlayerID"] if created else None
+
+
+def ensure_players(players, chunk=200):
+    """Resolve many players at once; return {Name: PlayerID}.
+
+    players is a list of dicts with a Name and optional Team/Throws/Bats.
+    Existing names are looked up in one query per chunk of names and all
+    missing players are created in a single batched insert.
+
+    This is a lookup-then-insert, not an upsert: Team/Throws/Bats of players
+    that already exist are left unchanged. Players has no unique key on Name,
+    so two sessions adding the same new name at the same moment can both
+    create it, as with ensure_player.
+    """
+    be = get_backend()
+    wanted = {}
+    for p in players:
+        name = str(p.get("Name") or "").strip()
+        if name and name not in wanted:
+            wanted[name] = {k: v for k, v in p.items() if v} | {"Name": name}
+    ids = {}
+    names = list(wanted)
+    for i in range(0, len(names), chunk):
+        for r in be.select("Players", "PlayerID, Name", where=[("Name", "in", names[i:i + chunk])]):
+            ids.setdefault(r["Name"], r["PlayerID"])
+    missing = [wanted[n] for n in names if n not in ids]
+    if missing:
+        for r in be.insert("Players", missing):
+            ids[r["Name"]] = r["PlayerID"]
+    return ids
+
+
+def create_game(home, away, gamedate):
+    rows = get_backend().insert("Games", {
+        "HomeTeam": home,
+        "AwayTeam": away,
+        "GameDate": str(gamedate)
+    })
+    return rows[0]["GameID"] if rows else None
+
+
+def games_page(after=None, limit=25):
+    """Return one page of games, newest first.
+
+    after is the (GameDate, GameID) of the last row of the previous page.
+    """
+    where = []
+    if after:
+        d, gid = after
+        where.append((None, "or", [
+            [("GameDate", "lt", d)],
+            [("GameDate", "eq", d), ("GameID", "lt", gid)],
+        ]))
+    return get_backend().select("Games", "GameID, GameDate, HomeTeam, AwayTeam", where=where,
+                                order=("-GameDate", "-GameID"), limit=limit)
+
+
+def players_after(after_id=0, limit=1000):
+    """Return up to limit players with PlayerID > after_id, in PlayerID order."""
+    return get_backend().select("Players", "PlayerID, Name", where=[("PlayerID", "gt", after_id)],
+                                order=("PlayerID",), limit=limit)
+
+
+def create_atbat(game_id, batter_id, pitcher_id, inning, leadoff=False):
+    """Insert a new AtBat with all its opening fields; return its AtBatID (None if nothing came back)."""
+    payload = {
+        "GameID": int(game_id),
+        "BatterID": int(batter_id),
+        "PitcherID": int(pitcher_id),
+        "Inning": int(inning),
+        "LeadOff": bool(leadoff),
+        "LeadOffOn": False,
+        "RunsScored": 0,
+        "EarnedRuns": 0
+    }
+    rows = get_backend().insert("AtBats", payload)
+    return rows[0]["AtBatID"] if rows else None
+
+
+def update_atbat(atbat_id, updates: dict):
+    """Apply updates to one AtBat; return the updated rows."""
+    return get_backend().update("AtBats", updates, where=[("AtBatID", "eq", atbat_id)])
+
+
+def reserve_pitch_numbers(n):
+    """Claim n consecutive global PitchNo values and return the first.
+
+    Falls back to max(PitchNo) + 1 only when sql/001_pitch_numbers.sql has
+    not been applied; that path is not safe against concurrent sessions.
+    Any other failure is raised: guessing a number then could hand out one
+    that another session already holds.
+    """
+    be = get_backend()
+    if "reserve_pitch_numbers" not in _missing_rpcs:
+        try:
+            return int(be.rpc("reserve_pitch_numbers", {"n": int(n)}))
+        except Exception as e:
+            if not _rpc_missing(e):
+                raise
+            _missing_rpcs.add("reserve_pitch_numbers")
+    r = be.select("Pitches", "PitchNo", order=("-PitchNo",), limit=1)
+    last = r[0]["PitchNo"] if r and r[0]["PitchNo"] is not None else 0
+    return int(last) + 1
+
+
+def last_pitch_of_ab(atbat_id):
+    r = get_backend().select("Pitches", "PitchOfAB", where=[("AtBatID", "eq", atbat_id)],
+                             order=("-PitchOfAB",), limit=1)
+    return r[0]["PitchOfAB"] if r and r[0]["PitchOfAB"] is not None else 0
+
+
+def game_atbats(game_ids, columns="AtBatID, GameID, PitcherID"):
+    return get_backend().select("AtBats", columns, where=[("GameID", "in", list(game_ids))],
+                                order=("AtBatID",))
+
+
+def player_names(player_ids):
+    """Return {PlayerID: Name} for the given ids."""
+    if not player_ids:
+        return {}
+    rows = get_backend().select("Players", "PlayerID, Name", where=[("PlayerID", "in", list(player_ids))])
+    return {r["PlayerID"]: r["Name"] for r in rows}
+
+
+RECENT_ATBATS_COLUMNS = ("*, batter:Players!BatterID(Name), pitcher:Players!PitcherID(Name), "
+                         "Pitches(*, RunnerEvents(*, runner:Players!RunnerID(Name)))")
+
+
+def recent_atbats(game_id, limit=5):
+    """Return the game's latest at-bats, newest first, in one embedded select.
+
+    Each at-bat carries its batter and pitcher names and its Pitches, each
+    pitch its RunnerEvents with runner names. Embedded lists come back in no
+    particular order.
+    """
+    return get_backend().select("AtBats", RECENT_ATBATS_COLUMNS, where=[("GameID", "eq", int(game_id))],
+                                order=("-AtBatID",), limit=limit)
+
+
+def open_atbat(game_id, atbat_id=None, before=None):
+    """Return the game's open at-bat (no PlayResult yet), embedded like recent_atbats, or None.
+
+    atbat_id's at-bat if it is still open, else the newest open one, however
+    far back it is; with before, only at-bats older than that AtBatID count.
+    One select: a game rarely has more than one at-bat left open.
+    """
+    where = [("GameID", "eq", int(game_id)), ("PlayResult", "is", None)]
+    if before is not None:
+        where.append(("AtBatID", "lt", int(before)))
+    rows = get_backend().select("AtBats", RECENT_ATBATS_COLUMNS, where=where, order=("-AtBatID",))
+    return next((r for r in rows if r["AtBatID"] == atbat_id), rows[0] if rows else None)
+
+
+def player_atbats(player_ids, role="PitcherID", columns="AtBatID, GameID, PitcherID, BatterID, Pitches(*)",
+                  page_size=500, id_chunk=200):
+    """Return every at-bat where one of player_ids is the pitcher (or batter), with embedded pitches.
+
+    Pages by AtBatID, id_chunk players at a time; each page is one embedded select.
+    """
+    be = get_backend()
+    ids = sorted(set(player_ids) - {None})
+    rows = []
+    for i in range(0, len(ids), id_chunk):
+        last = 0
+        while True:
+            page = be.select("AtBats", columns, where=[(role, "in", ids[i:i + id_chunk]), ("AtBatID", "gt", last)],
+                             order=("AtBatID",), limit=page_size)
+            rows.extend(page)
+            if len(page) < page_size:
+                break
+            last = page[-1]["AtBatID"]
+    return rows
+
+
+def team_players(team):
+    """Return PlayerID, Name, Team, Throws and Bats of every player listed on team."""
+    return get_backend().select("Players", "PlayerID, Name, Team, Throws, Bats", where=[("Team", "eq", team)],
+                                order=("PlayerID",))
+
+
+ROSTER_COLUMNS = "*, player:Players!PlayerID(Name, Bats, Throws)"
+
+
+def game_roster(game_id):
+    """Return the game's GameRoster rows with player names, in one embedded select."""
+    return get_backend().select("GameRoster", ROSTER_COLUMNS, where=[("GameID", "eq", int(game_id))],
+                                order=("RosterID",))
+
+
+def replace_roster(game_id, role, rows):
+    """Make rows the game's active roster for role ("H" or "P").
+
+    Listed players are upserted on (GameID, Role, PlayerID) and come back
+    active; the role's other active rows are marked inactive rather than
+    deleted, so substitution history and RosterIDs survive. Upserting first
+    means a failure part way leaves extra players listed, never none.
+    """
+    be = get_backend()
+    game_id = int(game_id)
+    listed = {int(r["PlayerID"]) for r in rows}
+    written = be.upsert("GameRoster", [{**r, "Active": True} for r in rows],
+                        on_conflict="GameID,Role,PlayerID") if rows else []
+    stale = [r["RosterID"] for r in be.select("GameRoster", "RosterID, PlayerID",
+                                              where=[("GameID", "eq", game_id), ("Role", "eq", role),
+                                                     ("Active", "eq", True)])
+             if r["PlayerID"] not in listed]
+    if stale:
+        be.update("GameRoster", {"Active": False}, where=[("RosterID", "in", stale)])
+    return written
+
+
+def upsert_roster(rows):
+    """Insert or update GameRoster rows keyed by (GameID, Role, PlayerID)."""
+    return get_backend().upsert("GameRoster", rows, on_conflict="GameID,Role,PlayerID")
+
+
+def update_roster(roster_id, updates: dict):
+    return get_backend().update("GameRoster", updates, where=[("RosterID", "eq", int(roster_id))])
+
+
+def delete_roster(roster_id):
+    return get_backend().delete("GameRoster", where=[("RosterID", "eq", int(roster_id))])
+
+
+def load_pitches(game_ids=None, atbat_ids=None, page_size=1000):
+    """Return every pitch (all columns) of the given games or at-bats, or of all games.
+
+    Pages by PitchID so a season-sized read never hits the row limit.
+    """
+    be = get_backend()
+    where = []
+    if game_ids:
+        atbat_ids = list(atbat_ids or []) + [a["AtBatID"] for a in game_atbats(game_ids, "AtBatID")]
+    if game_ids or atbat_ids is not None:
+        if not atbat_ids:
+            return []
+        where.append(("AtBatID", "in", list(atbat_ids)))
+    rows, last = [], 0
+    while True:
+        page = be.select("Pitches", "*", where=where + [("PitchID", "gt", last)],
+                         order=("PitchID",), limit=page_size)
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        last = page[-1]["PitchID"]
+
+
+def update_pitches(rows, chunk=500):
+    """Write back full Pitches rows (with PitchID) in batched upserts."""
+    be = get_backend()
+    out = []
+    for i in range(0, len(rows), chunk):
+        out.extend(be.upsert("Pitches", rows[i:i + chunk], on_conflict="PitchID"))
+    return out
+
+
+def pitch_payload(atbat_id, pitch_no, pitch_of_ab, pitch_type, velocity, zone,
+                  pitch_called, balls, strikes, wel, tagged, hitdir, kpi):
+    payload = {
+        "AtBatID": int(atbat_id),
+        "PitchNo": int(pitch_no),
+        "PitchOfAB": int(pitch_of_ab),
+        "PitchType": pitch_type,
+        "Velocity": float(velocity) if velocity else None,
+        "Zone": int(zone) if zone not in [None, "None", ""] else None,
+        "PitchCalled": pitch_called,
+        "WEL": wel,
+        "Balls": int(balls),
+        "Strikes": int(strikes),
+        "TaggedHit": tagged or None,
+        "HitDirection": hitdir or None,
+        "KPI": kpi or None
+    }
+    return {k: v for k, v in payload.items() if v is not None}
+
+
+def insert_pitch_safe(atbat_id, pitch_no, pitch_of_ab, pitch_type, velocity, zone,
+                      pitch_called, balls, strikes, wel, tagged, hitdir, kpi):
+    payload = pitch_payload(atbat_id, pitch_no, pitch_of_ab, pitch_type, velocity, zone,
+                            pitch_called, balls, strikes, wel, tagged, hitdir, kpi)
+    return get_backend().insert("Pitches", payload)
+
+
+def _notify(table, op, rows):
+    for listener in write_listeners:
+        listener(table, op, rows)
+
+
+def log_pitches(pitches):
+    """Insert pitches, each with the runner events in its "RunnerEvents" list, in one call.
+
+    Uses the log_pitches RPC (sql/004_write_paths.sql), which is atomic per
+    batch; without it, falls back to one insert for the pitches and one for
+    their events. Write listeners see both tables either way. Returns the
+    pitch rows in input order.
+    """
+    be = get_backend()
+    if "log_pitches" not in _missing_rpcs:
+        try:
+            rows = be.rpc("log_pitches", {"pitches": pitches}) or []
+        except Exception as e:
+            if not _rpc_missing(e):
+                raise
+            _missing_rpcs.add("log_pitches")
+        else:
+            events = [ev for r in rows for ev in r.pop("RunnerEvents", None) or []]
+            _notify("Pitches", "insert", rows)
+            if events:
+                _notify("RunnerEvents", "insert", events)
+            return rows
+    rows = be.insert("Pitches", [{k: v for k, v in p.items() if k != "RunnerEvents"} for p in pitches])
+    events = [{**ev, "PitchID": r["PitchID"]} for p, r in zip(pitches, rows) for ev in p.get("RunnerEvents") or []]
+    if events:
+        be.insert("RunnerEvents", events)
+    return rows
+
+
+def delete_pitch(pitch_id):
+    """Delete one pitch and its runner events; return the deleted pitch rows."""
+    be = get_backend()
+    be.delete("RunnerEvents", where=[("PitchID", "eq", int(pitch_id))])
+    return be.delete("Pitches", where=[("PitchID", "eq", int(pitch_id))])
+
+
+def insert_runner_event(payload):
+    return get_backend().insert("RunnerEvents", payload)
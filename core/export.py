@@ -0,0 +1,161 @@
+"""Streaming export of Games, AtBats, Pitches and RunnerEvents to Parquet or CSV.
+
+Rows are read in keyset-paged chunks (games, then the at-bats of each chunk
+of games, then their pitches, then those pitches' runner events). Pages are
+gathered per table until page_size rows and then go out to the file writer as
+one Arrow record batch (one Parquet row group), so memory stays bounded by the
+page size however large the export is, and small pages such as a chunk's few
+runner events do not each become a row group. Each table gets its own file;
+export_zip() bundles them for a download.
+
+    python -m core.export --game 12 --format csv --out exports/
+    python -m core.export --from 2025-02-01 --to 2025-05-31 --team Tigers
+"""
+import argparse
+import os
+import tempfile
+import zipfile
+
+from core import db
+from core.backends import PRIMARY_KEYS
+
+ID_CHUNK = 200  # ids per IN filter; keeps PostgREST URLs short
+
+_COLUMNS = {
+    "Games": [("GameID", "int64"), ("GameDate", "string"), ("HomeTeam", "string"), ("AwayTeam", "string")],
+    "AtBats": [("AtBatID", "int64"), ("GameID", "int64"), ("BatterID", "int64"), ("PitcherID", "int64"),
+               ("Inning", "int64"), ("LeadOff", "bool"), ("LeadOffOn", "bool"), ("RunsScored", "int64"),
+               ("EarnedRuns", "int64"), ("PlayResult", "string")],
+    "Pitches": [("PitchID", "int64"), ("AtBatID", "int64"), ("PitchNo", "int64"), ("PitchOfAB", "int64"),
+                ("PitchType", "string"), ("Velocity", "float64"), ("Zone", "int64"), ("PitchCalled", "string"),
+                ("WEL", "string"), ("Balls", "int64"), ("Strikes", "int64"), ("TaggedHit", "string"),
+                ("HitDirection", "string"), ("KPI", "string")],
+    "RunnerEvents": [("RunnerEventID", "int64"), ("PitchID", "int64"), ("RunnerID", "int64"),
+                     ("StartBase", "int64"), ("EndBase", "int64"), ("EventType", "string"),
+                     ("OutRecorded", "bool")],
+}
+TABLES = tuple(_COLUMNS)
+
+
+def schema(table):
+    import pyarrow as pa
+
+    types = {"int64": pa.int64(), "float64": pa.float64(), "string": pa.string(), "bool": pa.bool_()}
+    return pa.schema([(name, types[t]) for name, t in _COLUMNS[table]])
+
+
+def game_filters(game_id=None, date_from=None, date_to=None, team=None):
+    where = []
+    if game_id is not None:
+        where.append(("GameID", "eq", int(game_id)))
+    if date_from:
+        where.append(("GameDate", "gte", str(date_from)))
+    if date_to:
+        where.append(("GameDate", "lte", str(date_to)))
+    if team:
+        where.append((None, "or", [[("HomeTeam", "eq", team)], [("AwayTeam", "eq", team)]]))
+    return where
+
+
+def _pages(table, where, page_size):
+    """Yield pages of table rows matching where, keyset-paged on the primary key."""
+    key = PRIMARY_KEYS[table]
+    columns = ", ".join(name for name, _ in _COLUMNS[table])
+    last = None
+    while True:
+        page_where = list(where) + ([(key, "gt", last)] if last is not None else [])
+        rows = db.get_backend().select(table, columns, where=page_where, order=(key,), limit=page_size)
+        if rows:
+            yield rows
+            last = rows[-1][key]
+        if len(rows) < page_size:
+            return
+
+
+def _children(table, fk, parent_ids, page_size):
+    for i in range(0, len(parent_ids), ID_CHUNK):
+        yield from _pages(table, [(fk, "in", parent_ids[i:i + ID_CHUNK])], page_size)
+
+
+def stream(where, page_size=1000):
+    """Yield (table, rows) pages for every game matching where and everything under it."""
+    for games in _pages("Games", where, page_size):
+        yield "Games", games
+        for atbats in _children("AtBats", "GameID", [g["GameID"] for g in games], page_size):
+            yield "AtBats", atbats
+            for pitches in _children("Pitches", "AtBatID", [a["AtBatID"] for a in atbats], page_size):
+                yield "Pitches", pitches
+                yield from (("RunnerEvents", r) for r in
+                            _children("RunnerEvents", "PitchID", [p["PitchID"] for p in pitches], page_size))
+
+
+def _writer(table, path, fmt):
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(path, schema(table), compression="zstd")
+    import pyarrow.csv as pcsv
+    return pcsv.CSVWriter(path, schema(table))
+
+
+def export(out_dir, fmt="parquet", page_size=1000, **scope):
+    """Write one file per table into out_dir; return {table: row count}.
+
+    scope is game_id, date_from, date_to and/or team (see game_filters).
+    """
+    import pyarrow as pa
+
+    if fmt not in ("parquet", "csv"):
+        raise ValueError(f"Unknown export format: {fmt}")
+    os.makedirs(out_dir, exist_ok=True)
+    writers = {t: _writer(t, os.path.join(out_dir, f"{t}.{fmt}"), fmt) for t in TABLES}
+    counts = dict.fromkeys(TABLES, 0)
+    buffered = {t: [] for t in TABLES}
+
+    def flush(table):
+        rows = buffered[table]
+        if rows:
+            writers[table].write_batch(pa.RecordBatch.from_pylist(rows, schema=schema(table)))
+            counts[table] += len(rows)
+            buffered[table] = []
+
+    try:
+        for table, rows in stream(game_filters(**scope), page_size):
+            buffered[table].extend(rows)
+            if len(buffered[table]) >= page_size:
+                flush(table)
+        for t in TABLES:
+            flush(t)
+    finally:
+        for w in writers.values():
+            w.close()
+    return counts
+
+
+def export_zip(fmt="parquet", page_size=1000, **scope):
+    """Export into a temporary zip file; return (zip path, counts). The caller removes the file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        counts = export(tmp, fmt, page_size, **scope)
+        fd, path = tempfile.mkstemp(suffix=".zip")
+        with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED) as zf:
+            for t in TABLES:
+                zf.write(os.path.join(tmp, f"{t}.{fmt}"), f"{t}.{fmt}")
+    return path, counts
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export games and their at-bats, pitches and runner events.")
+    ap.add_argument("--game", type=int, dest="game_id")
+    ap.add_argument("--from", dest="date_from", help="first GameDate (YYYY-MM-DD)")
+    ap.add_argument("--to", dest="date_to", help="last GameDate (YYYY-MM-DD)")
+    ap.add_argument("--team", help="games where this team is home or away")
+    ap.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    ap.add_argument("--out", default="export", help="output directory")
+    ap.add_argument("--page-size", type=int, default=1000)
+    args = ap.parse_args()
+    counts = export(args.out, args.format, args.page_size, game_id=args.game_id,
+                    date_from=args.date_from, date_to=args.date_to, team=args.team)
+    print(", ".join(f"{t}: {n}" for t, n in counts.items()) + f" -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""Bulk import of historical pitch logs (spreadsheet or TrackMan-style CSV).
+
+Files are read as a stream, one row per pitch, and grouped into at-bats and
+then into chunks of about CHUNK pitches. For each chunk the main thread
+resolves new players (one batched lookup/insert via db.ensure_players) and
+new games; a bounded pool of workers then inserts the chunk's at-bats in one
+call and its pitches in batches, with Balls/Strikes/WEL/PitchOfAB computed by
+core.counts exactly as the Tracker would and PitchNo taken from one reserved
+block per chunk.
+
+Progress is checkpointed per chunk in a small SQLite file, so an interrupted
+import picks up where it stopped: finished chunks are skipped and a chunk
+that was half-written is deleted and loaded again.
+
+    python -m core.importer season_2024.csv more.csv --workers 4
+    python -m core.importer old_game.csv --game 12      # all rows into one game
+"""
+import argparse
+import csv
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from core import counts, db
+from core.roster import BATS, THROWS
+
+CHUNK = 2000
+INSERT_BATCH = 500
+ID_CHUNK = 200
+DEFAULT_CHECKPOINT = "import_checkpoint.sqlite3"
+
+
+def _norm(text):
+    return re.sub(r"[^a-z0-9]", "", str(text).lower())
+
+
+# Canonical field -> accepted headers (compared after _norm).
+ALIASES = {
+    "date": ("GameDate", "Date"),
+    "home": ("HomeTeam",),
+    "away": ("AwayTeam",),
+    "game_key": ("GameID", "GameUID"),
+    "inning": ("Inning",),
+    "half": ("Top/Bottom", "Half"),
+    "pa": ("PAofInning",),
+    "pitch_of_pa": ("PitchofPA", "PitchOfAB"),
+    "batter": ("Batter", "BatterName"),
+    "pitcher": ("Pitcher", "PitcherName"),
+    "bats": ("BatterSide", "Bats"),
+    "throws": ("PitcherThrows", "Throws"),
+    "batter_team": ("BatterTeam",),
+    "pitcher_team": ("PitcherTeam",),
+    "pitch_type": ("TaggedPitchType", "PitchType", "AutoPitchType"),
+    "velocity": ("RelSpeed", "Velocity", "Velo"),
+    "zone": ("Zone",),
+    "call": ("PitchCall", "PitchCalled"),
+    "hit_type": ("TaggedHitType", "TaggedHit"),
+    "hit_direction": ("HitDirection",),
+    "play_result": ("PlayResult",),
+    "korbb": ("KorBB",),
+    "runs": ("RunsScored", "Runs"),
+    "kpi": ("KPI", "Notes"),
+}
+
+CALLS = {_norm(c): c for c in counts.CALLS} | {
+    "strikeswinging": "Strike Swing Miss", "swingingstrike": "Strike Swing Miss",
+    "ballintentional": "Ball Called", "ball": "Ball Called",
+    "foulballnotfieldable": "Foul Ball", "foulballfieldable": "Foul Ball", "foul": "Foul Ball",
+    "hitbypitch": "HitByPitch",
+}
+PITCH_TYPES = {_norm(t): t for t in ("Fastball", "Slider", "Curveball", "Changeup", "Cutter", "Splitter")}
+HIT_TYPES = {"groundball": "Groundball", "linedrive": "Linedrive", "flyball": "Flyball", "popup": "Flyball",
+             "bunt": "Bunt"}
+PLAY_RESULTS = {_norm(r): r for r in (
+    "1B", "2B", "3B", "HR", "Walk", "Intentional Walk", "Strikeout Looking", "Strikeout Swinging",
+    "HitByPitch", "GroundOut", "FlyOut", "Error", "FC", "SAC", "SACFly",
+)} | {"single": "1B", "double": "2B", "triple": "3B", "homerun": "HR", "fielderschoice": "FC"}
+
+_CHECKPOINT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS import_chunks (
+    source TEXT NOT NULL,
+    chunk_no INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    atbat_ids TEXT,
+    pitches INTEGER,
+    PRIMARY KEY (source, chunk_no)
+);
+CREATE TABLE IF NOT EXISTS import_sources (
+    source TEXT PRIMARY KEY,
+    chunk INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS import_games (
+    game_key TEXT PRIMARY KEY,
+    game_id INTEGER NOT NULL
+);
+"""
+
+
+# -----------------------------
+# Parsing
+# -----------------------------
+def _columns(fieldnames):
+    by_norm = {_norm(f): f for f in fieldnames or []}
+    cols = {}
+    for field, aliases in ALIASES.items():
+        for a in aliases:
+            if _norm(a) in by_norm:
+                cols[field] = by_norm[_norm(a)]
+                break
+    return cols
+
+
+def _int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(value):
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return None
+    return v if v > 0 else None
+
+
+def _play_result(last):
+    korbb = _norm(last.get("korbb"))
+    if korbb == "strikeout":
+        return "Strikeout Looking" if last["call"] == "Strike Called" else "Strikeout Swinging"
+    if korbb == "walk":
+        return "Walk"
+    if last["call"] == "HitByPitch":
+        return "HitByPitch"
+    raw = _norm(last.get("play_result"))
+    if raw in ("", "undefined"):
+        return None
+    if raw == "out":
+        return "GroundOut" if last["hit_type"] in ("Groundball", "Bunt") else "FlyOut"
+    if raw == "sacrifice":
+        return "SACFly" if last["hit_type"] == "Flyball" else "SAC"
+    return PLAY_RESULTS.get(raw, last["play_result"])
+
+
+def read_atbats(f, game_id=None, warnings=None):
+    """Yield at-bats parsed from an open CSV file, one pitch per row.
+
+    With a PAofInning column, at-bats are split on (game, inning, half,
+    PAofInning); otherwise on a new batter/pitcher/inning or PitchofPA = 1.
+    """
+    warnings = warnings if warnings is not None else []
+    reader = csv.DictReader(f)
+    cols = _columns(reader.fieldnames)
+    missing = [c for c in ("batter", "pitcher", "call") if c not in cols]
+    if game_id is None and "date" not in cols and "game_key" not in cols:
+        missing.append("date or game id")
+    if missing:
+        raise ValueError("CSV is missing columns: " + ", ".join(missing))
+
+    current, current_key = None, None
+    for line_no, raw in enumerate(reader, 2):
+        r = {k: (raw.get(h) or "").strip() for k, h in cols.items()}
+        if not r["batter"] or not r["pitcher"]:
+            warnings.append(f"Line {line_no}: missing batter or pitcher, skipped")
+            continue
+        game = game_id if game_id is not None else (r.get("game_key", ""), r.get("date", ""),
+                                                     r.get("home", ""), r.get("away", ""))
+        if "pa" in cols:
+            key = (game, r.get("inning"), r.get("half"), r["pa"])
+            new = key != current_key
+        else:
+            key = (game, r.get("inning"), r["batter"], r["pitcher"])
+            new = key != current_key or r.get("pitch_of_pa") == "1"
+        if new:
+            if current:
+                yield current
+            current_key = key
+            current = {
+                "game": game, "inning": _int(r.get("inning")) or 1,
+                "leadoff": r.get("pa") == "1" if "pa" in cols else None,
+                "batter": r["batter"], "pitcher": r["pitcher"],
+                "bats": BATS.get(r.get("bats", "").lower()), "throws": THROWS.get(r.get("throws", "").lower()),
+                "batter_team": r.get("batter_team") or None, "pitcher_team": r.get("pitcher_team") or None,
+                "pitches": [],
+            }
+        ptype = r.get("pitch_type", "")
+        current["pitches"].append({
+            "pitch_type": PITCH_TYPES.get(_norm(ptype), ptype or None) if _norm(ptype) != "undefined" else None,
+            "velocity": _float(r.get("velocity")),
+            "zone": _int(r.get("zone")),
+            "call": CALLS.get(_norm(r["call"]), r["call"] or None),
+            "hit_type": HIT_TYPES.get(_norm(r.get("hit_type", ""))),
+            "hit_direction": r.get("hit_direction") or None,
+            "play_result": r.get("play_result", ""),
+            "korbb": r.get("korbb", ""),
+            "runs": _int(r.get("runs")) or 0,
+            "kpi": r.get("kpi") or None,
+        })
+    if current:
+        yield current
+
+
+def chunked(atbats, size=CHUNK):
+    """Group at-bats into lists of about size pitches (never splitting an at-bat)."""
+    chunk, n = [], 0
+    for ab in atbats:
+        chunk.append(ab)
+        n += len(ab["pitches"])
+        if n >= size:
+            yield chunk
+            chunk, n = [], 0
+    if chunk:
+        yield chunk
+
+
+def pitch_rows(atbat_id, atbat, first_pitch_no):
+    """Pitches rows for one at-bat, with counts computed by the Tracker's rules."""
+    rows = []
+    states = counts.replay(p["call"] for p in atbat["pitches"])
+    for i, (p, (balls, strikes, wel)) in enumerate(zip(atbat["pitches"], states)):
+        row = {
+            "AtBatID": atbat_id, "PitchNo": first_pitch_no + i, "PitchOfAB": i + 1,
+            "PitchType": p["pitch_type"], "Velocity": p["velocity"], "Zone": p["zone"],
+            "PitchCalled": p["call"], "WEL": wel, "Balls": balls, "Strikes": strikes,
+            "TaggedHit": p["hit_type"], "HitDirection": p["hit_direction"], "KPI": p["kpi"],
+        }
+        rows.append({k: v for k, v in row.items() if v is not None})
+    return rows
+
+
+def _file_hash(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# -----------------------------
+# Loading
+# -----------------------------
+class Importer:
+    def __init__(self, checkpoint=DEFAULT_CHECKPOINT, workers=4, chunk=CHUNK, game_id=None):
+        self.workers = max(1, int(workers))
+        self.chunk = chunk
+        self.game_id = game_id
+        self.players = {}
+        self.warnings = []
+        self._lock = threading.Lock()
+        self._ck = sqlite3.connect(str(checkpoint), check_same_thread=False, isolation_level=None)
+        self._ck.executescript(_CHECKPOINT_SCHEMA)
+        self.games = {tuple(json.loads(k)): gid
+                      for k, gid in self._ck.execute("SELECT game_key, game_id FROM import_games")}
+
+    def _chunk_state(self, source):
+        rows = self._ck.execute("SELECT chunk_no, status, atbat_ids FROM import_chunks WHERE source = ?", (source,))
+        return {n: (status, json.loads(ids or "[]")) for n, status, ids in rows}
+
+    def _mark(self, source, n, status, atbat_ids=None, pitches=None):
+        with self._lock:
+            self._ck.execute("INSERT OR REPLACE INTO import_chunks VALUES (?, ?, ?, ?, ?)",
+                             (source, n, status, json.dumps(atbat_ids or []), pitches))
+
+    def _resolve(self, atbats):
+        """Create any players and games this chunk needs (main thread only)."""
+        new_players = {}
+        for ab in atbats:
+            for name, extra in ((ab["batter"], {"Bats": ab["bats"], "Team": ab["batter_team"]}),
+                                (ab["pitcher"], {"Throws": ab["throws"], "Team": ab["pitcher_team"]})):
+                if name not in self.players:
+                    new_players.setdefault(name, {"Name": name}).update({k: v for k, v in extra.items() if v})
+        if new_players:
+            self.players.update(db.ensure_players(list(new_players.values())))
+
+        new_games = []
+        for ab in atbats:
+            if self.game_id is None and ab["game"] not in self.games and ab["game"] not in new_games:
+                new_games.append(ab["game"])
+        if new_games:
+            created = db.get_backend().insert("Games", [
+                {"GameDate": date or None, "HomeTeam": home or None, "AwayTeam": away or None}
+                for _, date, home, away in new_games
+            ])
+            for key, row in zip(new_games, created):
+                self.games[key] = row["GameID"]
+                self._ck.execute("INSERT OR REPLACE INTO import_games VALUES (?, ?)",
+                                 (json.dumps(list(key)), row["GameID"]))
+
+    def _delete_atbats(self, atbat_ids):
+        be = db.get_backend()
+        for i in range(0, len(atbat_ids), ID_CHUNK):
+            part = atbat_ids[i:i + ID_CHUNK]
+            be.delete("Pitches", [("AtBatID", "in", part)])
+            be.delete("AtBats", [("AtBatID", "in", part)])
+
+    def _load(self, source, n, atbats):
+        """Insert one chunk's at-bats and pitches; undo the chunk if anything fails."""
+        be = db.get_backend()
+        atbat_rows = []
+        for ab in atbats:
+            runs = sum(p["runs"] for p in ab["pitches"])
+            row = {
+                "GameID": self.game_id if self.game_id is not None else self.games[ab["game"]],
+                "BatterID": self.players[ab["batter"]], "PitcherID": self.players[ab["pitcher"]],
+                "Inning": ab["inning"], "LeadOff": bool(ab["leadoff"]), "LeadOffOn": False,
+                "RunsScored": runs, "PlayResult": _play_result(ab["pitches"][-1]),
+            }
+            atbat_rows.append({k: v for k, v in row.items() if v is not None})
+        atbat_ids = [r["AtBatID"] for r in be.insert("AtBats", atbat_rows)]
+        self._mark(source, n, "started", atbat_ids)
+        try:
+            total = sum(len(ab["pitches"]) for ab in atbats)
+            pitch_no = db.reserve_pitch_numbers(total)
+            rows = []
+            for atbat_id, ab in zip(atbat_ids, atbats):
+                rows += pitch_rows(atbat_id, ab, pitch_no)
+                pitch_no += len(ab["pitches"])
+            for i in range(0, len(rows), INSERT_BATCH):
+                be.insert("Pitches", rows[i:i + INSERT_BATCH])
+        except BaseException:
+            self._delete_atbats(atbat_ids)
+            self._mark(source, n, "failed")
+            raise
+        self._mark(source, n, "done", atbat_ids, total)
+        return len(atbat_ids), total
+
+    def run(self, path):
+        """Import one file; return {"atbats", "pitches", "skipped_chunks", "seconds"}."""
+        t0 = time.perf_counter()
+        source = _file_hash(path)
+        # Chunk numbers only mean something with the chunk size they were cut with.
+        self._ck.execute("INSERT OR IGNORE INTO import_sources VALUES (?, ?)", (source, self.chunk))
+        chunk = self._ck.execute("SELECT chunk FROM import_sources WHERE source = ?", (source,)).fetchone()[0]
+        state = self._chunk_state(source)
+        report = {"file": str(path), "atbats": 0, "pitches": 0, "skipped_chunks": 0}
+
+        def collect(futures):
+            for fut in futures:
+                a, p = fut.result()
+                report["atbats"] += a
+                report["pitches"] += p
+
+        with open(path, newline="", encoding="utf-8-sig") as f, ThreadPoolExecutor(self.workers) as pool:
+            inflight = set()
+            for n, atbats in enumerate(chunked(read_atbats(f, self.game_id, self.warnings), chunk)):
+                status, old_ids = state.get(n, (None, []))
+                if status == "done":
+                    report["skipped_chunks"] += 1
+                    continue
+                if status == "started":
+                    self._delete_atbats(old_ids)
+                self._resolve(atbats)
+                inflight.add(pool.submit(self._load, source, n, atbats))
+                if len(inflight) >= self.workers * 2:
+                    finished, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+                    collect(finished)
+            collect(inflight)
+        report["seconds"] = round(time.perf_counter() - t0, 3)
+        return report
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Import historical pitch CSVs into the tracking schema.")
+    ap.add_argument("files", nargs="+")
+    ap.add_argument("--game", type=int, help="put every row into this existing GameID")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--chunk", type=int, default=CHUNK, help="pitches per chunk")
+    ap.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    args = ap.parse_args()
+
+    importer = Importer(args.checkpoint, args.workers, args.chunk, args.game)
+    for path in args.files:
+        r = importer.run(path)
+        print(f"{r['file']}: {r['atbats']} at-bats, {r['pitches']} pitches in {r['seconds']} s"
+              + (f" ({r['skipped_chunks']} chunks already imported)" if r["skipped_chunks"] else ""))
+    for w in importer.warnings[:50]:
+        print("warning:", w)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Per-rerun instrumentation: section timings and backend calls.
+
+A Trace records how long each section of a page script took and every backend
+call made from the thread that is running it (table, operation, row count,
+duration). Pages open one per rerun with begin(), call mark() at each section
+boundary and render_panel() at the end; a rerun cut short by st.rerun() or
+st.stop() is closed at the start of the next one. A click inside an
+st.fragment reruns only that function, so fragment bodies are wrapped with
+fragment(), which gives such a rerun its own trace. Benchmarks and load tests
+use collect() to get the same records outside Streamlit.
+
+Finished traces are kept in the session (last HISTORY reruns) and, when
+PITCH_TRACE_PATH is set, appended to that file as JSON lines. Summarize a
+game-day file with:
+
+    python -m core.instrument traces.jsonl
+"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from core.backends import call_listeners, stats
+
+HISTORY = 20
+_local = threading.local()
+_file_lock = threading.Lock()
+
+
+class Trace:
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.sections = []
+        self.calls = []
+        self.total_ms = None
+        self.status = "running"
+        self._section = None
+        self._section_t0 = None
+
+    def mark(self, section):
+        """Close the current section (if any) and start a new one."""
+        now = time.perf_counter()
+        if self._section is not None:
+            self.sections.append({"name": self._section, "ms": round((now - self._section_t0) * 1000, 3)})
+        self._section, self._section_t0 = section, now
+
+    def record_call(self, table, op, rows, seconds, ok):
+        self.calls.append({
+            "section": self._section, "table": table, "op": op, "rows": rows,
+            "ms": round(seconds * 1000, 3), "ok": ok,
+        })
+
+    def finish(self, status="ok"):
+        if self.total_ms is None:
+            self.mark(None)
+            self.total_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+            self.status = status
+        return self
+
+    def to_dict(self):
+        return {
+            "name": self.name, "started_at": self.started_at, "status": self.status,
+            "total_ms": self.total_ms, "backend_ms": round(sum(c["ms"] for c in self.calls), 3),
+            "sections": self.sections, "calls": self.calls,
+        }
+
+
+def _on_call(table, op, rows, seconds, ok):
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.record_call(table, op, rows, seconds, ok)
+
+
+call_listeners.append(_on_call)
+
+
+@contextmanager
+def collect(name):
+    """Record backend calls made in this thread into a Trace for the block's duration."""
+    outer = getattr(_local, "trace", None)
+    trace = Trace(name)
+    trace.mark(name)
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = outer
+        trace.finish()
+
+
+def export(trace, path=None):
+    path = path or os.environ.get("PITCH_TRACE_PATH")
+    if not path:
+        return
+    with _file_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(trace.to_dict()) + "\n")
+
+
+# -----------------------------
+# Streamlit pages
+# -----------------------------
+def _history(state):
+    if "instrument_history" not in state:
+        state["instrument_history"] = deque(maxlen=HISTORY)
+    return state["instrument_history"]
+
+
+def _close(state, status):
+    trace = state.get("instrument_trace")
+    if trace is not None:
+        _local.trace = None
+        trace.finish(status)
+        _history(state).appendleft(trace.to_dict())
+        export(trace)
+        state["instrument_trace"] = None
+
+
+def begin(page, state):
+    """Start tracing this rerun if the sidebar toggle is on. Returns the Trace or None."""
+    import streamlit as st
+
+    enabled = st.sidebar.toggle("Instrumentation", key="instrumentation_on")
+    _close(state, "interrupted")
+    if not enabled:
+        return None
+    trace = Trace(page)
+    state["instrument_trace"] = trace
+    _local.trace = trace
+    trace.mark("setup")
+    return trace
+
+
+def mark(state, section):
+    trace = state.get("instrument_trace")
+    if trace is not None:
+        trace.mark(section)
+
+
+def fragment(page, section):
+    """Decorate an st.fragment body so a fragment-only rerun is traced as "<page>: <section>".
+
+    Within a full rerun the page's own trace already covers the body. Put it
+    under @st.fragment.
+    """
+    def wrap(fn):
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            import streamlit as st
+
+            state = st.session_state
+            if state.get("instrument_trace") is not None or not state.get("instrumentation_on"):
+                return fn(*args, **kwargs)
+            trace = Trace(f"{page}: {section}")
+            state["instrument_trace"] = trace
+            _local.trace = trace
+            trace.mark(section)
+            status = "interrupted"  # st.rerun() / st.stop() raise out of the body
+            try:
+                result = fn(*args, **kwargs)
+                status = "ok"
+                return result
+            finally:
+                _close(state, status)
+        return run
+    return wrap
+
+
+def render_health(offline_note="", outbox=None):
+    """Show a banner while the backend is degraded or offline (see db.health).
+
+    With an outbox, also report the queued writes the database rejected.
+    """
+    import streamlit as st
+
+    from core import db
+
+    state, detail = db.health()
+    if state == "offline":
+        st.warning(f"Offline — the database is not reachable ({detail}). {offline_note}".strip())
+    elif state == "degraded":
+        st.info(f"The database is slow or failing intermittently ({detail}); calls are being retried.")
+    dead = outbox.dead_count() if outbox is not None else 0
+    if dead:
+        last_error = outbox.dead()[-1][3]
+        st.error(f"{dead} queued write(s) were rejected by the database and set aside ({last_error}). "
+                 "Later pitches are still being saved; retry them from the sidebar once the cause is fixed.")
+
+
+def render_panel(state):
+    """Close this rerun's trace and show the recent reruns in a collapsible panel."""
+    import streamlit as st
+
+    if not state.get("instrumentation_on"):
+        return
+    _close(state, "ok")
+    history = list(_history(state))
+    with st.expander(f"Instrumentation — last {len(history)} reruns", expanded=False):
+        if not history:
+            st.caption("No reruns recorded yet.")
+            return
+        st.dataframe([
+            {"page": t["name"], "status": t["status"], "total ms": t["total_ms"], "backend ms": t["backend_ms"],
+             "calls": len(t["calls"]),
+             "at": time.strftime("%H:%M:%S", time.localtime(t["started_at"]))}
+            for t in history
+        ], hide_index=True)
+        latest = history[0]
+        st.caption("Latest rerun — sections")
+        st.dataframe(latest["sections"], hide_index=True)
+        if latest["calls"]:
+            st.caption("Latest rerun — backend calls")
+            st.dataframe(latest["calls"], hide_index=True)
+        st.caption("Backend calls since the server started")
+        st.dataframe([
+            {k: r[k] for k in ("table", "op", "calls", "errors", "p50_ms", "p99_ms", "retries", "timeouts",
+                               "hedged", "rejected")}
+            for r in stats.snapshot()
+        ], hide_index=True)
+        st.download_button(
+            "Export traces (JSON lines)",
+            data="\n".join(json.dumps(t) for t in reversed(history)) + "\n",
+            file_name="traces.jsonl",
+            mime="application/json",
+        )
+
+
+# -----------------------------
+# Offline analysis
+# -----------------------------
+def _pct(values, p):
+    vals = sorted(values)
+    return vals[min(len(vals) - 1, round(p / 100 * (len(vals) - 1)))]
+
+
+def summarize(lines):
+    """Aggregate JSON-lines traces into per-section and per-call percentiles."""
+    sections, calls, totals = defaultdict(list), defaultdict(list), defaultdict(list)
+    for line in lines:
+        if not line.strip():
+            continue
+        t = json.loads(line)
+        if t["total_ms"] is not None:
+            totals[t["name"]].append(t["total_ms"])
+        for s in t["sections"]:
+            sections[(t["name"], s["name"])].append(s["ms"])
+        for c in t["calls"]:
+            calls[(t["name"], c["section"], c["table"], c["op"])].append(c["ms"])
+
+    def row(values):
+        return {"n": len(values), "p50": _pct(values, 50), "p90": _pct(values, 90),
+                "p99": _pct(values, 99), "max": max(values)}
+
+    return {
+        "reruns": {page: row(v) for page, v in totals.items()},
+        "sections": [{"page": p, "section": s, **row(v)} for (p, s), v in sections.items()],
+        "calls": [{"page": p, "section": s, "table": t, "op": o, **row(v)} for (p, s, t, o), v in calls.items()],
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python -m core.instrument TRACES.jsonl")
+    with open(sys.argv[1], encoding="utf-8") as f:
+        print(json.dumps(summarize(f), indent=2))
@@ -0,0 +1,396 @@
+"""Live game feed: one change subscription per process, fanned out to viewers.
+
+The LiveHub listens to inserts and updates on AtBats, Pitches and
+RunnerEvents and routes each change to an in-memory GameFeed per watched
+game (scoreboard plus a bounded list of feed lines). Viewers only read those
+feeds, so any number of them cost nothing on the database beyond one
+initial load per game.
+
+Changes come from Supabase Realtime (postgres_changes over a websocket, see
+sql/003_realtime.sql) when PITCH_REALTIME_URL (a project URL) is set or the
+backend is Supabase; otherwise from this process's own writes via
+db.on_write, which is all a single-server SQLite deployment needs.
+LocalRealtimeServer speaks enough of the Realtime protocol, on the same
+/realtime/v1/websocket path, to stand in for Supabase in tests and
+benchmarks.
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from core import db
+
+TABLES = ("AtBats", "Pitches", "RunnerEvents")
+FEED_LINES = 50
+_WRITE_EVENTS = {"insert": "INSERT", "upsert": "UPDATE", "update": "UPDATE", "delete": "DELETE"}
+WEBSOCKET_PATH = "/realtime/v1/websocket"
+
+
+def realtime_url(project_url):
+    """Return the Realtime endpoint of a project URL, as supabase-py builds it.
+
+    https://x.supabase.co becomes wss://x.supabase.co/realtime/v1; the
+    realtime client appends /websocket.
+    """
+    return re.sub(r"^http", "ws", project_url.rstrip("/"), flags=re.IGNORECASE) + "/realtime/v1"
+
+
+def _start_loop(name):
+    """Run a new event loop on a daemon thread; returns (loop, thread)."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name=name, daemon=True)
+    thread.start()
+    return loop, thread
+
+
+async def _drain():
+    """Cancel every other task on the running loop and wait for them to finish."""
+    tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.get_running_loop().shutdown_asyncgens()
+
+
+def _stop_loop(loop, thread, shutdown, timeout=5):
+    """Run the shutdown coroutine on loop, then stop the loop, join its thread and close it."""
+    try:
+        asyncio.run_coroutine_threadsafe(shutdown, loop).result(timeout)
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+
+
+# -----------------------------
+# Per-game state
+# -----------------------------
+class GameFeed:
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.version = 0
+        self.lines = deque(maxlen=FEED_LINES)
+        self.atbats = {}
+        self.pitches = {}      # PitchID -> AtBatID
+        self.pitch_counts = {}  # PitcherID -> pitches thrown
+        self.names = {}
+        self.current = None    # AtBatID of the latest at-bat
+        self.count = (0, 0)
+        self._lock = threading.Lock()
+
+    def seed(self):
+        """Load the game's at-bats, pitches and recent runner events (one time per process)."""
+        atbats = db.game_atbats([self.game_id], "*")
+        pitches = db.load_pitches(atbat_ids=[a["AtBatID"] for a in atbats]) if atbats else []
+        recent = [p["PitchID"] for p in pitches[-200:]]
+        events = db.get_backend().select("RunnerEvents", where=[("PitchID", "in", recent)]) if recent else []
+        self.names = db.player_names({a[k] for a in atbats for k in ("BatterID", "PitcherID")} - {None})
+        rows = ([("AtBats", a) for a in atbats] + [("Pitches", p) for p in pitches]
+                + [("RunnerEvents", e) for e in events])
+        with self._lock:
+            for table, row in rows:
+                self._apply(table, "INSERT", row, None)
+        return self
+
+    def _name(self, pid):
+        return self.names.get(pid, f"#{pid}")
+
+    def _line(self, text):
+        self.lines.appendleft({"at": time.strftime("%H:%M:%S"), "text": text})
+
+    def _apply(self, table, event, row, old):
+        if table == "AtBats" and event in ("INSERT", "UPDATE") and row.get("GameID") == self.game_id:
+            before = self.atbats.get(row["AtBatID"], {})
+            self.atbats[row["AtBatID"]] = row
+            if not before:
+                self.current = max(self.current or 0, row["AtBatID"])
+                if row["AtBatID"] == self.current:
+                    self.count = (0, 0)
+                self._line(f"Inning {row.get('Inning')}: {self._name(row.get('BatterID'))} up against "
+                           f"{self._name(row.get('PitcherID'))}")
+            elif row.get("PlayResult") and row.get("PlayResult") != before.get("PlayResult"):
+                runs = row.get("RunsScored") or 0
+                self._line(f"{self._name(row.get('BatterID'))}: {row['PlayResult']}"
+                           + (f" — {runs} run{'s' if runs != 1 else ''} scored" if runs else ""))
+            return True
+        if table == "Pitches" and row.get("AtBatID") in self.atbats:
+            if event == "DELETE":
+                return self._remove_pitch(row)
+            if event == "INSERT" and row["PitchID"] not in self.pitches:
+                self.pitches[row["PitchID"]] = row["AtBatID"]
+                pitcher = self.atbats[row["AtBatID"]].get("PitcherID")
+                self.pitch_counts[pitcher] = self.pitch_counts.get(pitcher, 0) + 1
+            if row["AtBatID"] == self.current:
+                self.count = (row.get("Balls") or 0, row.get("Strikes") or 0)
+            velo = f" {row['Velocity']:g}" if row.get("Velocity") else ""
+            self._line(f"Pitch {row.get('PitchOfAB')}: {row.get('PitchType') or '?'}{velo} — "
+                       f"{row.get('PitchCalled')} ({row.get('Balls')}-{row.get('Strikes')})")
+            return True
+        if table == "Pitches" and event == "DELETE" and (old or row).get("PitchID") in self.pitches:
+            return self._remove_pitch(old or row)
+        if table == "RunnerEvents" and event == "INSERT" and row.get("PitchID") in self.pitches:
+            end = row.get("EndBase")
+            self._line(f"Runner {self._name(row.get('RunnerID'))}: {row.get('EventType')} "
+                       f"{row.get('StartBase')}→{end or '-'}" + (" (out)" if row.get("OutRecorded") else ""))
+            return True
+        return False
+
+    def _remove_pitch(self, row):
+        atbat_id = self.pitches.pop(row.get("PitchID"), None)
+        if atbat_id is None:
+            return False
+        pitcher = self.atbats.get(atbat_id, {}).get("PitcherID")
+        self.pitch_counts[pitcher] = max(0, self.pitch_counts.get(pitcher, 0) - 1)
+        self._line(f"Pitch {row.get('PitchOfAB') or row.get('PitchID')} removed")
+        return True
+
+    def apply(self, table, event, row, old=None):
+        if table == "AtBats" and row and row.get("GameID") == self.game_id:
+            # New batters and relievers: one name lookup per at-bat, outside the lock.
+            missing = {row.get("BatterID"), row.get("PitcherID")} - set(self.names) - {None}
+            if missing:
+                self.names.update(db.player_names(missing))
+        with self._lock:
+            if self._apply(table, event, row or {}, old):
+                self.version += 1
+
+    def snapshot(self):
+        """Return a plain dict of the scoreboard and feed for rendering."""
+        with self._lock:
+            ab = self.atbats.get(self.current, {})
+            finished = [a for a in self.atbats.values() if a.get("PlayResult")]
+            return {
+                "version": self.version,
+                "inning": ab.get("Inning"),
+                "batter": self._name(ab["BatterID"]) if ab.get("BatterID") else None,
+                "pitcher": self._name(ab["PitcherID"]) if ab.get("PitcherID") else None,
+                "pitcher_pitches": self.pitch_counts.get(ab.get("PitcherID"), 0),
+                "count": None if ab.get("PlayResult") else self.count,
+                "atbats": len(self.atbats),
+                "pitches": len(self.pitches),
+                "runs": sum(a.get("RunsScored") or 0 for a in finished),
+                "lines": list(self.lines),
+            }
+
+
+# -----------------------------
+# Hub and change sources
+# -----------------------------
+class LiveHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._feeds = {}
+        self.source = None
+
+    def feed(self, game_id):
+        with self._lock:
+            feed = self._feeds.get(game_id)
+        if feed is None:
+            feed = GameFeed(game_id).seed()
+            with self._lock:
+                feed = self._feeds.setdefault(game_id, feed)
+        return feed
+
+    def on_change(self, table, event, row, old=None):
+        with self._lock:
+            feeds = list(self._feeds.values())
+        for feed in feeds:
+            feed.apply(table, event, row, old)
+
+
+class LocalSource:
+    """Feed the hub from this process's own writes."""
+
+    def __init__(self, hub):
+        self.hub = hub
+        db.on_write(self._on_write)
+
+    def _on_write(self, table, op, rows):
+        if table in TABLES:
+            for r in rows:
+                self.hub.on_change(table, _WRITE_EVENTS[op], r, r if op == "delete" else None)
+
+
+class RealtimeSource:
+    """Feed the hub from Supabase Realtime postgres_changes on a background event loop."""
+
+    def __init__(self, hub, url, key):
+        self.hub = hub
+        self.url, self.key = url, key
+        self.status = "connecting"
+        self.error = None
+        self._ready = threading.Event()
+        self._task = None
+        self.client = None
+        self._loop, self._thread = _start_loop("live-feed")
+        asyncio.run_coroutine_threadsafe(self._subscribe(), self._loop)
+
+    def _on_change(self, payload):
+        data = payload["data"]
+        self.hub.on_change(data["table"], data["type"], data.get("record") or {}, data.get("old_record"))
+
+    def _on_status(self, status, err):
+        self.status = str(getattr(status, "value", status))
+        self.error = err
+        self._ready.set()
+
+    async def _subscribe(self):
+        from realtime import AsyncRealtimeClient
+
+        self._task = asyncio.current_task()
+        try:
+            self.client = AsyncRealtimeClient(self.url, self.key)
+            channel = self.client.channel("pitch-tracker-live")
+            for table in TABLES:
+                channel.on_postgres_changes("*", self._on_change, table=table, schema="public")
+            await channel.subscribe(self._on_status)
+        except Exception as e:
+            self._on_status("CHANNEL_ERROR", e)
+
+    def wait_ready(self, timeout=10):
+        return self._ready.wait(timeout)
+
+    async def _shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self.client is not None:
+            await self.client.close()
+        await _drain()
+
+    def close(self):
+        """Stop subscribing (or retrying), disconnect, and stop and close the event loop."""
+        _stop_loop(self._loop, self._thread, self._shutdown())
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    """Return the process-wide hub, connecting its change source on first use."""
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                hub = LiveHub()
+                url = os.environ.get("PITCH_REALTIME_URL")
+                key = os.environ.get("PITCH_REALTIME_KEY", "")
+                be = db.get_backend()
+                if not url and be.name == "supabase":
+                    url, key = be.url, be.key
+                hub.source = RealtimeSource(hub, realtime_url(url), key) if url else LocalSource(hub)
+                _hub = hub
+    return _hub
+
+
+# -----------------------------
+# Local stand-in for Supabase Realtime
+# -----------------------------
+class LocalRealtimeServer:
+    """Minimal Realtime (Phoenix channels, JSON v1) websocket server for tests.
+
+    Its url is used like a project URL: the websocket is only served on
+    /realtime/v1/websocket, so a client pointed at the wrong path fails here
+    as it would against Supabase. Answers channel joins with postgres_changes binding ids and pushes
+    whatever is passed to publish() to every matching binding. Call
+    publish_writes() to forward this process's db writes, which turns a
+    SQLite backend into a change feed the real realtime client can consume.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host, self.port = host, port
+        self._subs = []  # (websocket, topic, binding id, binding)
+        self._next_id = 1
+        self._loop = self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        self._loop, self._thread = _start_loop("realtime-standin")
+        asyncio.run_coroutine_threadsafe(self._serve(), self._loop).result(10)
+        return self
+
+    async def _serve(self):
+        from websockets.asyncio.server import serve
+
+        self._server = await serve(self._handle, self.host, self.port, process_request=self._check_path)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    @staticmethod
+    def _check_path(connection, request):
+        if urlsplit(request.path).path != WEBSOCKET_PATH:
+            return connection.respond(HTTPStatus.NOT_FOUND, f"Realtime is served on {WEBSOCKET_PATH}\n")
+        return None
+
+    async def _handle(self, ws):
+        try:
+            async for raw in ws:
+                msg = json.loads(raw)
+                if msg.get("event") != "phx_join":
+                    continue
+                bindings = msg["payload"].get("config", {}).get("postgres_changes", [])
+                reply = []
+                for b in bindings:
+                    bid, self._next_id = self._next_id, self._next_id + 1
+                    self._subs.append((ws, msg["topic"], bid, b))
+                    reply.append({"id": bid, **b})
+                await ws.send(json.dumps({
+                    "event": "phx_reply", "topic": msg["topic"], "ref": msg.get("ref"),
+                    "payload": {"status": "ok", "response": {"postgres_changes": reply}},
+                }))
+        finally:
+            self._subs = [s for s in self._subs if s[0] is not ws]
+
+    @staticmethod
+    def _matches(binding, table, event, record):
+        if binding.get("table") not in (None, "*", table) or binding.get("events") not in ("*", event):
+            return False
+        flt = binding.get("filter")
+        if flt:
+            col, _, value = flt.partition("=eq.")
+            return str(record.get(col)) == value
+        return True
+
+    async def _send(self, table, event, record, old):
+        data = {
+            "schema": "public", "table": table, "type": event, "errors": None, "columns": [],
+            "commit_timestamp": datetime.now(timezone.utc).isoformat(),
+            "record": record if event != "DELETE" else {}, "old_record": old or {},
+        }
+        targets = {}
+        for ws, topic, bid, b in self._subs:
+            if self._matches(b, table, event, record or old or {}):
+                targets.setdefault((ws, topic), []).append(bid)
+        for (ws, topic), ids in targets.items():
+            await ws.send(json.dumps({"event": "postgres_changes", "topic": topic, "ref": None,
+                                      "payload": {"data": data, "ids": ids}}))
+
+    def publish(self, table, event, record, old=None):
+        asyncio.run_coroutine_threadsafe(self._send(table, event, record, old), self._loop).result(10)
+
+    def publish_writes(self):
+        def forward(table, op, rows):
+            if table in TABLES:
+                for r in rows:
+                    self.publish(table, _WRITE_EVENTS[op], r, r if op == "delete" else None)
+        db.on_write(forward)
+        return self
+
+    async def _shutdown(self):
+        self._server.close()
+        await self._server.wait_closed()
+        await _drain()
+
+    def stop(self):
+        _stop_loop(self._loop, self._thread, self._shutdown())
@@ -0,0 +1,49 @@
+"""PitchNo / PitchOfAB allocation without a read per pitch.
+
+PitchOfAB is a plain counter per at-bat: an at-bat is only ever logged from
+one session, so the session owns it. Global PitchNo values come from a
+backend counter in blocks (see sql/001_pitch_numbers.sql); a block is owned
+by exactly one allocator, so two sessions can never hand out the same number,
+and a session only goes back to the backend once every block_size pitches.
+Numbers left in a block when a session ends are simply skipped.
+"""
+import threading
+
+
+class PitchNumbers:
+    def __init__(self, reserve, block_size=20):
+        """reserve(n) must atomically claim n numbers and return the first."""
+        self._reserve = reserve
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self.atbat_id = None
+        self.next_of_ab = 1
+
+    def start_atbat(self, atbat_id, last_pitch_of_ab=0):
+        with self._lock:
+            self.atbat_id = atbat_id
+            self.next_of_ab = int(last_pitch_of_ab) + 1
+
+    def _ensure_block(self):
+        if self._next >= self._end:
+            # Never step back into our own block, e.g. when the backend's
+            # fallback path has not seen our queued pitches yet.
+            first = max(int(self._reserve(self.block_size)), self._end)
+            self._next, self._end = first, first + self.block_size
+
+    def peek(self):
+        """Return the (PitchNo, PitchOfAB) the next take() will hand out."""
+        with self._lock:
+            self._ensure_block()
+            return self._next, self.next_of_ab
+
+    def take(self):
+        """Claim and return the next (PitchNo, PitchOfAB)."""
+        with self._lock:
+            self._ensure_block()
+            pair = (self._next, self.next_of_ab)
+            self._next += 1
+            self.next_of_ab += 1
+            return pair
@@ -0,0 +1,385 @@
+"""Durable local outbox for pitch and runner-event writes.
+
+Submitting a pitch appends a row to a small SQLite write-ahead log and returns
+immediately. A daemon thread drains the log to the backend in order and in
+batches, retrying with backoff until the network comes back, and replays
+anything still pending when the server restarts.
+
+Runner events usually refer to a pitch that has not reached the backend yet,
+so they carry the pitch's outbox ref ("_pitch_ref") and get the real PitchID
+filled in when they are sent.
+
+A row the backend rejects outright (a constraint violation, a bad value) can
+never succeed by retrying. The batch is split around it and the row is set
+aside as a dead letter with its error, together with any runner events that
+point at it, so the writes queued behind it keep flowing. The Tracker shows
+the dead-letter count; requeue_dead() puts them back in the queue once the
+cause is fixed.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from core import db
+from core.backends.resilience import BackendUnavailable, classify
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / "pitch_outbox.sqlite3"
+
+# kind -> (table, primary key, natural key used to detect rows that already landed)
+KINDS = {
+    "pitch": ("Pitches", "PitchID", ("AtBatID", "PitchOfAB")),
+    "runner_event": ("RunnerEvents", None, ("PitchID", "RunnerID", "EventType")),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    sent_at REAL,
+    remote_id INTEGER,
+    dead_at REAL
+);
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS outbox_queued ON outbox (id) WHERE sent_at IS NULL AND dead_at IS NULL"
+
+
+def rejected(err):
+    """True if the backend refused the write itself, so retrying it cannot help."""
+    return classify(err) is None and not isinstance(err, BackendUnavailable)
+
+
+def send_rows(kind, rows):
+    """Insert rows for an outbox kind in one call; return the inserted rows.
+
+    Pitches go through db.log_pitches so runner events queued with a pitch
+    land in the same atomic call.
+    """
+    if kind == "pitch":
+        return db.log_pitches(rows)
+    return db.get_backend().insert(KINDS[kind][0], rows)
+
+
+def find_existing(kind, rows):
+    """Return {natural key: primary key or True} for rows already in the backend."""
+    table, pk, natural = KINDS[kind]
+    parent = natural[0]
+    parents = sorted({r[parent] for r in rows})
+    cols = ", ".join(([pk] if pk else []) + list(natural))
+    found = db.get_backend().select(table, cols, where=[(parent, "in", parents)])
+    return {tuple(f.get(k) for k in natural): (f[pk] if pk else True) for f in found}
+
+
+class Outbox:
+    def __init__(self, path=DEFAULT_PATH, batch_size=50, max_backoff=30.0):
+        self.path = str(path)
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # held while a batch is in flight
+        self._wake = threading.Event()
+        self._thread = None
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        if "dead_at" not in {r[1] for r in self._conn.execute("PRAGMA table_info(outbox)")}:
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN dead_at REAL")
+        self._conn.execute("DROP INDEX IF EXISTS outbox_pending")
+        self._conn.execute(_INDEX)
+        # Sent rows are only kept around to resolve refs for the current game.
+        self._conn.execute("DELETE FROM outbox WHERE sent_at < ?", (time.time() - 7 * 86400,))
+
+    # -----------------------------
+    # Producer side (UI thread)
+    # -----------------------------
+    def enqueue(self, kind, payload):
+        """Durably queue a write and return its local ref."""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown outbox kind: {kind}")
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO outbox (kind, payload, created_at) VALUES (?, ?, ?)",
+                (kind, json.dumps(payload), time.time()),
+            )
+        self._wake.set()
+        return cur.lastrowid
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE sent_at IS NULL AND dead_at IS NULL").fetchone()[0]
+
+    def dead_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE dead_at IS NOT NULL").fetchone()[0]
+
+    def dead(self):
+        """Return [(ref, kind, payload, last_error)] of rejected writes, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, payload, last_error FROM outbox WHERE dead_at IS NOT NULL ORDER BY id"
+            ).fetchall()
+        return [(ref, kind, json.loads(payload), err) for ref, kind, payload, err in rows]
+
+    def requeue_dead(self):
+        """Put every dead letter back in the queue; returns how many."""
+        with self._lock:
+            n = self._conn.execute("UPDATE outbox SET dead_at = NULL, attempts = 0 WHERE dead_at IS NOT NULL").rowcount
+        self._wake.set()
+        return n
+
+    def remote_id(self, ref):
+        """Return the backend primary key for a ref, or None while it is pending."""
+        with self._lock:
+            row = self._conn.execute("SELECT remote_id FROM outbox WHERE id = ?", (ref,)).fetchone()
+        return row[0] if row else None
+
+    def pending(self, kind):
+        """Return [(ref, payload)] of unsent writes of one kind, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload FROM outbox WHERE sent_at IS NULL AND dead_at IS NULL AND kind = ? "
+                "ORDER BY id", (kind,)
+            ).fetchall()
+        return [(ref, json.loads(payload)) for ref, payload in rows]
+
+    def adopt(self, kind, remote_id):
+        """Return a ref for a row already in the backend (e.g. after a session restore)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM outbox WHERE kind = ? AND remote_id = ? ORDER BY id DESC LIMIT 1",
+                (kind, remote_id),
+            ).fetchone()
+            if row:
+                return row[0]
+            now = time.time()
+            return self._conn.execute(
+                "INSERT INTO outbox (kind, payload, created_at, sent_at, remote_id) VALUES (?, '{}', ?, ?, ?)",
+                (kind, now, now, remote_id),
+            ).lastrowid
+
+    def cancel(self, ref):
+        """Drop a queued pitch and any queued runner events that point at it.
+
+        Returns True if the pitch itself was still queued, False if it has
+        already been sent (the caller deletes it from the backend).
+        """
+        with self._flush_lock, self._lock:
+            self._conn.execute(
+                "DELETE FROM outbox WHERE sent_at IS NULL AND kind = 'runner_event' "
+                "AND json_extract(payload, '$._pitch_ref') = ?", (ref,)
+            )
+            return self._conn.execute("DELETE FROM outbox WHERE id = ? AND sent_at IS NULL", (ref,)).rowcount == 1
+
+    def replace(self, ref, payload):
+        """Rewrite a queued write's payload; False if it has already been sent."""
+        with self._flush_lock, self._lock:
+            old = self._conn.execute("SELECT payload FROM outbox WHERE id = ? AND sent_at IS NULL",
+                                     (ref,)).fetchone()
+            if old is None:
+                return False
+            # Keep fields the caller does not know about (e.g. runner events queued with the pitch).
+            payload = {**{k: v for k, v in json.loads(old[0]).items() if k == "RunnerEvents"}, **payload}
+            self._conn.execute("UPDATE outbox SET payload = ? WHERE id = ?", (json.dumps(payload), ref))
+            return True
+
+    # -----------------------------
+    # Writer side (background thread)
+    # -----------------------------
+    def _next_batch(self):
+        """Return the oldest pending rows that share one kind, in order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, payload, attempts FROM outbox WHERE sent_at IS NULL AND dead_at IS NULL "
+                "ORDER BY id LIMIT ?", (self.batch_size,)
+            ).fetchall()
+        batch = []
+        for r in rows:
+            if batch and r[1] != batch[0][1]:
+                break
+            batch.append(r)
+        return batch
+
+    def _resolve_refs(self, payload):
+        ref = payload.pop("_pitch_ref", None)
+        if ref is not None:
+            pitch_id = self.remote_id(ref)
+            if pitch_id is None:
+                with self._lock:
+                    row = self._conn.execute("SELECT dead_at FROM outbox WHERE id = ?", (ref,)).fetchone()
+                if row is None or row[0] is not None:
+                    raise LookupError(f"Pitch ref {ref} was rejected or cancelled")
+                raise RuntimeError(f"Pitch ref {ref} has not been sent yet")
+            payload["PitchID"] = pitch_id
+        return payload
+
+    def _mark_sent(self, done):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET sent_at = ?, remote_id = ?, last_error = NULL WHERE id = ?",
+                [(now, remote, ref) for ref, remote in done],
+            )
+
+    def _mark_dead(self, ref, err):
+        """Set a rejected write aside, with the queued runner events that point at it."""
+        now, error = time.time(), f"{type(err).__name__}: {err}"
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET dead_at = ?, last_error = ?, attempts = attempts + 1 WHERE id = ? "
+                "OR (sent_at IS NULL AND kind = 'runner_event' AND json_extract(payload, '$._pitch_ref') = ?)",
+                (now, error, ref, ref),
+            )
+
+    def _send(self, kind, items):
+        """Send [(ref, payload)] in order, bisecting around rows the backend rejects.
+
+        Rows are marked sent (or dead) as each part lands; a transient failure
+        is raised for the caller to retry.
+        """
+        pk = KINDS[kind][1]
+        try:
+            inserted = send_rows(kind, [p for _, p in items])
+            if len(inserted) != len(items):
+                raise RuntimeError(f"Backend returned {len(inserted)} of {len(items)} rows")
+        except Exception as e:
+            if not rejected(e):
+                raise
+            if len(items) == 1:
+                self._mark_dead(items[0][0], e)
+                return
+            mid = len(items) // 2
+            self._send(kind, items[:mid])
+            self._send(kind, items[mid:])
+            return
+        self._mark_sent([(ref, row.get(pk) if pk else None) for (ref, _), row in zip(items, inserted)])
+
+    def flush_once(self):
+        """Send one batch. Returns the number of rows sent (0 when idle)."""
+        with self._flush_lock:
+            return self._flush_batch()
+
+    def _flush_batch(self):
+        batch = self._next_batch()
+        if not batch:
+            return 0
+        kind = batch[0][1]
+        _, pk, natural = KINDS[kind]
+        items = []
+        for ref, _, payload, _ in batch:
+            try:
+                items.append((ref, self._resolve_refs(json.loads(payload))))
+            except LookupError as e:
+                self._mark_dead(ref, e)
+
+        if items and any(r[3] for r in batch):
+            # A previous attempt may have landed before the connection dropped.
+            existing = find_existing(kind, [p for _, p in items])
+            done, keep = [], []
+            for ref, p in items:
+                hit = existing.get(tuple(p.get(k) for k in natural))
+                if hit is not None:
+                    done.append((ref, hit if pk else None))
+                else:
+                    keep.append((ref, p))
+            self._mark_sent(done)
+            items = keep
+
+        if items:
+            self._send(kind, items)
+        return len(batch)
+
+    def _record_failure(self, batch_ids, err):
+        self.last_error = str(err)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE outbox SET attempts = attempts + 1, last_error = ? "
+                f"WHERE sent_at IS NULL AND dead_at IS NULL AND id IN ({','.join('?' * len(batch_ids))})",
+                (self.last_error, *batch_ids),
+            )
+
+    def _run(self):
+        backoff = 0.5
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                self._wake.wait(timeout=5.0)
+                self._wake.clear()
+                continue
+            try:
+                self.flush_once()
+                self.last_error = None
+                backoff = 0.5
+            except Exception as e:
+                self._record_failure([r[0] for r in batch], e)
+                self._wake.wait(timeout=backoff)
+                self._wake.clear()
+                backoff = min(self.max_backoff, backoff * 2)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="pitch-outbox", daemon=True)
+            self._thread.start()
+        return self
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox():
+    """Return the process-wide outbox with its writer thread running."""
+    global _outbox
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                _outbox = Outbox(os.environ.get("PITCH_OUTBOX_PATH", DEFAULT_PATH)).start()
+    return _outbox
+
+
+class DirectWriter:
+    """Outbox-compatible writer that inserts synchronously (refs are backend IDs)."""
+
+    def enqueue(self, kind, payload):
+        payload = dict(payload)
+        ref = payload.pop("_pitch_ref", None)
+        if ref is not None:
+            payload["PitchID"] = ref
+        row = send_rows(kind, [payload])[0]
+        pk = KINDS[kind][1]
+        return row.get(pk) if pk else None
+
+    def remote_id(self, ref):
+        return ref
+
+    def adopt(self, kind, remote_id):
+        return remote_id
+
+    def cancel(self, ref):
+        return False
+
+    def replace(self, ref, payload):
+        return False
+
+    def pending(self, kind):
+        return []
+
+    def pending_count(self):
+        return 0
+
+    def dead_count(self):
+        return 0
+
+    def dead(self):
+        return []
+
+    def requeue_dead(self):
+        return 0
@@ -0,0 +1,181 @@
+"""Process-wide cache of Players and Games reference data.
+
+Game Setup used to download both tables on every rerun and scan every player
+name on each keystroke. The directories here are shared by all sessions, are
+loaded in keyset-paged chunks, refresh after a TTL, and are kept current by
+core.db write notifications: new players are added to the name index as they
+are created, and any Games write drops the cached game pages. While the
+backend is failing, expired entries keep being served.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from core import db
+
+GRAM = 3
+
+
+def _grams(text):
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class NameIndex:
+    """Case-insensitive substring search over names via a trigram index."""
+
+    def __init__(self):
+        self.names = []
+        self._lower = []
+        self._seen = set()
+        self._postings = defaultdict(list)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name):
+        if not name or name in self._seen:
+            return
+        self._seen.add(name)
+        i = len(self.names)
+        self.names.append(name)
+        low = name.lower()
+        self._lower.append(low)
+        for g in _grams(low):
+            self._postings[g].append(i)
+
+    def search(self, query, limit=5):
+        """Return up to limit names containing query; word-prefix matches first."""
+        q = query.strip().lower()
+        if not q:
+            return []
+        if len(q) < GRAM:
+            # Too short to index; a short query matches early, so stop at limit.
+            hits = []
+            for i, low in enumerate(self._lower):
+                if q in low:
+                    hits.append(i)
+                    if len(hits) >= limit * 4:
+                        break
+        else:
+            lists = sorted((self._postings.get(g, []) for g in _grams(q)), key=len)
+            if not lists[0]:
+                return []
+            candidates = set(lists[0])
+            for lst in lists[1:]:
+                candidates.intersection_update(lst)
+                if not candidates:
+                    return []
+            hits = sorted(i for i in candidates if q in self._lower[i])
+
+        def prefix_rank(i):
+            return 0 if any(w.startswith(q) for w in self._lower[i].split()) else 1
+
+        return [self.names[i] for i in sorted(hits, key=prefix_rank)[:limit]]
+
+
+class PlayerDirectory:
+    def __init__(self, ttl=600, page_size=1000):
+        self.ttl = ttl
+        self.page_size = page_size
+        self._lock = threading.Lock()
+        self._index = NameIndex()
+        self._max_id = 0
+        self._loaded_at = 0.0
+        self._stale = False
+
+    def _pull(self, index, after_id):
+        """Fetch every player with PlayerID > after_id into index; return the max id."""
+        while True:
+            rows = db.players_after(after_id, self.page_size)
+            for r in rows:
+                index.add(r["Name"])
+                after_id = max(after_id, r["PlayerID"])
+            if len(rows) < self.page_size:
+                return after_id
+
+    def _refresh(self):
+        if time.monotonic() - self._loaded_at > self.ttl:
+            # Full reload picks up renames and deletions.
+            index = NameIndex()
+            self._max_id = self._pull(index, 0)
+            self._index = index
+            self._loaded_at = time.monotonic()
+            self._stale = False
+        elif self._stale:
+            self._max_id = self._pull(self._index, self._max_id)
+            self._stale = False
+
+    def search(self, query, limit=5):
+        with self._lock:
+            try:
+                self._refresh()
+            except Exception:
+                if not len(self._index):
+                    raise
+                # Backend down: search the names we already have.
+            return self._index.search(query, limit)
+
+    def invalidate(self):
+        """Pull new players on next use instead of waiting for the TTL."""
+        with self._lock:
+            self._stale = True
+
+    def on_write(self, table, op, rows):
+        if table != "Players":
+            return
+        with self._lock:
+            if op == "insert" and rows and all("Name" in r for r in rows):
+                for r in rows:
+                    self._index.add(r["Name"])
+            elif op in ("update", "delete"):
+                self._loaded_at = 0.0
+            else:
+                self._stale = True
+
+
+class GameDirectory:
+    def __init__(self, ttl=300, page_size=25):
+        self.ttl = ttl
+        self.page_size = page_size
+        self._lock = threading.Lock()
+        self._pages = {}
+
+    def _page(self, after):
+        with self._lock:
+            hit = self._pages.get(after)
+            if hit and time.monotonic() - hit[0] <= self.ttl:
+                return hit[1]
+        try:
+            rows = db.games_page(after, self.page_size)
+        except Exception:
+            if hit:
+                return hit[1]  # backend down: an expired page beats no page
+            raise
+        with self._lock:
+            self._pages[after] = (time.monotonic(), rows)
+        return rows
+
+    def pages(self, n):
+        """Return (games in the first n pages, whether older games exist)."""
+        out, after = [], None
+        for _ in range(n):
+            rows = self._page(after)
+            out += rows
+            if len(rows) < self.page_size:
+                return out, False
+            after = (rows[-1]["GameDate"], rows[-1]["GameID"])
+        return out, True
+
+    def invalidate(self):
+        with self._lock:
+            self._pages.clear()
+
+    def on_write(self, table, op, rows):
+        if table == "Games":
+            self.invalidate()
+
+
+players = PlayerDirectory()
+games = GameDirectory()
+db.on_write(players.on_write)
+db.on_write(games.on_write)
@@ -0,0 +1,84 @@
+"""Reads of the pre-aggregated rollup tables (sql/002_rollups.sql).
+
+Database triggers keep per-game and per-season lines current as pitches,
+at-bats and runner events are written, so a pitcher's season line is one
+primary-key lookup instead of a scan of every pitch. Role is "P" for a
+pitching line and "B" for a batting/running line.
+
+    python -m core.rollups rebuild [--game ID]     # recompute after corrections
+    python -m core.rollups season PLAYER_ID 2025 [--role B]
+"""
+import argparse
+import json
+
+from core import db
+
+
+def _derive(line):
+    if line is None:
+        return None
+    n = line["Pitches"]
+    strikes = line["StrikesCalled"] + line["SwingMiss"] + line["Fouls"] + line["InPlay"]
+    return line | {
+        "Strikes": strikes,
+        "StrikePct": round(100 * strikes / n, 1) if n else None,
+        "AvgVelo": round(line["VeloSum"] / line["VeloN"], 1) if line["VeloN"] else None,
+    }
+
+
+def season_line(player_id, season, role="P"):
+    """Return one player's season totals (plus derived rates), or None."""
+    rows = db.get_backend().select("SeasonLines", where=[
+        ("Season", "eq", int(season)), ("PlayerID", "eq", player_id), ("Role", "eq", role),
+    ], limit=1)
+    return _derive(rows[0] if rows else None)
+
+
+def game_line(game_id, player_id, role="P"):
+    rows = db.get_backend().select("GameLines", where=[
+        ("GameID", "eq", game_id), ("PlayerID", "eq", player_id), ("Role", "eq", role),
+    ], limit=1)
+    return _derive(rows[0] if rows else None)
+
+
+def game_lines(game_id, role=None):
+    """Return every player's line for one game."""
+    where = [("GameID", "eq", game_id)] + ([("Role", "eq", role)] if role else [])
+    return [_derive(r) for r in db.get_backend().select("GameLines", where=where, order=("Role", "PlayerID"))]
+
+
+def pitch_breakdown(game_id, pitcher_id=None):
+    """Pitch counts and velocity sums by (batter, PitchType, PitchCalled) for one game."""
+    where = [("GameID", "eq", game_id)] + ([("PitcherID", "eq", pitcher_id)] if pitcher_id else [])
+    return db.get_backend().select("PitchRollup", where=where)
+
+
+def play_results(game_id, pitcher_id=None):
+    where = [("GameID", "eq", game_id)] + ([("PitcherID", "eq", pitcher_id)] if pitcher_id else [])
+    return db.get_backend().select("PlayResultRollup", where=where)
+
+
+def rebuild(game_id=None):
+    """Recompute the rollups of one game, or of every game; returns the number of games."""
+    return db.get_backend().rpc("rebuild_rollups", {"game_id": game_id})
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rebuild or read the rollup tables.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rb = sub.add_parser("rebuild", help="recompute rollups from Pitches/AtBats/RunnerEvents")
+    rb.add_argument("--game", type=int, help="only this GameID (default: every game)")
+    sl = sub.add_parser("season", help="print one player's season line")
+    sl.add_argument("player_id", type=int)
+    sl.add_argument("season", type=int)
+    sl.add_argument("--role", choices=["P", "B"], default="P")
+    args = ap.parse_args()
+
+    if args.cmd == "rebuild":
+        print(f"Rebuilt rollups for {rebuild(args.game)} game(s).")
+    else:
+        print(json.dumps(season_line(args.player_id, args.season, args.role), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""Game rosters: bulk entry, the persisted GameRoster table and its in-memory index.
+
+Parses a pasted lineup / staff (or an uploaded CSV) and registers every player
+with one batched lookup and one batched insert. Each game's lineup, staff,
+substitutions and pitching changes are stored in GameRoster
+(sql/005_game_roster.sql), so every device tracking the game sees the same
+roster. Roster indexes one game's rows by PlayerID and by name; the
+process-wide cache loads it in one query and drops it on any GameRoster write.
+"""
+import csv
+import io
+import re
+import threading
+import time
+
+from core import db
+
+BATS = {"r": "Right", "right": "Right", "l": "Left", "left": "Left", "s": "Switch", "switch": "Switch",
+        "b": "Switch", "both": "Switch"}
+THROWS = {"r": "Right", "right": "Right", "l": "Left", "left": "Left"}
+
+_ORDER_PREFIX = re.compile(r"^\s*(\d+)\s*[.)]\s*")
+
+
+def _split(line):
+    return [f.strip() for f in re.split(r"[,\t]", line)]
+
+
+def _hand(value, table, what, line_no, errors):
+    if not value:
+        return "Right"
+    hand = table.get(value.strip().lower())
+    if hand is None:
+        errors.append(f"Line {line_no}: unknown {what} '{value}'")
+    return hand or "Right"
+
+
+def parse_lineup(text):
+    """Parse 'Name[, Bats]' lines, optionally prefixed with an order ('1.' or '1,').
+
+    Returns (hitters, errors); hitters have Name, Bats and Order.
+    """
+    hitters, errors = [], []
+    for line_no, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        order = None
+        m = _ORDER_PREFIX.match(line)
+        if m:
+            order, line = int(m.group(1)), line[m.end():]
+        fields = _split(line)
+        if order is None and len(fields) > 1 and fields[0].isdigit():
+            order, fields = int(fields[0]), fields[1:]
+        name = fields[0]
+        if not name:
+            errors.append(f"Line {line_no}: missing name")
+            continue
+        bats = _hand(fields[1] if len(fields) > 1 else "", BATS, "Bats", line_no, errors)
+        hitters.append({"Name": name, "Bats": bats, "Order": order})
+    return _number(hitters, errors)
+
+
+def parse_staff(text):
+    """Parse 'Name[, Throws]' lines. Returns (pitchers, errors)."""
+    pitchers, errors = [], []
+    for line_no, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        fields = _split(line)
+        if not fields[0]:
+            errors.append(f"Line {line_no}: missing name")
+            continue
+        throws = _hand(fields[1] if len(fields) > 1 else "", THROWS, "Throws", line_no, errors)
+        pitchers.append({"Name": fields[0], "Throws": throws})
+    return _dedupe(pitchers, errors, "Pitcher")
+
+
+def parse_roster_csv(data):
+    """Parse a CSV with Role (H/P), Order, Name, Bats, Throws columns.
+
+    Returns (hitters, pitchers, errors).
+    """
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    reader = csv.DictReader(io.StringIO(data))
+    fields = {f.strip().lower(): f for f in reader.fieldnames or []}
+    if "name" not in fields:
+        return [], [], ["CSV needs a Name column"]
+
+    def col(row, name):
+        return (row.get(fields.get(name, ""), "") or "").strip()
+
+    hitters, pitchers, errors = [], [], []
+    for line_no, row in enumerate(reader, 2):
+        name = col(row, "name")
+        if not name:
+            continue
+        role = col(row, "role").lower()[:1] or "h"
+        if role == "p":
+            pitchers.append({"Name": name, "Throws": _hand(col(row, "throws"), THROWS, "Throws", line_no, errors)})
+        else:
+            order = col(row, "order")
+            hitters.append({"Name": name, "Bats": _hand(col(row, "bats"), BATS, "Bats", line_no, errors),
+                            "Order": int(order) if order.isdigit() else None})
+    hitters, h_errors = _number(hitters, errors)
+    pitchers, p_errors = _dedupe(pitchers, [], "Pitcher")
+    return hitters, pitchers, h_errors + p_errors
+
+
+def _dedupe(players, errors, what):
+    seen, out = set(), []
+    for p in players:
+        key = p["Name"].lower()
+        if key in seen:
+            errors.append(f"{what} {p['Name']} listed twice")
+            continue
+        seen.add(key)
+        out.append(p)
+    return out, errors
+
+
+def _number(hitters, errors):
+    """Fill missing batting orders in listed order and sort by Order."""
+    hitters, errors = _dedupe(hitters, errors, "Batter")
+    taken = {h["Order"] for h in hitters if h["Order"] is not None}
+    nxt = 1
+    for h in hitters:
+        if h["Order"] is None:
+            while nxt in taken:
+                nxt += 1
+            h["Order"] = nxt
+            taken.add(nxt)
+    if len(taken) != len(hitters):
+        errors.append("Two batters share a batting order slot")
+    return sorted(hitters, key=lambda h: h["Order"]), errors
+
+
+def register_roster(game_id, hitters, pitchers):
+    """Create/resolve all players in one pass and store them as the game's roster.
+
+    Sets the game's active hitters if any are given and its active staff if
+    any are given; players no longer listed stay on file as inactive rows.
+    Returns the game's Roster.
+    """
+    ids = db.ensure_players(
+        [{"Name": h["Name"], "Bats": h["Bats"]} for h in hitters]
+        + [{"Name": p["Name"], "Throws": p["Throws"]} for p in pitchers]
+    )
+    game_id = int(game_id)
+    if hitters:
+        db.replace_roster(game_id, "H", [{"GameID": game_id, "PlayerID": ids[h["Name"]], "Role": "H",
+                                          "BatOrder": h["Order"]} for h in hitters])
+    if pitchers:
+        db.replace_roster(game_id, "P", [{"GameID": game_id, "PlayerID": ids[p["Name"]], "Role": "P"}
+                                         for p in pitchers])
+    return cache.get(game_id)
+
+
+class Roster:
+    """One game's GameRoster rows, indexed by PlayerID, by name and by batting slot.
+
+    Entries are dicts with RosterID, PlayerID, Name, Role ("H"/"P"), Order,
+    Bats, Throws, Active, EnteredInning and ExitedInning. lineup is the active
+    hitters in batting order, pitchers the active staff in the order it was
+    entered.
+    A Roster is a snapshot: change the game's roster with the functions below
+    and fetch it again from the cache.
+    """
+
+    def __init__(self, game_id, rows=()):
+        self.game_id = int(game_id)
+        self.entries = []
+        self._by_id = {}
+        self._by_name = {}
+        self._slots = {}
+        for r in rows:
+            p = r.get("player") or {}
+            e = {
+                "RosterID": r.get("RosterID"),
+                "PlayerID": r["PlayerID"],
+                "Name": p.get("Name") or "Unknown",
+                "Role": r["Role"],
+                "Order": r.get("BatOrder"),
+                "Bats": p.get("Bats"),
+                "Throws": p.get("Throws"),
+                "Active": r.get("Active", True) is not False,
+                "EnteredInning": r.get("EnteredInning"),
+                "ExitedInning": r.get("ExitedInning"),
+            }
+            self.entries.append(e)
+            self._by_id.setdefault(e["PlayerID"], e)
+            key = (e["Role"], e["Name"].lower())
+            if key not in self._by_name or e["Active"] and not self._by_name[key]["Active"]:
+                self._by_name[key] = e
+            if e["Role"] == "H" and e["Active"]:
+                self._slots[e["Order"]] = e
+        self.lineup = sorted(self._slots.values(), key=lambda e: (e["Order"] is None, e["Order"] or 0))
+        self.pitchers = [e for e in self.entries if e["Role"] == "P" and e["Active"]]
+        on_mound = [e for e in self.pitchers if e["EnteredInning"] is not None and e["ExitedInning"] is None]
+        self.current_pitcher = max(on_mound, key=lambda e: (e["EnteredInning"], e["RosterID"] or 0), default=None)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, player_id):
+        return self._by_id.get(player_id)
+
+    def find(self, name, role):
+        """Return the role ("H"/"P") entry for name (case-insensitive), preferring an active row, or None."""
+        return self._by_name.get((role, str(name).strip().lower()))
+
+    def name(self, player_id, default="Unknown"):
+        e = self._by_id.get(player_id)
+        return e["Name"] if e else default
+
+    def slot(self, order):
+        """Return the active hitter batting in slot order, or None."""
+        return self._slots.get(order)
+
+    def players(self):
+        """Active hitters then the staff, each player once."""
+        seen, out = set(), []
+        for e in self.lineup + self.pitchers:
+            if e["PlayerID"] not in seen:
+                seen.add(e["PlayerID"])
+                out.append(e)
+        return out
+
+
+def add_player(game_id, player_id, role, order=None):
+    """Put a player on the game's roster as a hitter in slot order ("H") or on the staff ("P")."""
+    row = {"GameID": int(game_id), "PlayerID": int(player_id), "Role": role, "Active": True}
+    if role == "H":
+        row["BatOrder"] = order
+    return db.upsert_roster([row])
+
+
+def remove_player(entry):
+    return db.delete_roster(entry["RosterID"])
+
+
+def _row(roster, e, **changes):
+    return {"GameID": roster.game_id, "PlayerID": e["PlayerID"], "Role": e["Role"], "BatOrder": e["Order"],
+            "Active": e["Active"], "EnteredInning": e["EnteredInning"], "ExitedInning": e["ExitedInning"],
+            **changes}
+
+
+def substitute(roster, order, player_id, inning):
+    """Send player_id in to bat in slot order from inning on, replacing the slot's hitter.
+
+    Both rows go out in one upsert. Returns False if player_id already bats there.
+    """
+    out = roster.slot(order)
+    if out is not None and out["PlayerID"] == player_id:
+        return False
+    sub = {"PlayerID": int(player_id), "Role": "H", "Order": int(order), "Active": True,
+           "EnteredInning": int(inning), "ExitedInning": None}
+    rows = [_row(roster, sub)]
+    if out is not None:
+        rows.insert(0, _row(roster, out, Active=False, ExitedInning=int(inning)))
+    db.upsert_roster(rows)
+    return True
+
+
+def pitching_change(roster, player_id, inning):
+    """Record player_id taking the mound in inning; the current pitcher comes out.
+
+    Both rows go out in one upsert. Returns False if player_id is already pitching.
+    """
+    current = roster.current_pitcher
+    if current is not None and current["PlayerID"] == player_id:
+        return False
+    new = {"PlayerID": int(player_id), "Role": "P", "Order": None, "Active": True,
+           "EnteredInning": int(inning), "ExitedInning": None}
+    rows = [_row(roster, new)]
+    if current is not None:
+        rows.insert(0, _row(roster, current, ExitedInning=int(inning)))
+    db.upsert_roster(rows)
+    return True
+
+
+class RosterCache:
+    """Rosters by GameID, shared by every session in the process.
+
+    A game's roster is loaded in one query on first use and again after the
+    TTL, which is how changes made on another server show up; writes through
+    this process drop it at once. While the backend is failing the last copy
+    keeps being served.
+    """
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._rosters = {}
+
+    def get(self, game_id):
+        game_id = int(game_id)
+        with self._lock:
+            hit = self._rosters.get(game_id)
+        if hit and time.monotonic() - hit[0] <= self.ttl:
+            return hit[1]
+        try:
+            roster = Roster(game_id, db.game_roster(game_id))
+        except Exception:
+            if hit:
+                return hit[1]
+            raise
+        with self._lock:
+            self._rosters[game_id] = (time.monotonic(), roster)
+        return roster
+
+    def invalidate(self, game_id=None):
+        with self._lock:
+            if game_id is None:
+                self._rosters.clear()
+            else:
+                self._rosters.pop(int(game_id), None)
+
+    def on_write(self, table, op, rows):
+        if table != "GameRoster":
+            return
+        games = {r.get("GameID") for r in rows or ()}
+        if not games or None in games:
+            self.invalidate()
+        for game_id in games - {None}:
+            self.invalidate(game_id)
+
+
+cache = RosterCache()
+db.on_write(cache.on_write)
@@ -0,0 +1,322 @@
+"""Batch scouting reports for every hitter and pitcher on an opposing team.
+
+One bulk pass reads the players' at-bats with their pitches embedded (one
+paged select per role), then a process pool builds and writes one report per
+player and role:
+
+- pitch mix by count (the count before each pitch)
+- swing, whiff, chase and zone rates from PitchCalled and Zone
+- batted-ball profile from TaggedHit and HitDirection
+- PlayResult outcomes and a slash line from AtBats
+
+Reports are static HTML (or CSV) files in the output directory, with an
+index. manifest.json records a hash of each report's input rows, so players
+whose data has not changed since the last run are skipped, and reports of
+players no longer in the batch are removed.
+
+    python -m core.scouting --team Tigers --out scouting/
+    python -m core.scouting --game 12 --game 13 --format csv --workers 8
+"""
+import argparse
+import csv
+import hashlib
+import html
+import io
+import json
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from core import db
+
+REPORT_VERSION = 1  # bump when the report contents change, to rebuild every file
+MANIFEST = "manifest.json"
+ROLES = {"Hitter": "BatterID", "Pitcher": "PitcherID"}
+COLUMNS = ("AtBatID, GameID, BatterID, PitcherID, PlayResult, RunsScored, "
+           "Pitches(PitchID, PitchOfAB, PitchType, PitchCalled, Balls, Strikes, Zone, TaggedHit, HitDirection)")
+
+SWINGS = ("Strike Swing Miss", "Foul Ball", "In Play")
+OUT_OF_ZONE = range(11, 15)
+COUNTS = tuple(f"{b}-{s}" for b in range(4) for s in range(3))
+HITS = ("1B", "2B", "3B", "HR")
+WALKS = ("Walk", "Intentional Walk")
+NOT_AT_BATS = WALKS + ("HitByPitch", "SAC", "SACFly")
+
+
+def _pct(n, d):
+    return round(100 * n / d, 1) if d else None
+
+
+def _rate(n, d):
+    return f"{n / d:.3f}".lstrip("0") if d else None
+
+
+# -----------------------------
+# Report contents
+# -----------------------------
+def build_report(player, role, atbats):
+    """Return the report dict for one player in one role from their at-bats (with Pitches)."""
+    pitches = []
+    for ab in atbats:
+        balls = strikes = 0
+        for p in sorted(ab.get("Pitches") or [], key=lambda p: (p.get("PitchOfAB") or 0, p["PitchID"])):
+            pitches.append({**p, "count": f"{min(balls, 3)}-{min(strikes, 2)}"})
+            balls, strikes = p.get("Balls") or 0, p.get("Strikes") or 0
+
+    types = [t for t, _ in Counter(p.get("PitchType") or "Unknown" for p in pitches).most_common()]
+    by_count = {c: Counter() for c in COUNTS}
+    for p in pitches:
+        by_count[p["count"]][p.get("PitchType") or "Unknown"] += 1
+    mix = []
+    for c in COUNTS:
+        n = sum(by_count[c].values())
+        if n:
+            mix.append({"Count": c, "Pitches": n, **{t: _pct(by_count[c][t], n) for t in types}})
+
+    calls = Counter(p.get("PitchCalled") for p in pitches)
+    swings = sum(calls[c] for c in SWINGS)
+    zoned = [p for p in pitches if p.get("Zone")]
+    outside = [p for p in zoned if p["Zone"] in OUT_OF_ZONE]
+    inside = [p for p in zoned if p["Zone"] not in OUT_OF_ZONE]
+    rates = {
+        "Pitches": len(pitches),
+        "Swing %": _pct(swings, len(pitches)),
+        "Whiff %": _pct(calls["Strike Swing Miss"], swings),
+        "Chase %": _pct(sum(p.get("PitchCalled") in SWINGS for p in outside), len(outside)),
+        "Zone swing %": _pct(sum(p.get("PitchCalled") in SWINGS for p in inside), len(inside)),
+        "Zone %": _pct(len(inside), len(zoned)),
+        "Called strike %": _pct(calls["Strike Called"], len(pitches)),
+        "Foul %": _pct(calls["Foul Ball"], len(pitches)),
+        "In play %": _pct(calls["In Play"], len(pitches)),
+    }
+
+    in_play = [p for p in pitches if p.get("PitchCalled") == "In Play"]
+    batted = {}
+    for col in ("TaggedHit", "HitDirection"):
+        seen = Counter(p.get(col) or "Not recorded" for p in in_play)
+        batted[col] = [{col: k, "Balls in play": n, "%": _pct(n, len(in_play))} for k, n in seen.most_common()]
+
+    results = Counter(ab["PlayResult"] for ab in atbats if ab.get("PlayResult"))
+    pa = sum(results.values())
+    hits = sum(results[r] for r in HITS)
+    at_bats = pa - sum(results[r] for r in NOT_AT_BATS)
+    on_base = hits + sum(results[r] for r in WALKS) + results["HitByPitch"]
+    bases = sum((i + 1) * results[r] for i, r in enumerate(HITS))
+    outcomes = {
+        "PA": pa, "H": hits, "BB": sum(results[r] for r in WALKS),
+        "K": results["Strikeout Looking"] + results["Strikeout Swinging"], "HR": results["HR"],
+        "AVG": _rate(hits, at_bats),
+        "OBP": _rate(on_base, at_bats + sum(results[r] for r in WALKS) + results["HitByPitch"] + results["SACFly"]),
+        "SLG": _rate(bases, at_bats),
+        "Runs": sum(ab.get("RunsScored") or 0 for ab in atbats),
+    }
+    return {
+        "player_id": player["PlayerID"], "name": player["Name"], "role": role,
+        "team": player.get("Team"), "games": len({ab["GameID"] for ab in atbats}),
+        "rates": rates, "outcomes": outcomes, "mix": mix, "mix_columns": ["Count", "Pitches", *types],
+        "batted": batted,
+        "results": [{"PlayResult": r, "N": n, "%": _pct(n, pa)} for r, n in results.most_common()],
+    }
+
+
+# -----------------------------
+# Rendering
+# -----------------------------
+def _table(rows, columns=None):
+    columns = columns or (list(rows[0]) if rows else [])
+    if not rows:
+        return "<p class='none'>None recorded.</p>"
+
+    def cell(v):
+        return "" if v is None else html.escape(str(v))
+
+    head = "".join(f"<th>{cell(c)}</th>" for c in columns)
+    body = "".join("<tr>" + "".join(f"<td>{cell(r.get(c))}</td>" for c in columns) + "</tr>" for r in rows)
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+
+_STYLE = ("body{font-family:sans-serif;margin:2em;color:#222}table{border-collapse:collapse;margin:.5em 0 1.5em}"
+          "th,td{border:1px solid #ccc;padding:3px 8px;text-align:right}th:first-child,td:first-child{text-align:left}"
+          "th{background:#f3f3f3}.none{color:#888}")
+
+
+def render_html(r):
+    title = f"{r['name']} — {r['role']}"
+    who = "Opponents" if r["role"] == "Pitcher" else "Results"
+    return "".join([
+        f"<!doctype html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title>",
+        f"<style>{_STYLE}</style></head><body><h1>{html.escape(title)}</h1>",
+        f"<p>{html.escape(r['team'] or '')} · {r['games']} games · {r['rates']['Pitches']} pitches</p>",
+        f"<h2>{who}</h2>", _table([r["outcomes"]]),
+        "<h2>Plate discipline</h2>", _table([r["rates"]]),
+        "<h2>Pitch mix by count (%)</h2>", _table(r["mix"], r["mix_columns"]),
+        "<h2>Batted balls</h2>", _table(r["batted"]["TaggedHit"]), _table(r["batted"]["HitDirection"]),
+        "<h2>Play results</h2>", _table(r["results"]),
+        "</body></html>\n",
+    ])
+
+
+def render_csv(r):
+    """One long table: section, label, metric, value."""
+    out = io.StringIO()
+    w = csv.writer(out)
+    w.writerow(["Section", "Label", "Metric", "Value"])
+    for k, v in r["outcomes"].items():
+        w.writerow(["Outcomes", "", k, v])
+    for k, v in r["rates"].items():
+        w.writerow(["Plate discipline", "", k, v])
+    for row in r["mix"]:
+        for k in r["mix_columns"][1:]:
+            w.writerow(["Pitch mix by count", row["Count"], k, row.get(k)])
+    for col, rows in r["batted"].items():
+        for row in rows:
+            w.writerow([col, row[col], "Balls in play", row["Balls in play"]])
+            w.writerow([col, row[col], "%", row["%"]])
+    for row in r["results"]:
+        w.writerow(["Play results", row["PlayResult"], "N", row["N"]])
+    return out.getvalue()
+
+
+def _build(job):
+    """Worker: build, render and write one report; return (key, summary)."""
+    player, role, atbats, path = job
+    r = build_report(player, role, atbats)
+    text = render_csv(r) if path.endswith(".csv") else render_html(r)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    return (f"{role}:{player['PlayerID']}",
+            {"name": r["name"], "role": role, "pa": r["outcomes"]["PA"], "pitches": r["rates"]["Pitches"]})
+
+
+# -----------------------------
+# Batch
+# -----------------------------
+def _slug(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "player"
+
+
+def fingerprint(player, role, atbats, fmt):
+    """Hash of everything a report is built from; embedded pitches are sorted so row order does not matter."""
+    rows = sorted(({**ab, "Pitches": sorted(ab.get("Pitches") or [], key=lambda p: p["PitchID"])} for ab in atbats),
+                  key=lambda ab: ab["AtBatID"])
+    blob = json.dumps([REPORT_VERSION, fmt, role, player["Name"], player.get("Team"), rows],
+                      sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+
+def fetch(players):
+    """Return {(role, PlayerID): at-bats} for players, one bulk select per role."""
+    ids = [p["PlayerID"] for p in players]
+    data = {}
+    for role, col in ROLES.items():
+        for ab in db.player_atbats(ids, col, COLUMNS):
+            data.setdefault((role, ab[col]), []).append(ab)
+    return data
+
+
+def generate(players, out_dir, fmt="html", workers=None, force=False):
+    """Write a report for every player with data in each role; return a summary dict.
+
+    players are dicts with PlayerID, Name and optionally Team.
+    """
+    if fmt not in ("html", "csv"):
+        raise ValueError(f"Unknown report format: {fmt}")
+    t0 = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    data = fetch(players)
+    jobs, entries = [], {}
+    for p in players:
+        for role in ROLES:
+            atbats = data.get((role, p["PlayerID"]))
+            if not atbats:
+                continue
+            key = f"{role}:{p['PlayerID']}"
+            file = f"{role.lower()}_{p['PlayerID']}_{_slug(p['Name'])}.{fmt}"
+            digest = fingerprint(p, role, atbats, fmt)
+            old = manifest.get(key)
+            if (not force and old and old["hash"] == digest and old["file"] == file
+                    and os.path.exists(os.path.join(out_dir, file))):
+                entries[key] = old
+                continue
+            entries[key] = {"hash": digest, "file": file}
+            jobs.append((p, role, atbats, os.path.join(out_dir, file)))
+
+    if jobs:
+        chunk = max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(workers) as pool:
+            for key, summary in pool.map(_build, jobs, chunksize=chunk):
+                entries[key].update(summary)
+
+    # Drop files of players that are no longer in the batch.
+    current = {e["file"] for e in entries.values()}
+    for old in manifest.values():
+        if old.get("file") not in current:
+            try:
+                os.remove(os.path.join(out_dir, old["file"]))
+            except OSError:
+                pass
+    with open(manifest_path, "w") as f:
+        json.dump(entries, f, indent=1, sort_keys=True)
+    _write_index(out_dir, entries, fmt)
+    return {"reports": len(entries), "built": len(jobs), "skipped": len(entries) - len(jobs),
+            "seconds": round(time.perf_counter() - t0, 3)}
+
+
+def _write_index(out_dir, entries, fmt):
+    rows = sorted(entries.values(), key=lambda e: (e["role"], e["name"]))
+    if fmt == "csv":
+        with open(os.path.join(out_dir, "index.csv"), "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["Role", "Name", "PA", "Pitches", "File"])
+            w.writerows([e["role"], e["name"], e["pa"], e["pitches"], e["file"]] for e in rows)
+        return
+    items = "".join(f"<tr><td>{e['role']}</td><td><a href='{html.escape(e['file'])}'>{html.escape(e['name'])}</a>"
+                    f"</td><td>{e['pa']}</td><td>{e['pitches']}</td></tr>" for e in rows)
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(f"<!doctype html><html><head><meta charset='utf-8'><title>Scouting reports</title>"
+                f"<style>{_STYLE}</style></head><body><h1>Scouting reports</h1><table><thead><tr><th>Role</th>"
+                f"<th>Name</th><th>PA</th><th>Pitches</th></tr></thead><tbody>{items}</tbody></table></body></html>\n")
+
+
+def select_players(team=None, game_ids=(), player_ids=()):
+    """Return the players on team, in any of game_ids, or listed by id."""
+    players = {p["PlayerID"]: p for p in db.team_players(team)} if team else {}
+    ids = set(player_ids)
+    if game_ids:
+        for ab in db.game_atbats(game_ids, "BatterID, PitcherID"):
+            ids.update(ab.values())
+    ids -= set(players) | {None}
+    players.update({pid: {"PlayerID": pid, "Name": name} for pid, name in db.player_names(ids).items()})
+    return sorted(players.values(), key=lambda p: p["PlayerID"])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Write scouting reports for a team's hitters and pitchers.")
+    ap.add_argument("--team", help="every player whose Players.Team is this")
+    ap.add_argument("--game", type=int, action="append", default=[], help="every player in this GameID")
+    ap.add_argument("--player", type=int, action="append", default=[], help="one PlayerID")
+    ap.add_argument("--format", choices=["html", "csv"], default="html")
+    ap.add_argument("--out", default="scouting", help="output directory")
+    ap.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    ap.add_argument("--force", action="store_true", help="rebuild reports whose data has not changed")
+    args = ap.parse_args()
+    if not (args.team or args.game or args.player):
+        ap.error("give --team, --game or --player")
+
+    players = select_players(args.team, args.game, args.player)
+    r = generate(players, args.out, args.format, args.workers, args.force)
+    print(f"{r['reports']} reports for {len(players)} players ({r['built']} built, {r['skipped']} unchanged) "
+          f"in {r['seconds']} s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Push a local SQLite tracking database to the remote backend.
+
+    python -m core.sync pitch_tracker.sqlite3
+
+Rows are sent parent-first (Players, Games, AtBats, Pitches, RunnerEvents,
+GameRoster) with foreign keys rewritten to the remote IDs. A SyncMap table in
+the local file remembers each row's remote ID and content hash, so running
+the sync again only inserts new rows and updates rows that changed locally
+(e.g. an at-bat finished after the last sync). Players are matched by Name.
+Pitches get fresh PitchNo values reserved from the remote counter, since
+local numbers would collide with other devices. Local deletions are not
+propagated.
+"""
+import argparse
+import hashlib
+import json
+import os
+
+from core.backends import PRIMARY_KEYS
+
+ORDER = ("Players", "Games", "AtBats", "Pitches", "RunnerEvents", "GameRoster")
+FOREIGN_KEYS = {
+    "AtBats": {"GameID": "Games", "BatterID": "Players", "PitcherID": "Players"},
+    "Pitches": {"AtBatID": "AtBats"},
+    "RunnerEvents": {"PitchID": "Pitches", "RunnerID": "Players"},
+    "GameRoster": {"GameID": "Games", "PlayerID": "Players"},
+}
+
+_MAP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS "SyncMap" (
+    tbl TEXT NOT NULL,
+    local_id INTEGER NOT NULL,
+    remote_id INTEGER NOT NULL,
+    row_hash TEXT NOT NULL,
+    PRIMARY KEY (tbl, local_id)
+);
+"""
+
+
+def _hash(row):
+    return hashlib.sha1(json.dumps(row, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _local_rows(local, table, page=1000):
+    pk, after = PRIMARY_KEYS[table], 0
+    while True:
+        rows = local.select(table, where=[(pk, "gt", after)], order=(pk,), limit=page)
+        yield from rows
+        if len(rows) < page:
+            return
+        after = rows[-1][pk]
+
+
+def sync(local, remote, chunk=500):
+    """Push local rows to remote; return {table: {"inserted": n, "updated": n}}."""
+    local.conn.executescript(_MAP_SCHEMA)
+    ids = {t: {} for t in ORDER}
+    hashes = {t: {} for t in ORDER}
+    for tbl, lid, rid, h in local.conn.execute("SELECT tbl, local_id, remote_id, row_hash FROM SyncMap"):
+        ids[tbl][lid] = rid
+        hashes[tbl][lid] = h
+
+    report = {}
+    for table in ORDER:
+        pk = PRIMARY_KEYS[table]
+        fks = FOREIGN_KEYS.get(table, {})
+        new, changed = [], []
+        for row in _local_rows(local, table):
+            lid = row.pop(pk)
+            row.pop("PitchNo", None)
+            for col, parent in fks.items():
+                if row.get(col) is not None:
+                    row[col] = ids[parent][row[col]]
+            h = _hash(row)
+            if lid not in ids[table]:
+                new.append((lid, row, h))
+            elif hashes[table][lid] != h:
+                changed.append((lid, row, h))
+
+        if table == "Players" and new:
+            names = [r["Name"] for _, r, _ in new]
+            found = {}
+            for part in _chunks(names, 200):
+                for r in remote.select("Players", "PlayerID, Name", where=[("Name", "in", part)]):
+                    found.setdefault(r["Name"], r["PlayerID"])
+            matched = [(lid, found[r["Name"]], h) for lid, r, h in new if r["Name"] in found]
+            new = [n for n in new if n[1]["Name"] not in found]
+        else:
+            matched = []
+
+        if table == "Pitches" and new:
+            first = int(remote.rpc("reserve_pitch_numbers", {"n": len(new)}))
+            for i, (_, row, _) in enumerate(new):
+                row["PitchNo"] = first + i
+
+        done = list(matched)
+        for part in _chunks(new, chunk):
+            inserted = remote.insert(table, [r for _, r, _ in part])
+            done += [(lid, rrow[pk], h) for (lid, _, h), rrow in zip(part, inserted)]
+        for lid, row, h in changed:
+            remote.update(table, row, where=[(pk, "eq", ids[table][lid])])
+            done.append((lid, ids[table][lid], h))
+
+        local.conn.executemany(
+            "INSERT OR REPLACE INTO SyncMap (tbl, local_id, remote_id, row_hash) VALUES (?, ?, ?, ?)",
+            [(table, lid, rid, h) for lid, rid, h in done],
+        )
+        for lid, rid, _ in done:
+            ids[table][lid] = rid
+        report[table] = {"inserted": len(new) + len(matched), "updated": len(changed)}
+    return report
+
+
+def main():
+    from core.backends import get_backend
+    from core.backends.sqlite_backend import SQLiteBackend
+
+    ap = argparse.ArgumentParser(description="Push a local tracking database to the remote backend.")
+    ap.add_argument("local_db")
+    args = ap.parse_args()
+    os.environ.setdefault("PITCH_TRACKER_BACKEND", "supabase")
+    report = sync(SQLiteBackend(args.local_db), get_backend())
+    for table, counts in report.items():
+        print(f"{table}: {counts['inserted']} inserted, {counts['updated']} updated")
+
+
+if __name__ == "__main__":
+    main()
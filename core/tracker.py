@@ -0,0 +1,315 @@
+"""Tracker play logic, independent of Streamlit.
+
+Every function takes the session state (st.session_state or a plain dict with
+the same keys) so the Tracker page, the benchmarks and the load tests all run
+exactly the same code per play. Pitch and runner-event writes go through a
+writer with the Outbox interface (enqueue / remote_id).
+"""
+from core import db, roster
+from core.counts import apply_call, compute_wel, recount_tail
+from core.numbering import PitchNumbers
+
+EVENT_LOG_LIMIT = 500  # newest lines kept for the Running Summary
+
+DEFAULTS = {
+    "roster": None,             # the selected game's roster.Roster (load_roster)
+    "selected_game_id": None,
+    "current_batter_id": None,
+    "current_pitcher_id": None,
+    "current_atbat_id": None,
+    "balls": 0,
+    "strikes": 0,
+    "pitch_history": [],        # outbox refs of this at-bat's pitches
+    "atbat_pitches": [],        # this at-bat's pitch payloads plus "ref" and their "log" lines
+    "last_pitch_summary": None,
+    "last_saved_pitch_id": None,  # outbox ref of the last pitch
+    "event_log": []
+}
+
+
+def init_state(state):
+    """Fill in any missing session keys (fresh lists, never shared defaults)."""
+    for k, v in DEFAULTS.items():
+        if k not in state:
+            state[k] = list(v) if isinstance(v, list) else v
+    if "pitch_numbers" not in state:
+        state["pitch_numbers"] = PitchNumbers(db.reserve_pitch_numbers)
+    return state
+
+
+def add_to_summary(state, line: str):
+    state["event_log"].insert(0, line)
+    del state["event_log"][EVENT_LOG_LIMIT:]
+
+
+def load_roster(state):
+    """Set state["roster"] to the selected game's Roster from the shared cache and return it."""
+    state["roster"] = roster.cache.get(state["selected_game_id"])
+    return state["roster"]
+
+
+def player_name(state, player_id, default="Unknown"):
+    game_roster = state.get("roster")
+    return game_roster.name(player_id, default) if game_roster is not None else default
+
+
+def reset_atbat(state):
+    state["current_atbat_id"] = None
+    state["balls"] = 0
+    state["strikes"] = 0
+    state["pitch_history"] = []
+    state["atbat_pitches"] = []
+    state["last_pitch_summary"] = None
+    state["last_saved_pitch_id"] = None
+
+
+def start_atbat(state, inning, leadoff=None):
+    """Create an AtBat for the selected batter/pitcher and make it current.
+
+    A pitcher other than the one on the roster's mound is recorded as a
+    pitching change first. Returns the new AtBatID, or None if the backend
+    returned nothing.
+    """
+    game_roster = state.get("roster")
+    if game_roster is not None and roster.pitching_change(game_roster, state["current_pitcher_id"], inning):
+        load_roster(state)
+    atbat_id = db.create_atbat(state["selected_game_id"], state["current_batter_id"],
+                               state["current_pitcher_id"], inning, leadoff=bool(leadoff))
+    if atbat_id:
+        reset_atbat(state)
+        state["current_atbat_id"] = atbat_id
+        state["pitch_numbers"].start_atbat(atbat_id)
+    return atbat_id
+
+
+def ensure_numbers(state):
+    """Make sure the pitch counter belongs to the current at-bat."""
+    numbers = state["pitch_numbers"]
+    atbat_id = state["current_atbat_id"]
+    if numbers.atbat_id != atbat_id:
+        numbers.start_atbat(atbat_id, db.last_pitch_of_ab(atbat_id))
+    return numbers
+
+
+def runner_event_payload(runner_id, start_base, end_base, event_type, out_recorded):
+    return {
+        "RunnerID": runner_id,
+        "StartBase": int(start_base),
+        "EndBase": None if end_base == 0 else int(end_base),
+        "EventType": event_type,
+        "OutRecorded": bool(out_recorded),
+    }
+
+
+def _runner_line(runner_name, payload):
+    end = payload["EndBase"]
+    return (f"Runner {runner_name}: {payload['EventType']} | {payload['StartBase']}→{end if end else '-'} | "
+            f"Out={payload['OutRecorded']}")
+
+
+def _pitch_line(batter_name, p):
+    return (f"{batter_name}: {p.get('PitchType')} {p.get('Velocity') or 0.0} — {p.get('PitchCalled')} "
+            f"({p.get('Balls')}-{p.get('Strikes')})")
+
+
+def submit_pitch(state, writer, pitch_type, called, velocity=0.0, zone=None,
+                 tagged=None, hitdir=None, kpi=None, runner_events=()):
+    """Advance the count and queue the pitch; return its writer ref.
+
+    runner_events are (runner_name, runner_event_payload(...)) pairs for
+    things that happened on this pitch; they are written in the same call as
+    the pitch.
+    """
+    atbat_id = state["current_atbat_id"]
+    state["balls"], state["strikes"] = apply_call(state["balls"], state["strikes"], called)
+    wel = compute_wel(state["balls"], state["strikes"])
+
+    pitch_no, pitch_of_ab = ensure_numbers(state).take()
+    payload = db.pitch_payload(atbat_id, pitch_no, pitch_of_ab, pitch_type, velocity, zone, called,
+                               state["balls"], state["strikes"], wel, tagged, hitdir, kpi)
+    if runner_events:
+        payload["RunnerEvents"] = [ev for _, ev in runner_events]
+    ref = writer.enqueue("pitch", payload)
+    state["pitch_history"].append(ref)
+    state["last_saved_pitch_id"] = ref
+    batter_name = player_name(state, state["current_batter_id"])
+    lines = [_pitch_line(batter_name, payload)] + [_runner_line(name, ev) for name, ev in runner_events]
+    for line in lines:
+        add_to_summary(state, line)
+    state["atbat_pitches"].append({**payload, "ref": ref, "log": lines})
+    return ref
+
+
+def save_runner_event(state, writer, runner_name, runner_id, start_base, end_base, event_type, out_recorded):
+    """Queue a runner event against the last logged pitch; return its writer ref."""
+    payload = {"_pitch_ref": state["last_saved_pitch_id"],
+               **runner_event_payload(runner_id, start_base, end_base, event_type, out_recorded)}
+    ref = writer.enqueue("runner_event", payload)
+    line = _runner_line(runner_name, payload)
+    add_to_summary(state, line)
+    for p in state["atbat_pitches"]:
+        if p["ref"] == payload["_pitch_ref"]:
+            p["log"].append(line)
+    return ref
+
+
+# -----------------------------
+# Corrections
+# -----------------------------
+EDITABLE = ("PitchType", "Velocity", "Zone", "PitchCalled", "TaggedHit", "HitDirection", "KPI")
+_PITCH_COLUMNS = ("AtBatID", "PitchNo", "PitchOfAB", "PitchType", "Velocity", "Zone", "PitchCalled", "WEL",
+                  "Balls", "Strikes", "TaggedHit", "HitDirection", "KPI")
+
+
+def _drop_log_line(state, line):
+    if line in state["event_log"]:
+        state["event_log"].remove(line)
+
+
+def _sync_count(state):
+    last = state["atbat_pitches"][-1] if state["atbat_pitches"] else {}
+    state["balls"], state["strikes"] = last.get("Balls") or 0, last.get("Strikes") or 0
+
+
+def undo_last_pitch(state, writer):
+    """Remove the current at-bat's last pitch and its runner events; return the removed entry.
+
+    A pitch still queued is dropped from the writer's queue; one already
+    saved is deleted. The count, PitchOfAB counter and event log step back
+    with it. Returns None when the at-bat has no pitches.
+    """
+    pitches = state["atbat_pitches"]
+    if not pitches:
+        return None
+    last = pitches[-1]
+    if not writer.cancel(last["ref"]):
+        db.delete_pitch(writer.remote_id(last["ref"]))
+    pitches.pop()
+    state["pitch_history"] = [p["ref"] for p in pitches]
+    state["last_saved_pitch_id"] = state["pitch_history"][-1] if pitches else None
+    _sync_count(state)
+    state["pitch_numbers"].start_atbat(state["current_atbat_id"], (last.get("PitchOfAB") or 1) - 1)
+    for line in last["log"]:
+        _drop_log_line(state, line)
+    return last
+
+
+def edit_pitch(state, writer, index, **changes):
+    """Change EDITABLE fields of the current at-bat's pitch at index.
+
+    A changed PitchCalled recounts Balls/Strikes/WEL from that pitch to the
+    end of the at-bat. Queued pitches are rewritten in the writer's queue;
+    saved ones go back in one batched upsert. Returns the number of pitches
+    rewritten.
+    """
+    unknown = set(changes) - set(EDITABLE)
+    if unknown:
+        raise ValueError(f"Not editable: {', '.join(sorted(unknown))}")
+    pitches = state["atbat_pitches"]
+    pitches[index].update(changes)
+    touched = {index}
+    if "PitchCalled" in changes:
+        touched.update(recount_tail(pitches, index))
+
+    batter_name = player_name(state, state["current_batter_id"])
+    rows = []
+    for i in sorted(touched):
+        p = pitches[i]
+        row = {c: p.get(c) for c in _PITCH_COLUMNS}
+        if not writer.replace(p["ref"], {k: v for k, v in row.items() if v is not None}):
+            rows.append({"PitchID": writer.remote_id(p["ref"]), **row})
+        old_line, p["log"][0] = p["log"][0], _pitch_line(batter_name, p)
+        if old_line in state["event_log"]:
+            state["event_log"][state["event_log"].index(old_line)] = p["log"][0]
+    if rows:
+        db.update_pitches(rows)
+    _sync_count(state)
+    return len(touched)
+
+
+def finish_atbat(state, play_result=None, runs=0, earned=0, leadoff_on=None):
+    """Record the at-bat result and close it. Returns False if nothing was updated."""
+    updates = {"RunsScored": int(runs), "EarnedRuns": int(earned)}
+    if play_result:
+        updates["PlayResult"] = play_result
+    if leadoff_on is not None:
+        updates["LeadOffOn"] = bool(leadoff_on)
+    if not db.update_atbat(state["current_atbat_id"], updates):
+        return False
+    add_to_summary(state, f"AtBat finished: {updates.get('PlayResult','Result')} | Runs {updates['RunsScored']} ER {updates['EarnedRuns']}")
+    reset_atbat(state)
+    return True
+
+
+def restore(state, writer, game_id, atbat_id=None, recent=5):
+    """Rebuild the tracking state of a game after a refresh or server restart.
+
+    One embedded select fetches the game's last `recent` at-bats with their
+    pitches and runner events for the log. The open at-bat is atbat_id if it
+    has no PlayResult yet, else the newest at-bat without one; it is usually
+    among those, and only when it is not (the at-bat just ended, or more than
+    `recent` at-bats were finished after it) does a second select look for it
+    further back. PostgREST cannot limit the recent at-bats and also match an
+    older open one in the same request. Pitches and runner events still waiting in the writer's queue are layered
+    on top. Sets the current at-bat, batter, pitcher, count and pitch counter
+    and rebuilds the event log. Returns the restored AtBatID or None when no
+    at-bat is open.
+    """
+    atbats = {a["AtBatID"]: a for a in db.recent_atbats(game_id, recent)}
+    open_ids = [i for i, a in atbats.items() if a["PlayResult"] is None]
+    if atbat_id in atbats or atbat_id is None:
+        current = atbats.get(atbat_id if atbat_id in open_ids else max(open_ids, default=None))
+        if current is None and len(atbats) == recent:
+            current = db.open_atbat(game_id, before=min(atbats))
+    else:
+        current = db.open_atbat(game_id, atbat_id)
+    if current is not None:
+        current = atbats.setdefault(current["AtBatID"], current)
+    atbats = sorted(atbats.values(), key=lambda a: a["AtBatID"])
+    queued = writer.pending("pitch")
+    queued_ids = {ref for ref, _ in queued}
+    # Queued runner events, keyed by their pitch: its queue ref, or its PitchID once sent.
+    queued_events = {}
+    for _, ev in writer.pending("runner_event"):
+        pitch_ref = ev.get("_pitch_ref")
+        key = ("ref", pitch_ref) if pitch_ref in queued_ids else ("id", writer.remote_id(pitch_ref))
+        queued_events.setdefault(key, []).append(ev)
+
+    reset_atbat(state)
+    state["selected_game_id"] = int(game_id)
+    state["event_log"] = []
+    for ab in atbats:
+        batter = (ab.get("batter") or {}).get("Name", "Unknown")
+        pitches = [(None, p) for p in sorted(ab["Pitches"], key=lambda p: p["PitchOfAB"] or 0)]
+        pitches += [(ref, p) for ref, p in queued if p.get("AtBatID") == ab["AtBatID"]]
+        logs = []
+        for ref, p in pitches:
+            events = sorted(p.get("RunnerEvents") or [], key=lambda e: e.get("RunnerEventID") or 0)
+            events += queued_events.get(("ref", ref) if ref is not None else ("id", p.get("PitchID")), [])
+            lines = [_pitch_line(batter, p)] + [
+                _runner_line((e.get("runner") or {}).get("Name") or player_name(state, e.get("RunnerID")),
+                             {**e, "OutRecorded": bool(e.get("OutRecorded"))})
+                for e in events
+            ]
+            for line in lines:
+                add_to_summary(state, line)
+            logs.append(lines)
+        if ab is current:
+            state["current_atbat_id"] = ab["AtBatID"]
+            state["current_batter_id"] = ab.get("BatterID")
+            state["current_pitcher_id"] = ab.get("PitcherID")
+            state["pitch_history"] = [ref if ref in queued_ids else writer.adopt("pitch", p["PitchID"])
+                                      for ref, p in pitches]
+            state["atbat_pitches"] = [
+                {**{c: p.get(c) for c in _PITCH_COLUMNS}, "ref": ref, "log": lines}
+                for ref, (_, p), lines in zip(state["pitch_history"], pitches, logs)
+            ]
+            if pitches:
+                _sync_count(state)
+                state["last_saved_pitch_id"] = state["pitch_history"][-1]
+            state["pitch_numbers"].start_atbat(ab["AtBatID"], max([p.get("PitchOfAB") or 0 for _, p in pitches],
+                                                                  default=0))
+        elif ab.get("PlayResult") is not None:
+            add_to_summary(state, f"AtBat finished: {ab['PlayResult']} | Runs {ab.get('RunsScored') or 0} "
+                                  f"ER {ab.get('EarnedRuns') or 0}")
+    return state["current_atbat_id"]
@@ -1,54 +1,20 @@
 import streamlit as st
-from supabase import create_client
 from datetime import date
 
-st.set_page_config(page_title="Game Setup")
-
-# -----------------------------
-# Supabase connection
-# -----------------------------
-SUPABASE_URL = st.secrets["supabase"]["url"]
-SUPABASE_KEY = st.secrets["supabase"]["key"]
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-# -----------------------------
-# Helper functions
-# -----------------------------
-def ensure_player(name, team=None, throws=None, bats=None):
-    """Return PlayerID for name; create if missing."""
-    if not name.strip():
-        return None
-    r = supabase.table("Players").select("PlayerID").eq("Name", name).execute()
-    if r.data:
-        return r.data[0]["PlayerID"]
-    payload = {"Name": name}
-    if team:
-        payload["Team"] = team
-    if throws:
-        payload["Throws"] = throws
-    if bats:
-        payload["Bats"] = bats
-    created = supabase.table("Players").insert(payload).execute()
-    return created.data[0]["PlayerID"] if created.data else None
-
-
-def create_game(home, away, gamedate):
-    resp = supabase.table("Games").insert({
-        "HomeTeam": home,
-        "AwayTeam": away,
-        "GameDate": str(gamedate)
-    }).execute()
-    return resp.data[0]["GameID"] if resp.data else None
+from core import db, instrument, refdata, roster
+from core.roster import parse_lineup, parse_roster_csv, parse_staff, register_roster
 
+st.set_page_config(page_title="Game Setup")
+instrument.begin("Game Setup", st.session_state)
+instrument.render_health()
 
 # -----------------------------
 # Initialize session defaults
 # -----------------------------
 for key, default in {
-    "lineup": [],
-    "pitchers": [],
     "selected_game_id": None,
-    "game_active": False
+    "game_active": False,
+    "game_pages": 1
 }.items():
     if key not in st.session_state:
         st.session_state[key] = default
@@ -65,9 +31,12 @@ with st.expander("1 — Game Setup & Lineup", expanded=True):
 
     # ----------- Game Select/Create -----------
     with col1:
-        games = supabase.table("Games").select(
-            "GameID, GameDate, HomeTeam, AwayTeam"
-        ).order("GameDate", desc=True).execute().data or []
+        instrument.mark(st.session_state, "Game Select/Create")
+        try:
+            games, more_games = refdata.games.pages(st.session_state["game_pages"])
+        except Exception as e:
+            st.warning(f"Could not load games: {db.error_message(e)}")
+            st.stop()
         game_map = {
             f"{g['GameDate']} - {g['HomeTeam']} vs {g['AwayTeam']}": g["GameID"]
             for g in games
@@ -77,58 +46,68 @@ with st.expander("1 — Game Setup & Lineup", expanded=True):
             "Select Game",
             ["-- Add New Game --"] + list(game_map.keys())
         )
+        if more_games and st.button("Load older games"):
+            st.session_state["game_pages"] += 1
+            st.rerun()
 
         if sel_game == "-- Add New Game --":
             home = st.text_input("Home Team")
             away = st.text_input("Away Team")
             gamedate = st.date_input("Game Date", value=date.today())
             if st.button("Create Game"):
-                gid = create_game(home, away, gamedate)
+                try:
+                    gid = db.create_game(home, away, gamedate)
+                except Exception as e:
+                    gid = None
+                    st.error(f"Could not create the game: {db.error_message(e)}")
                 if gid:
                     st.success("Game created. Re-open select to pick it.")
                     st.rerun()
-                else:
+                elif gid is not None:
                     st.error("Failed to create game.")
             st.stop()
         else:
             st.session_state["selected_game_id"] = game_map[sel_game]
             st.info(f"Selected Game: {sel_game}")
 
-    # ----------- Lineup (Hitters) -----------
-    existing_players = supabase.table("Players").select("Name").execute().data or []
-    all_names = [p["Name"] for p in existing_players]
+    # The lineup and staff live in GameRoster, shared with every device on this game.
+    game_id = st.session_state["selected_game_id"]
+    try:
+        game_roster = roster.cache.get(game_id)
+    except Exception as e:
+        st.warning(f"Could not load the roster: {db.error_message(e)}")
+        st.stop()
 
+    # ----------- Lineup (Hitters) -----------
     with col2:
+        instrument.mark(st.session_state, "Lineup")
         st.subheader("Lineup")
 
         hname = st.text_input("Hitter name", key="hname")
         hbats = st.selectbox("Bats", ["Right", "Left", "Switch"], key="hbats")
 
         if hname:
-            matches = [n for n in all_names if hname.lower() in n.lower()]
+            matches = refdata.players.search(hname)
             if matches:
-                st.caption("Existing players: " + ", ".join(matches[:5]))
+                st.caption("Existing players: " + ", ".join(matches))
 
         if st.button("Add Hitter"):
+            existing = game_roster.find(hname, "H") if hname else None
             if not hname:
                 st.warning("Enter a name.")
-            elif any(
-                p["Name"].lower() == hname.lower()
-                for p in st.session_state["lineup"]
-            ):
+            elif existing and existing["Active"]:
                 st.error("⚠️ Batter already in lineup.")
             else:
-                pid = ensure_player(hname, bats=hbats)
-                order = len(st.session_state["lineup"]) + 1
-                st.session_state["lineup"].append({
-                    "Name": hname,
-                    "Bats": hbats,
-                    "Order": order,
-                    "PlayerID": pid
-                })
-                st.success(f"Added {hname} as #{order}")
-                st.session_state["reset_hitter_inputs"] = True
-                st.rerun()
+                order = max((p["Order"] or 0 for p in game_roster.lineup), default=0) + 1
+                try:
+                    pid = db.ensure_player(hname, bats=hbats)
+                    roster.add_player(game_id, pid, "H", order)
+                except Exception as e:
+                    st.error(f"Could not add {hname}: {db.error_message(e)}")
+                else:
+                    st.success(f"Added {hname} as #{order}")
+                    st.session_state["reset_hitter_inputs"] = True
+                    st.rerun()
 
         # safely reset hitter inputs after rerun
         if st.session_state.get("reset_hitter_inputs"):
@@ -138,43 +117,45 @@ with st.expander("1 — Game Setup & Lineup", expanded=True):
             st.rerun()
 
         # Display lineup list
-        for i, p in enumerate(st.session_state["lineup"]):
+        for p in game_roster.lineup:
             c1, c2 = st.columns([6, 1])
-            c1.write(f"{p['Order']}. {p['Name']} ({p['Bats']})")
-            if c2.button("❌", key=f"delh{i}"):
-                st.session_state["lineup"].pop(i)
-                st.rerun()
+            c1.write(f"{p['Order']}. {p['Name']} ({p['Bats'] or '?'})")
+            if c2.button("❌", key=f"delh{p['RosterID']}"):
+                try:
+                    roster.remove_player(p)
+                except Exception as e:
+                    st.error(f"Could not remove {p['Name']}: {db.error_message(e)}")
+                else:
+                    st.rerun()
 
     # ----------- Pitchers -----------
     with col3:
+        instrument.mark(st.session_state, "Pitchers")
         st.subheader("Pitchers")
 
         pname = st.text_input("Pitcher name", key="pname")
         pthrows = st.selectbox("Throws", ["Right", "Left"], key="pthrows")
 
         if pname:
-            matches = [n for n in all_names if pname.lower() in n.lower()]
+            matches = refdata.players.search(pname)
             if matches:
-                st.caption("Existing players: " + ", ".join(matches[:5]))
+                st.caption("Existing players: " + ", ".join(matches))
 
         if st.button("Add Pitcher"):
             if not pname:
                 st.warning("Enter pitcher name.")
-            elif any(
-                p["Name"].lower() == pname.lower()
-                for p in st.session_state["pitchers"]
-            ):
+            elif any(p["Name"].lower() == pname.lower() for p in game_roster.pitchers):
                 st.error("⚠️ Pitcher already added.")
             else:
-                pid = ensure_player(pname, throws=pthrows)
-                st.session_state["pitchers"].append({
-                    "Name": pname,
-                    "Throws": pthrows,
-                    "PlayerID": pid
-                })
-                st.success(f"Added pitcher {pname}")
-                st.session_state["reset_pitcher_inputs"] = True
-                st.rerun()
+                try:
+                    pid = db.ensure_player(pname, throws=pthrows)
+                    roster.add_player(game_id, pid, "P")
+                except Exception as e:
+                    st.error(f"Could not add {pname}: {db.error_message(e)}")
+                else:
+                    st.success(f"Added pitcher {pname}")
+                    st.session_state["reset_pitcher_inputs"] = True
+                    st.rerun()
 
         # safely reset pitcher inputs after rerun
         if st.session_state.get("reset_pitcher_inputs"):
@@ -184,11 +165,52 @@ with st.expander("1 — Game Setup & Lineup", expanded=True):
             st.rerun()
 
         # Display pitcher list
-        for j, q in enumerate(st.session_state["pitchers"]):
+        for q in game_roster.pitchers:
             c1, c2 = st.columns([6, 1])
-            c1.write(f"{q['Name']} ({q['Throws']})")
-            if c2.button("❌", key=f"delp{j}"):
-                st.session_state["pitchers"].pop(j)
+            on_mound = " — pitching" if q is game_roster.current_pitcher else ""
+            c1.write(f"{q['Name']} ({q['Throws'] or '?'}){on_mound}")
+            if c2.button("❌", key=f"delp{q['RosterID']}"):
+                try:
+                    roster.remove_player(q)
+                except Exception as e:
+                    st.error(f"Could not remove {q['Name']}: {db.error_message(e)}")
+                else:
+                    st.rerun()
+
+
+# -----------------------------
+# Bulk roster entry
+# -----------------------------
+instrument.mark(st.session_state, "Bulk roster entry")
+with st.expander("Bulk roster entry", expanded=False):
+    st.caption("Paste the whole lineup and staff, or upload a CSV with Role (H/P), Order, Name, Bats, "
+               "Throws columns. Replaces the game's lineup and pitcher list.")
+    with st.form("bulk_roster"):
+        bc1, bc2 = st.columns(2)
+        lineup_text = bc1.text_area("Lineup — one per line: [Order.] Name, Bats (R/L/S)", height=220)
+        staff_text = bc2.text_area("Pitchers — one per line: Name, Throws (R/L)", height=220)
+        roster_file = st.file_uploader("…or roster CSV", type=["csv"])
+        submitted = st.form_submit_button("Register Roster")
+
+    if submitted:
+        if roster_file is not None:
+            hitters, staff, errors = parse_roster_csv(roster_file.getvalue())
+        else:
+            hitters, h_errors = parse_lineup(lineup_text)
+            staff, p_errors = parse_staff(staff_text)
+            errors = h_errors + p_errors
+        if errors:
+            for err in errors:
+                st.error(err)
+        elif not hitters and not staff:
+            st.warning("Nothing to register.")
+        else:
+            try:
+                register_roster(game_id, hitters, staff)
+            except Exception as e:
+                st.error(f"Roster registration failed: {db.error_message(e)}")
+            else:
+                st.success(f"Registered {len(hitters)} hitters and {len(staff)} pitchers.")
                 st.rerun()
 
 
@@ -196,6 +218,7 @@ with st.expander("1 — Game Setup & Lineup", expanded=True):
 # 2 — Start Game Button
 # -----------------------------
 st.markdown("---")
+instrument.mark(st.session_state, "Start Game")
 if st.session_state["selected_game_id"]:
     if st.button("🚀 Start Game"):
         st.session_state["game_active"] = True
@@ -203,3 +226,5 @@ if st.session_state["selected_game_id"]:
         st.switch_page("pages/2_Tracker.py")
 else:
     st.info("Select or create a game first.")
+
+instrument.render_panel(st.session_state)
@@ -1,131 +1,18 @@
 import streamlit as st
-from supabase import create_client
 from datetime import date
 
-st.set_page_config(page_title="Tracker")
-
-# ---------------------------------------------------------
-# Supabase connection
-# ---------------------------------------------------------
-SUPABASE_URL = st.secrets["supabase"]["url"]
-SUPABASE_KEY = st.secrets["supabase"]["key"]
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-# ---------------------------------------------------------
-# Helpers
-# ---------------------------------------------------------
-def ensure_player(name, team=None, throws=None, bats=None):
-    if not name or str(name).strip() == "":
-        return None
-    r = supabase.table("Players").select("PlayerID").eq("Name", name).execute()
-    if r.data:
-        return r.data[0]["PlayerID"]
-    payload = {"Name": name}
-    if team: payload["Team"] = team
-    if throws: payload["Throws"] = throws
-    if bats: payload["Bats"] = bats
-    created = supabase.table("Players").insert(payload).execute()
-    return created.data[0]["PlayerID"] if created.data else None
-
-def create_atbat(game_id, batter_id, pitcher_id, inning):
-    payload = {
-        "GameID": int(game_id),
-        "BatterID": int(batter_id),
-        "PitcherID": int(pitcher_id),
-        "Inning": int(inning),
-        "LeadOff": False,
-        "LeadOffOn": False,
-        "RunsScored": 0,
-        "EarnedRuns": 0
-    }
-
-    # Safety: strip any accidental primary key before insert
-    if "AtBatID" in payload:
-        del payload["AtBatID"]
+from core import db, instrument, roster, tracker
+from core.outbox import get_outbox
 
-    try:
-        # ensure Supabase handles ID generation
-        resp = supabase.table("AtBats").insert(payload).execute()
-        if resp.data:
-            return resp.data[0]["AtBatID"]
-        else:
-            st.error("Insert succeeded but returned no data.")
-            return None
-    except Exception as e:
-        st.error(f"Insert failed for AtBat — {e}")
-        st.write("DEBUG payload:", payload)
-        return None
-
-def next_pitch_numbers_for(atbat_id):
-    """Return (next global PitchNo, next PitchOfAB) with safe defaults."""
-    try:
-        r1 = supabase.table("Pitches").select("PitchNo").order("PitchNo", desc=True).limit(1).execute()
-        last_global = r1.data[0]["PitchNo"] if r1.data and r1.data[0]["PitchNo"] is not None else 0
-    except Exception:
-        last_global = 0
-    try:
-        r2 = supabase.table("Pitches").select("PitchOfAB").eq("AtBatID", atbat_id).order("PitchOfAB", desc=True).limit(1).execute()
-        last_poab = r2.data[0]["PitchOfAB"] if r2.data and r2.data[0]["PitchOfAB"] is not None else 0
-    except Exception:
-        last_poab = 0
-    return (int(last_global) + 1, int(last_poab) + 1)
-
-def compute_wel(balls, strikes):
-    t = (balls, strikes)
-    if t in [(0,0),(0,1),(1,0),(1,1)]: return "E"
-    if t in [(0,2),(1,2)]: return "W"
-    if t in [(2,0),(2,1)]: return "L"
-    return None
-
-def insert_pitch(atbat_id, pitch_no, pitch_of_ab, pitch_type, velocity, zone, pitch_called, balls, strikes, wel, tagged, hitdir, kpi):
-    payload = {
-        "AtBatID": int(atbat_id),
-        "PitchNo": int(pitch_no),
-        "PitchOfAB": int(pitch_of_ab),
-        "PitchType": pitch_type,
-        "Velocity": None if not velocity else float(velocity),
-        "Zone": None if not zone else int(zone),
-        "PitchCalled": pitch_called,
-        "WEL": wel,
-        "Balls": int(balls),
-        "Strikes": int(strikes),
-        "TaggedHit": tagged,
-        "HitDirection": hitdir,
-        "KPI": kpi
-    }
-    return supabase.table("Pitches").insert(payload).execute()
-
-def update_atbat(atbat_id, updates: dict):
-    try:
-        resp = supabase.table("AtBats").update(updates).eq("AtBatID", atbat_id).execute()
-        return resp
-    except Exception as e:
-        st.error(f"Failed to update AtBat {atbat_id}: {e}")
-        return None
-
-def add_to_summary(line: str):
-    st.session_state["event_log"].insert(0, line)
+st.set_page_config(page_title="Tracker")
+instrument.begin("Tracker", st.session_state)
+outbox = get_outbox()
+instrument.render_health("Pitches are kept on this device and sync when it is back.", outbox)
 
 # ---------------------------------------------------------
 # Session defaults
 # ---------------------------------------------------------
-defaults = {
-    "lineup": [],
-    "pitchers": [],
-    "selected_game_id": None,
-    "current_batter_id": None,
-    "current_pitcher_id": None,
-    "current_atbat_id": None,
-    "balls": 0,
-    "strikes": 0,
-    "pitch_history": [],
-    "last_pitch_summary": None,
-    "last_saved_pitch_id": None,
-    "event_log": []
-}
-for k, v in defaults.items():
-    if k not in st.session_state:
-        st.session_state[k] = v
+tracker.init_state(st.session_state)
 
 # ---------------------------------------------------------
 # Initialize pitch quick-entry defaults
@@ -140,115 +27,177 @@ for key, default in {
         st.session_state[key] = default
 
 # ---------------------------------------------------------
-# Ensure a game is active
+# Session restore
 # ---------------------------------------------------------
+# The URL carries ?game=…&atbat=…, so after a browser refresh or a server
+# restart (which both start a fresh session) the open at-bat, count, pitch
+# numbers and recent log are rebuilt from the database, in one query unless
+# the open at-bat is older than the recent ones (see tracker.restore).
+instrument.mark(st.session_state, "Restore")
+query_game = st.query_params.get("game")
+if "tracker_restored" not in st.session_state:
+    st.session_state["tracker_restored"] = True
+    if (query_game and query_game.isdigit() and not st.session_state["current_atbat_id"]
+            and st.session_state["selected_game_id"] in (None, int(query_game))):
+        query_atbat = st.query_params.get("atbat")
+        try:
+            restored = tracker.restore(st.session_state, outbox, int(query_game),
+                                       int(query_atbat) if query_atbat and query_atbat.isdigit() else None)
+        except Exception as e:
+            st.error(f"Could not restore the game from the database: {db.error_message(e)}")
+        else:
+            st.toast(f"Restored AtBat {restored}." if restored else "Restored game — no open at-bat.")
+
 if not st.session_state.get("selected_game_id"):
     st.warning("Please go to the Game Setup page first to create and start a game.")
     st.stop()
 
+if st.sidebar.button("Restore from database",
+                     help="Rebuild the open at-bat, count, roster and recent log from what has been saved."):
+    roster.cache.invalidate(st.session_state["selected_game_id"])
+    try:
+        tracker.restore(st.session_state, outbox, st.session_state["selected_game_id"],
+                        st.session_state["current_atbat_id"])
+    except Exception as e:
+        st.sidebar.error(f"Restore failed: {db.error_message(e)}")
+    else:
+        st.rerun()
+
+# The roster is shared by every device on this game; one query when it (re)loads.
+try:
+    game_roster = tracker.load_roster(st.session_state)
+except Exception as e:
+    st.warning(f"Could not load the game's roster: {db.error_message(e)}")
+    st.stop()
+
+st.query_params["game"] = str(st.session_state["selected_game_id"])
+if st.session_state["current_atbat_id"]:
+    st.query_params["atbat"] = str(st.session_state["current_atbat_id"])
+elif "atbat" in st.query_params:
+    del st.query_params["atbat"]
+
 st.title("Pitch Tracker")
 
+pending = outbox.pending_count()
+st.sidebar.metric("Pending writes", pending)
+if pending and outbox.last_error:
+    st.sidebar.caption(f"Offline — will retry: {outbox.last_error}")
+if outbox.dead_count() and st.sidebar.button("Retry rejected writes"):
+    outbox.requeue_dead()
+    st.rerun()
+
+# ---------------------------------------------------------
+# Layout
+# ---------------------------------------------------------
+# Each section is a fragment: a click inside one reruns only that section.
+# Starting or finishing an at-bat changes every section and reruns the page;
+# pitches and runner events only redraw their own section and the summary,
+# which lives in a placeholder the fragments write into.
+sections = st.container()
+st.markdown("---")
+st.subheader("Running Summary")
+summary_slot = st.empty()
+
+
+def render_summary():
+    log = st.session_state["event_log"]
+    if log:
+        # One virtualized grid however long the log gets.
+        summary_slot.dataframe({"Event": log}, hide_index=True, width="stretch",
+                               height=min(36 + 35 * len(log), 400))
+    else:
+        summary_slot.caption("No events yet. Pitch, record a runner event, or finish an at-bat to see entries here.")
+
+
 # ---------------------------------------------------------
 # 1 — Select AtBat
 # ---------------------------------------------------------
-st.header("1 — Select AtBat")
-col1, col2, col3 = st.columns([3,3,2])
-
-with col1:
-    lineup_names = [x["Name"] for x in st.session_state["lineup"]]
-    batter_choice = st.selectbox("Select Batter", ["-- Select --"] + lineup_names)
-    if batter_choice != "-- Select --":
-        sel = next((x for x in st.session_state["lineup"] if x["Name"] == batter_choice), None)
-        if sel:
-            st.session_state["current_batter_id"] = sel["PlayerID"]
-            st.write(f"Selected batter: {sel['Name']} (slot {sel['Order']})")
-
-with col2:
-    pitch_names = [x["Name"] for x in st.session_state["pitchers"]]
-    pitcher_choice = st.selectbox("Select Pitcher", ["-- Select --"] + pitch_names)
-    if pitcher_choice != "-- Select --":
-        sp = next((x for x in st.session_state["pitchers"] if x["Name"] == pitcher_choice), None)
-        if sp:
-            st.session_state["current_pitcher_id"] = sp["PlayerID"]
-            st.write(f"Selected pitcher: {sp['Name']}")
-
-with col3:
-    inning_val = st.number_input("Inning", min_value=1, value=1)
-    leadoff_sel = st.selectbox("LeadOff", ["Select", "Yes", "No"])
-    if st.button("Start AtBat"):
-        if not st.session_state["current_batter_id"] or not st.session_state["current_pitcher_id"]:
-            st.error("Select batter and pitcher first.")
-        else:
-            atbat_id = create_atbat(
-                st.session_state["selected_game_id"],
-                st.session_state["current_batter_id"],
-                st.session_state["current_pitcher_id"],
-                inning_val
-            )
-            if atbat_id:
-                st.session_state["current_atbat_id"] = atbat_id
-                st.session_state["balls"] = 0
-                st.session_state["strikes"] = 0
-                st.session_state["pitch_history"] = []
-                st.session_state["last_pitch_summary"] = None
-                st.session_state["last_saved_pitch_id"] = None
-                if leadoff_sel != "Select":
-                    try:
-                        supabase.table("AtBats").update(
-                            {"LeadOff": (leadoff_sel == "Yes")}
-                        ).eq("AtBatID", atbat_id).execute()
-                    except Exception as e:
-                        st.warning(f"Could not update LeadOff value: {e}")
-                st.success(f"AtBat {atbat_id} created.")
-                st.rerun()
+@st.fragment
+@instrument.fragment("Tracker", "Select AtBat")
+def select_atbat():
+    st.header("1 — Select AtBat")
+    col1, col2, col3 = st.columns([3,3,2])
+
+    game_roster = st.session_state["roster"]
+    with col1:
+        lineup_names = [x["Name"] for x in game_roster.lineup]
+        batter_choice = st.selectbox("Select Batter", ["-- Select --"] + lineup_names)
+        if batter_choice != "-- Select --":
+            sel = game_roster.find(batter_choice, "H")
+            if sel:
+                st.session_state["current_batter_id"] = sel["PlayerID"]
+                st.write(f"Selected batter: {sel['Name']} (slot {sel['Order']})")
+
+    with col2:
+        pitch_names = [x["Name"] for x in game_roster.pitchers]
+        on_mound = game_roster.current_pitcher
+        pitcher_choice = st.selectbox("Select Pitcher", ["-- Select --"] + pitch_names,
+                                      index=pitch_names.index(on_mound["Name"]) + 1
+                                      if on_mound and on_mound["Name"] in pitch_names else 0)
+        if pitcher_choice != "-- Select --":
+            sp = game_roster.find(pitcher_choice, "P")
+            if sp:
+                st.session_state["current_pitcher_id"] = sp["PlayerID"]
+                st.write(f"Selected pitcher: {sp['Name']}"
+                         + ("" if sp is on_mound else " — starting an at-bat records the pitching change"))
+
+    with col3:
+        inning_val = st.number_input("Inning", min_value=1, value=1)
+        leadoff_sel = st.selectbox("LeadOff", ["Select", "Yes", "No"])
+        if st.button("Start AtBat"):
+            if not st.session_state["current_batter_id"] or not st.session_state["current_pitcher_id"]:
+                st.error("Select batter and pitcher first.")
+            else:
+                try:
+                    atbat_id = tracker.start_atbat(
+                        st.session_state, inning_val,
+                        leadoff=None if leadoff_sel == "Select" else (leadoff_sel == "Yes")
+                    )
+                except Exception as e:
+                    st.error(f"Could not start the at-bat: {db.error_message(e)}")
+                    atbat_id = None
+                if atbat_id:
+                    st.success(f"AtBat {atbat_id} created.")
+                    st.rerun()
+                else:
+                    st.error("Failed to create AtBat.")
+
+    with st.expander("Substitution"):
+        s1, s2, s3 = st.columns([2, 3, 1])
+        slots = [e["Order"] for e in game_roster.lineup]
+        sub_slot = s1.selectbox("Batting slot", slots, key="sub_slot",
+                                format_func=lambda o: f"{o}. {game_roster.slot(o)['Name']}")
+        sub_name = s2.text_input("Player in", key="sub_name")
+        sub_inning = s3.number_input("Inning", min_value=1, value=int(inning_val), key="sub_inning")
+        if st.button("Make Substitution"):
+            if sub_slot is None or not sub_name.strip():
+                st.warning("Pick a slot and enter the player coming in.")
             else:
-                st.error("Failed to create AtBat.")
+                try:
+                    pid = db.ensure_player(sub_name.strip())
+                    roster.substitute(game_roster, sub_slot, pid, sub_inning)
+                except Exception as e:
+                    st.error(f"Substitution failed: {db.error_message(e)}")
+                else:
+                    tracker.add_to_summary(st.session_state, f"Substitution: {sub_name.strip()} bats #{sub_slot} "
+                                                             f"for {game_roster.slot(sub_slot)['Name']} "
+                                                             f"(inning {sub_inning})")
+                    st.rerun()
+
 
 # ---------------------------------------------------------
 # 2 — Pitch Entry
 # ---------------------------------------------------------
-st.header("2 — Pitch Entry")
-
-def insert_pitch_safe(atbat_id, pitch_no, pitch_of_ab, pitch_type, velocity, zone,
-                      pitch_called, balls, strikes, wel, tagged, hitdir, kpi):
-    payload = {
-        "AtBatID": int(atbat_id),
-        "PitchNo": int(pitch_no),
-        "PitchOfAB": int(pitch_of_ab),
-        "PitchType": pitch_type,
-        "Velocity": float(velocity) if velocity else None,
-        "Zone": int(zone) if zone not in [None, "None", ""] else None,
-        "PitchCalled": pitch_called,
-        "WEL": wel,
-        "Balls": int(balls),
-        "Strikes": int(strikes),
-        "TaggedHit": tagged or None,
-        "HitDirection": hitdir or None,
-        "KPI": kpi or None
-    }
-    payload = {k: v for k, v in payload.items() if v is not None}
-    try:
-        return supabase.table("Pitches").insert(payload).execute()
-    except Exception as e:
-        st.error(f"Insert failed: {e}")
-        st.write("DEBUG payload:", payload)
-        raise
+@st.fragment
+@instrument.fragment("Tracker", "Pitch Entry")
+def pitch_entry():
+    st.header("2 — Pitch Entry")
+    if not st.session_state["current_atbat_id"]:
+        st.info("Start an AtBat to enter pitches.")
+        return
 
-if not st.session_state["current_atbat_id"]:
-    st.info("Start an AtBat to enter pitches.")
-else:
-    atbat_id = st.session_state["current_atbat_id"]
-
-    def refresh_pitch_numbers():
-        pno, poab = next_pitch_numbers_for(atbat_id)
-        st.session_state["next_pitch_no"] = pno
-        st.session_state["next_pitch_of_ab"] = poab
-
-    if "next_pitch_no" not in st.session_state or "next_pitch_of_ab" not in st.session_state:
-        refresh_pitch_numbers()
-
-    st.write(f"Next PitchNo: **{st.session_state['next_pitch_no']}** — PitchOfAB: **{st.session_state['next_pitch_of_ab']}**")
-    st.write(f"Count: **{st.session_state['balls']}-{st.session_state['strikes']}**")
+    numbers = tracker.ensure_numbers(st.session_state)
+    status = st.container()  # filled in last, so it shows the count after a submit
 
     # --- Pitch Type & Result ---
     st.subheader("Pitch Type")
@@ -273,48 +222,97 @@ else:
                                                     "Right Center", "Right Field", "Second Base", "Short Stop", "Third Base"])
     kpi_val = st.text_input("KPI / Notes (optional)")
 
+    # Saved in the same call as the pitch, so the pitch and e.g. a stolen base on it land together.
+    runner_ids = {p["Name"]: p["PlayerID"] for p in st.session_state["roster"].players()}
+    with st.expander("Runner event on this pitch (optional)"):
+        re1, re2, re3, re4, re5 = st.columns([3, 1, 1, 2, 1])
+        pitch_runner = re1.selectbox("Runner", ["-- None --"] + list(runner_ids),
+                                     key="pitch_runner")
+        pitch_start = re2.selectbox("Start Base", [1, 2, 3, 4], key="pitch_runner_start")
+        pitch_end = re3.selectbox("End Base", [0, 1, 2, 3, 4], key="pitch_runner_end",
+                                  format_func=lambda x: "None" if x == 0 else str(x))
+        pitch_event = re4.selectbox("Event Type", ["Stolen Base", "Caught Stealing", "Pickoff", "Out on Play",
+                                                   "Advanced on Hit", "Other"], key="pitch_runner_event")
+        pitch_out = re5.selectbox("Out", ["No", "Yes"], key="pitch_runner_out")
+
     if st.button("Submit Pitch"):
         if not st.session_state.get("quick_pitch_type") or not st.session_state.get("quick_pitch_called"):
             st.warning("Pick a Pitch Type and a Pitch Called first.")
         else:
-            called = st.session_state["quick_pitch_called"]
-            if called == "Ball Called":
-                st.session_state["balls"] = min(4, st.session_state["balls"] + 1)
-            elif called in ["Strike Called", "Strike Swing Miss"]:
-                st.session_state["strikes"] = min(3, st.session_state["strikes"] + 1)
-            elif called == "Foul Ball" and st.session_state["strikes"] < 2:
-                st.session_state["strikes"] += 1
-            elif called == "In Play" and st.session_state["strikes"] < 3:
-                st.session_state["strikes"] += 1
-
-            wel = compute_wel(st.session_state["balls"], st.session_state["strikes"])
-            zone_num = None if zone_val == "None" else int(zone_val)
-            tagged_hit = None if tagged_val == "None" else tagged_val
-            hit_dir = None if hitdir_val == "None" else hitdir_val
-
-            r = insert_pitch_safe(atbat_id, st.session_state["next_pitch_no"], st.session_state["next_pitch_of_ab"],
-                                  st.session_state["quick_pitch_type"], vel_val, zone_num, called,
-                                  st.session_state["balls"], st.session_state["strikes"], wel,
-                                  tagged_hit, hit_dir, kpi_val)
-
-            if r.data:
-                pid = r.data[0]["PitchID"]
-                st.session_state["pitch_history"].append(pid)
-                st.session_state["last_saved_pitch_id"] = pid
-                batter_name = next((x["Name"] for x in st.session_state["lineup"]
-                                    if x["PlayerID"] == st.session_state["current_batter_id"]), "Unknown")
-                add_to_summary(f"{batter_name}: {st.session_state['quick_pitch_type']} {vel_val} — {called} ({st.session_state['balls']}-{st.session_state['strikes']})")
-
-                refresh_pitch_numbers()
-                st.success(f"Pitch saved. Next PitchNo: {st.session_state['next_pitch_no']} | PitchOfAB: {st.session_state['next_pitch_of_ab']}")
+            tracker.submit_pitch(
+                st.session_state, outbox,
+                st.session_state["quick_pitch_type"], st.session_state["quick_pitch_called"],
+                velocity=vel_val,
+                zone=None if zone_val == "None" else int(zone_val),
+                tagged=None if tagged_val == "None" else tagged_val,
+                hitdir=None if hitdir_val == "None" else hitdir_val,
+                kpi=kpi_val,
+                runner_events=[] if pitch_runner == "-- None --" else [(
+                    pitch_runner,
+                    tracker.runner_event_payload(
+                        runner_ids[pitch_runner],
+                        pitch_start, pitch_end, pitch_event, pitch_out == "Yes"
+                    )
+                )]
+            )
+            next_no, next_of_ab = numbers.peek()
+            st.success(f"Pitch queued. Next PitchNo: {next_no} | PitchOfAB: {next_of_ab}")
+            render_summary()
+
+    # --- Corrections ---
+    logged = st.session_state["atbat_pitches"]
+    if logged:
+        last = logged[-1]
+        if st.button(f"Undo last pitch (#{last['PitchOfAB']}: {last['PitchType']} — {last['PitchCalled']})"):
+            try:
+                tracker.undo_last_pitch(st.session_state, outbox)
+            except Exception as e:
+                st.error(f"Undo failed: {db.error_message(e)}")
             else:
-                st.error("Pitch not saved. Check DB schema.")
+                st.success(f"Pitch #{last['PitchOfAB']} removed.")
+                render_summary()
+
+    if st.session_state["atbat_pitches"]:
+        with st.expander("Edit a pitch"):
+            logged = st.session_state["atbat_pitches"]
+            idx = st.selectbox("Pitch", range(len(logged)), index=len(logged) - 1, key="edit_pitch_idx",
+                               format_func=lambda i: f"#{logged[i]['PitchOfAB']}: {logged[i]['PitchType']} — "
+                                                     f"{logged[i]['PitchCalled']} ({logged[i]['Balls']}-{logged[i]['Strikes']})")
+            p = logged[idx]
+            k = f"edit_{p['ref']}"
+            e1, e2, e3 = st.columns(3)
+            new_type = e1.selectbox("Pitch Type", pitch_types, key=f"{k}_type",
+                                    index=pitch_types.index(p["PitchType"]) if p["PitchType"] in pitch_types else 0)
+            new_called = e2.selectbox("Pitch Result", call_options, key=f"{k}_called",
+                                      index=call_options.index(p["PitchCalled"]) if p["PitchCalled"] in call_options else 0)
+            new_vel = e3.number_input("Velocity", min_value=0.0, step=0.1, key=f"{k}_vel",
+                                      value=float(p.get("Velocity") or 0.0))
+            if st.button("Save pitch changes", key=f"{k}_save"):
+                try:
+                    n = tracker.edit_pitch(st.session_state, outbox, idx, PitchType=new_type, PitchCalled=new_called,
+                                           Velocity=new_vel or None)
+                except Exception as e:
+                    st.error(f"Edit failed: {db.error_message(e)}")
+                else:
+                    st.success(f"Updated {n} pitch{'es' if n != 1 else ''}.")
+                    render_summary()
+
+    next_no, next_of_ab = numbers.peek()
+    status.write(f"Next PitchNo: **{next_no}** — PitchOfAB: **{next_of_ab}**")
+    status.write(f"Count: **{st.session_state['balls']}-{st.session_state['strikes']}**")
+
 
 # ---------------------------------------------------------
 # 3 — Finish AtBat
 # ---------------------------------------------------------
-st.header("3 — Finish AtBat")
-if st.session_state["current_atbat_id"]:
+@st.fragment
+@instrument.fragment("Tracker", "Finish AtBat")
+def finish_section():
+    st.header("3 — Finish AtBat")
+    if not st.session_state["current_atbat_id"]:
+        st.info("No active at-bat. Start one above.")
+        return
+
     play_result_options = [
         "1B", "2B", "3B", "HR", "Walk", "Intentional Walk", "Strikeout Looking",
         "Strikeout Swinging", "HitByPitch", "GroundOut", "FlyOut", "Error", "FC", "SAC", "SACFly"
@@ -325,81 +323,75 @@ if st.session_state["current_atbat_id"]:
     finish_earned = st.number_input("Earned Runs", min_value=0, value=0)
 
     if st.button("Finish AtBat"):
-        updates = {"RunsScored": int(finish_runs), "EarnedRuns": int(finish_earned)}
-        if finish_play != "-- Select --": updates["PlayResult"] = finish_play
-        if lead_off_on_sel != "Select": updates["LeadOffOn"] = (lead_off_on_sel == "Yes")
-        upd = update_atbat(st.session_state["current_atbat_id"], updates)
-        if upd and upd.data:
-            add_to_summary(f"AtBat finished: {updates.get('PlayResult','Result')} | Runs {updates['RunsScored']} ER {updates['EarnedRuns']}")
+        try:
+            closed = tracker.finish_atbat(
+                st.session_state,
+                play_result=None if finish_play == "-- Select --" else finish_play,
+                runs=finish_runs, earned=finish_earned,
+                leadoff_on=None if lead_off_on_sel == "Select" else (lead_off_on_sel == "Yes")
+            )
+        except Exception as e:
+            st.error(f"Failed to update AtBat {st.session_state['current_atbat_id']}: {db.error_message(e)}")
+            closed = False
+        if closed:
             st.success("AtBat updated & closed.")
-            st.session_state["current_atbat_id"] = None
-            st.session_state["balls"] = 0
-            st.session_state["strikes"] = 0
-            st.session_state["pitch_history"] = []
-            st.session_state["last_pitch_summary"] = None
-            st.session_state["last_saved_pitch_id"] = None
             st.rerun()
         else:
             st.error("Failed to update AtBat.")
-else:
-    st.info("No active at-bat. Start one above.")
+
 
 # ---------------------------------------------------------
 # 4 — Runner Events
 # ---------------------------------------------------------
-st.header("4 — Runner Events")
-current_pid = st.session_state.get("last_saved_pitch_id") or (
-    st.session_state["pitch_history"][-1] if st.session_state["pitch_history"] else None
-)
-
-if not current_pid:
-    st.info("Log a pitch first to attach runner events.")
-else:
-    st.write(f"Attaching events to PitchID: {current_pid}")
+@st.fragment
+@instrument.fragment("Tracker", "Runner Events")
+def runner_events():
+    st.header("4 — Runner Events")
+    # The form is always shown: a pitch logged since this section last ran
+    # (a pitch-entry rerun) is picked up when the event is saved.
+    current_pid = st.session_state.get("last_saved_pitch_id")
+    if current_pid:
+        remote_pid = outbox.remote_id(current_pid)
+        st.write(f"Attaching events to the last logged pitch (PitchID: {remote_pid or 'pending upload'})")
+    else:
+        st.caption("Events attach to the last logged pitch.")
 
     # ✅ Only show players from current game
-    all_game_players = st.session_state.get("lineup", []) + st.session_state.get("pitchers", [])
+    all_game_players = st.session_state["roster"].players()
     if not all_game_players:
         st.warning("No players found for this game. Add lineup and pitchers on the Game Setup page.")
-    else:
-        player_map = {p["Name"]: p["PlayerID"] for p in all_game_players}
-
-        runner = st.selectbox("Runner", ["-- Select --"] + list(player_map.keys()))
-        start_base = st.selectbox("Start Base", [1, 2, 3, 4])
-        end_base = st.selectbox("End Base (0=None)", [0, 1, 2, 3, 4], format_func=lambda x: "None" if x == 0 else str(x))
-        event_type = st.selectbox("Event Type", ["Stolen Base", "Caught Stealing", "Pickoff", "Out on Play", "Advanced on Hit", "Other"])
-        out_recorded = st.selectbox("Out Recorded", ["No", "Yes"])
-
-        if st.button("Save Runner Event"):
-            if runner == "-- Select --":
-                st.warning("Choose a runner.")
-            else:
-                payload = {
-                    "PitchID": int(current_pid),
-                    "RunnerID": player_map[runner],
-                    "StartBase": int(start_base),
-                    "EndBase": None if end_base == 0 else int(end_base),
-                    "EventType": event_type,
-                    "OutRecorded": (out_recorded == "Yes"),
-                }
-                try:
-                    resp = supabase.table("RunnerEvents").insert(payload).execute()
-                    if resp.data:
-                        arrow = f"{start_base}→{end_base if end_base != 0 else '-'}"
-                        add_to_summary(f"Runner {runner}: {event_type} | {arrow} | Out={payload['OutRecorded']}")
-                        st.success("Runner event saved.")
-                    else:
-                        st.error("Failed to save runner event.")
-                except Exception as e:
-                    st.error(f"Insert failed: {e}")
-
-# ---------------------------------------------------------
-# 5 — Running Summary
-# ---------------------------------------------------------
-st.markdown("---")
-st.subheader("Running Summary")
-if st.session_state["event_log"]:
-    for line in st.session_state["event_log"]:
-        st.write("• " + line)
-else:
-    st.caption("No events yet. Pitch, record a runner event, or finish an at-bat to see entries here.")
+        return
+    player_map = {p["Name"]: p["PlayerID"] for p in all_game_players}
+
+    runner = st.selectbox("Runner", ["-- Select --"] + list(player_map.keys()))
+    start_base = st.selectbox("Start Base", [1, 2, 3, 4])
+    end_base = st.selectbox("End Base (0=None)", [0, 1, 2, 3, 4], format_func=lambda x: "None" if x == 0 else str(x))
+    event_type = st.selectbox("Event Type", ["Stolen Base", "Caught Stealing", "Pickoff", "Out on Play", "Advanced on Hit", "Other"])
+    out_recorded = st.selectbox("Out Recorded", ["No", "Yes"])
+
+    if st.button("Save Runner Event"):
+        if runner == "-- Select --":
+            st.warning("Choose a runner.")
+        elif not st.session_state.get("last_saved_pitch_id"):
+            st.warning("Log a pitch first to attach runner events.")
+        else:
+            tracker.save_runner_event(st.session_state, outbox, runner, player_map[runner],
+                                      start_base, end_base, event_type, out_recorded == "Yes")
+            st.success("Runner event queued.")
+            render_summary()
+
+
+with sections:
+    instrument.mark(st.session_state, "Select AtBat")
+    select_atbat()
+    instrument.mark(st.session_state, "Pitch Entry")
+    pitch_entry()
+    instrument.mark(st.session_state, "Finish AtBat")
+    finish_section()
+    instrument.mark(st.session_state, "Runner Events")
+    runner_events()
+
+instrument.mark(st.session_state, "Running Summary")
+render_summary()
+
+instrument.render_panel(st.session_state)
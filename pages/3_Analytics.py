@@ -0,0 +1,140 @@
+import streamlit as st
+
+from core import analytics, charts, db, instrument, refdata, rollups
+
+st.set_page_config(page_title="Analytics")
+instrument.begin("Analytics", st.session_state)
+instrument.render_health()
+
+if "game_pages" not in st.session_state:
+    st.session_state["game_pages"] = 1
+
+st.title("Pitcher Analytics")
+
+# -----------------------------
+# Game & pitcher selection
+# -----------------------------
+instrument.mark(st.session_state, "Select")
+try:
+    games, more_games = refdata.games.pages(st.session_state["game_pages"])
+except Exception as e:
+    st.warning(f"Could not load games: {db.error_message(e)}")
+    st.stop()
+if not games:
+    st.info("No games yet — create one on the Game Setup page.")
+    st.stop()
+
+game_labels = {g["GameID"]: f"{g['GameDate']} - {g['HomeTeam']} vs {g['AwayTeam']}" for g in games}
+game_dates = {g["GameID"]: str(g["GameDate"]) for g in games}
+game_ids = list(game_labels)
+current = st.session_state.get("selected_game_id")
+game_id = st.selectbox(
+    "Game", game_ids, format_func=game_labels.get,
+    index=game_ids.index(current) if current in game_ids else 0,
+)
+if more_games and st.button("Load older games"):
+    st.session_state["game_pages"] += 1
+    st.rerun()
+
+c1, c2 = st.columns([3, 1])
+live = c1.toggle("Live (refresh every 5 s)", key="analytics_live")
+if c2.button("Reload from database"):
+    analytics.cache.invalidate(game_id)
+    charts.cache.invalidate(game_id)
+
+
+# -----------------------------
+# Pitcher report
+# -----------------------------
+@st.fragment(run_every=5 if live else None)
+@instrument.fragment("Analytics", "Pitcher report")
+def pitcher_report():
+    try:
+        pitchers = analytics.cache.pitchers(game_id)
+    except Exception as e:
+        st.warning(f"Could not load pitches: {db.error_message(e)}")
+        return
+    if not pitchers:
+        st.info("No pitches recorded for this game yet.")
+        return
+
+    labels = {pid: f"{name} ({n} pitches)" for pid, name, n in pitchers}
+    pitcher_id = st.selectbox("Pitcher", list(labels), format_func=labels.get, key="analytics_pitcher")
+    s = analytics.cache.pitcher(game_id, pitcher_id)
+
+    m1, m2, m3, m4, m5 = st.columns(5)
+    m1.metric("Pitches", s["pitches"])
+    m2.metric("Strike %", s["strike_pct"])
+    m3.metric("E %", s["wel_pct"]["E"])
+    m4.metric("W %", s["wel_pct"]["W"])
+    m5.metric("L %", s["wel_pct"]["L"])
+
+    season = game_dates[game_id][:4]
+    try:
+        line = rollups.season_line(pitcher_id, season) if season.isdigit() else None
+    except Exception:
+        line = None  # rollup tables not installed
+    if line:
+        st.caption(f"{season} season: {line['Pitches']} pitches, {line['StrikePct']}% strikes, "
+                   f"avg velo {line['AvgVelo'] or '—'}, {line['PA']} PA, {line['RunsScored']} R "
+                   f"({line['EarnedRuns']} ER)")
+
+    st.subheader("Pitch mix & velocity")
+    st.dataframe(s["mix"], hide_index=True, width="stretch")
+
+    st.subheader("Zone distribution")
+    if s["zones"]:
+        st.bar_chart({"Pitches": {str(z): n for z, n in s["zones"].items()}})
+    else:
+        st.caption("No zones recorded.")
+
+
+instrument.mark(st.session_state, "Pitcher report")
+pitcher_report()
+
+
+# -----------------------------
+# Zone heatmap & spray chart
+# -----------------------------
+# Every player in the game is binned on first view, so flipping between them
+# only slices arrays already in memory.
+@st.fragment(run_every=5 if live else None)
+@instrument.fragment("Analytics", "Charts")
+def player_charts():
+    st.subheader("Zone heatmap & spray chart")
+    c1, c2 = st.columns([1, 3])
+    role = c1.radio("Player", ["Pitcher", "Batter"], horizontal=True, key="charts_role")
+    role_col = "PitcherID" if role == "Pitcher" else "BatterID"
+    try:
+        players = charts.cache.players(game_id, role_col)
+    except Exception as e:
+        st.warning(f"Could not load pitches: {db.error_message(e)}")
+        return
+    if not players:
+        st.caption(f"No {role.lower()}s in this game yet.")
+        return
+    names = dict(players)
+    player_id = c2.selectbox(role, list(names), format_func=names.get, key=f"charts_{role_col}")
+
+    f1, f2, f3 = st.columns([1, 2, 1])
+    scope = f1.radio("Games", ["This game", "All games"], key="charts_scope")
+    types = f2.multiselect("Pitch types", charts.PITCH_TYPES, key="charts_types", placeholder="All")
+    wel = f3.multiselect("Count (WEL)", charts.WEL_STATES, key="charts_wel", placeholder="All")
+    scope_id = game_id if scope == "This game" else None
+
+    zones = charts.cache.zone_counts(player_id, role_col, scope_id, types, wel)
+    spray = charts.cache.spray_counts(player_id, role_col, scope_id, types)
+    h1, h2 = st.columns([2, 3])
+    with h1:
+        st.altair_chart(charts.heatmap_chart(zones), use_container_width=False)
+        st.caption(f"Pitches with a zone: {int(zones[1:].sum())}"
+                   + (f", {int(zones[0])} without" if zones[0] else "") + ". Catcher's view.")
+    with h2:
+        st.altair_chart(charts.spray_chart(spray), use_container_width=False)
+        st.caption(f"Balls in play with a hit direction: {int(spray.sum())}.")
+
+
+instrument.mark(st.session_state, "Charts")
+player_charts()
+
+instrument.render_panel(st.session_state)
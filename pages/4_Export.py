@@ -0,0 +1,80 @@
+import os
+from datetime import date
+
+import streamlit as st
+
+from core import db, export, instrument, refdata
+
+st.set_page_config(page_title="Export")
+instrument.begin("Export", st.session_state)
+instrument.render_health()
+
+if "game_pages" not in st.session_state:
+    st.session_state["game_pages"] = 1
+
+st.title("Export Data")
+st.caption("Games with their at-bats, pitches and runner events — one file per table, zipped.")
+
+# -----------------------------
+# Scope
+# -----------------------------
+instrument.mark(st.session_state, "Scope")
+scope_kind = st.radio("Export", ["One game", "Date range", "Team"], horizontal=True)
+scope = {}
+if scope_kind == "One game":
+    try:
+        games, more_games = refdata.games.pages(st.session_state["game_pages"])
+    except Exception as e:
+        st.warning(f"Could not load games: {db.error_message(e)}")
+        st.stop()
+    if not games:
+        st.info("No games yet.")
+        st.stop()
+    labels = {g["GameID"]: f"{g['GameDate']} - {g['HomeTeam']} vs {g['AwayTeam']}" for g in games}
+    scope["game_id"] = st.selectbox("Game", list(labels), format_func=labels.get)
+    if more_games and st.button("Load older games"):
+        st.session_state["game_pages"] += 1
+        st.rerun()
+elif scope_kind == "Date range":
+    c1, c2 = st.columns(2)
+    scope["date_from"] = c1.date_input("From", value=date(date.today().year, 1, 1))
+    scope["date_to"] = c2.date_input("To", value=date.today())
+else:
+    scope["team"] = st.text_input("Team (home or away)").strip()
+
+fmt = st.radio("Format", ["parquet", "csv"], horizontal=True)
+
+# -----------------------------
+# Build & download
+# -----------------------------
+# Only the zip's path is kept in the session; the file is removed once it has
+# been downloaded or a new export replaces it.
+def discard_export():
+    built = st.session_state.pop("export_file", None)
+    if built and os.path.exists(built[1]):
+        os.remove(built[1])
+
+
+instrument.mark(st.session_state, "Build")
+if st.button("Build export"):
+    if scope_kind == "Team" and not scope["team"]:
+        st.warning("Enter a team name.")
+    else:
+        discard_export()
+        try:
+            with st.spinner("Exporting…"):
+                path, counts = export.export_zip(fmt, **scope)
+        except Exception as e:
+            st.error(f"Export failed: {db.error_message(e)}")
+        else:
+            st.session_state["export_file"] = (f"pitch_tracker_{fmt}.zip", path, counts)
+
+built = st.session_state.get("export_file")
+if built and os.path.exists(built[1]):
+    name, path, counts = built
+    st.write(" | ".join(f"{t}: **{n}**" for t, n in counts.items()))
+    with open(path, "rb") as f:
+        st.download_button("Download export", data=f, file_name=name, mime="application/zip",
+                           on_click=discard_export)
+
+instrument.render_panel(st.session_state)
@@ -0,0 +1,88 @@
+import streamlit as st
+
+from core import db, instrument, live, refdata
+
+st.set_page_config(page_title="Live")
+instrument.begin("Live", st.session_state)
+instrument.render_health()
+
+if "game_pages" not in st.session_state:
+    st.session_state["game_pages"] = 1
+
+st.title("Live Game Feed")
+st.caption("Read-only. Updates arrive as pitches are logged — viewers never poll the database.")
+
+# -----------------------------
+# Game selection
+# -----------------------------
+instrument.mark(st.session_state, "Select")
+try:
+    games, more_games = refdata.games.pages(st.session_state["game_pages"])
+except Exception as e:
+    st.warning(f"Could not load games: {db.error_message(e)}")
+    st.stop()
+if not games:
+    st.info("No games yet.")
+    st.stop()
+
+game_labels = {g["GameID"]: f"{g['GameDate']} - {g['HomeTeam']} vs {g['AwayTeam']}" for g in games}
+game_ids = list(game_labels)
+current = st.session_state.get("selected_game_id")
+game_id = st.selectbox(
+    "Game", game_ids, format_func=game_labels.get,
+    index=game_ids.index(current) if current in game_ids else 0,
+)
+if more_games and st.button("Load older games"):
+    st.session_state["game_pages"] += 1
+    st.rerun()
+
+try:
+    hub = live.get_hub()
+    feed = hub.feed(game_id)
+except Exception as e:
+    st.error(f"Could not start the live feed: {db.error_message(e)}")
+    st.stop()
+
+
+# -----------------------------
+# Scoreboard & feed
+# -----------------------------
+# The fragment polls the in-memory feed every second but only redraws the
+# placeholder when the hub has applied a change (or the connection status
+# moved); a full rerun starts with an empty placeholder, so it always draws.
+board = st.empty()
+st.session_state["live_drawn"] = None
+
+
+@st.fragment(run_every=1)
+def scoreboard():
+    source = hub.source
+    status = getattr(source, "status", "SUBSCRIBED")
+    if st.session_state["live_drawn"] == (game_id, feed.version, status):
+        return
+    s = feed.snapshot()
+    st.session_state["live_drawn"] = (game_id, s["version"], status)
+
+    with board.container():
+        if status not in ("SUBSCRIBED", "connecting"):
+            st.warning(f"Realtime connection: {status} {source.error or ''}")
+
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Inning", s["inning"] or "—")
+        m2.metric("Count", f"{s['count'][0]}-{s['count'][1]}" if s["count"] else "—")
+        m3.metric("Runs", s["runs"])
+        m4.metric("Pitches", s["pitches"])
+        if s["batter"]:
+            st.markdown(f"**{s['batter']}** batting vs **{s['pitcher']}** ({s['pitcher_pitches']} pitches)")
+
+        st.subheader("Feed")
+        if not s["lines"]:
+            st.caption("Nothing logged yet.")
+        for line in s["lines"]:
+            st.text(f"{line['at']}  {line['text']}")
+
+
+instrument.mark(st.session_state, "Scoreboard")
+scoreboard()
+
+instrument.render_panel(st.session_state)
@@ -0,0 +1,28 @@
+-- Block allocation of global PitchNo values (core/numbering.py).
+--
+-- reserve_pitch_numbers(n) claims n consecutive numbers under a row lock and
+-- returns the first one, so concurrent sessions always get disjoint blocks.
+-- The unique indexes make any duplicate a hard error instead of silent bad
+-- data; clean up existing duplicates before applying them.
+
+create table if not exists "PitchNoCounter" (
+    id boolean primary key default true check (id),
+    last_value bigint not null
+);
+
+insert into "PitchNoCounter" (id, last_value)
+select true, coalesce(max("PitchNo"), 0) from "Pitches"
+on conflict (id) do nothing;
+
+create or replace function reserve_pitch_numbers(n integer default 20)
+returns bigint
+language sql
+as $$
+    update "PitchNoCounter"
+       set last_value = last_value + n
+     where id
+ returning last_value - n + 1;
+$$;
+
+create unique index if not exists pitches_pitchno_key on "Pitches" ("PitchNo");
+create unique index if not exists pitches_atbat_pitchofab_key on "Pitches" ("AtBatID", "PitchOfAB");
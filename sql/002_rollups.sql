@@ -0,0 +1,315 @@
+-- Per-game and per-season rollups maintained on write (core/rollups.py).
+--
+-- Row triggers on Pitches, AtBats and RunnerEvents add each row's
+-- contribution (updates subtract the old row and add the new one, deletes
+-- subtract), so a pitcher's or batter's line for a game or a season is one
+-- primary-key lookup. Role is 'P' (pitching line) or 'B' (batting/running
+-- line). Changing an at-bat's GameID, PitcherID or BatterID after pitches
+-- were logged does not move those pitches' contributions; run
+-- `python -m core.rollups rebuild --game ID` after such corrections.
+-- core/backends/sqlite_rollups.py mirrors this file for the SQLite backend.
+
+create table if not exists "PitchRollup" (
+    "GameID" bigint not null,
+    "PitcherID" bigint not null,
+    "BatterID" bigint not null,
+    "PitchType" text not null,
+    "PitchCalled" text not null,
+    "Pitches" integer not null default 0,
+    "VeloN" integer not null default 0,
+    "VeloSum" double precision not null default 0,
+    primary key ("GameID", "PitcherID", "BatterID", "PitchType", "PitchCalled")
+);
+
+create table if not exists "PlayResultRollup" (
+    "GameID" bigint not null,
+    "PitcherID" bigint not null,
+    "BatterID" bigint not null,
+    "PlayResult" text not null,
+    "N" integer not null default 0,
+    primary key ("GameID", "PitcherID", "BatterID", "PlayResult")
+);
+
+create table if not exists "GameLines" (
+    "GameID" bigint not null,
+    "PlayerID" bigint not null,
+    "Role" text not null,
+    "Pitches" integer not null default 0,
+    "StrikesCalled" integer not null default 0,
+    "SwingMiss" integer not null default 0,
+    "BallsCalled" integer not null default 0,
+    "Fouls" integer not null default 0,
+    "InPlay" integer not null default 0,
+    "VeloN" integer not null default 0,
+    "VeloSum" double precision not null default 0,
+    "PA" integer not null default 0,
+    "RunsScored" integer not null default 0,
+    "EarnedRuns" integer not null default 0,
+    "StolenBases" integer not null default 0,
+    "CaughtStealing" integer not null default 0,
+    "RunnerOuts" integer not null default 0,
+    primary key ("GameID", "PlayerID", "Role")
+);
+
+create table if not exists "SeasonLines" (
+    "Season" integer not null,
+    "PlayerID" bigint not null,
+    "Role" text not null,
+    "Pitches" integer not null default 0,
+    "StrikesCalled" integer not null default 0,
+    "SwingMiss" integer not null default 0,
+    "BallsCalled" integer not null default 0,
+    "Fouls" integer not null default 0,
+    "InPlay" integer not null default 0,
+    "VeloN" integer not null default 0,
+    "VeloSum" double precision not null default 0,
+    "PA" integer not null default 0,
+    "RunsScored" integer not null default 0,
+    "EarnedRuns" integer not null default 0,
+    "StolenBases" integer not null default 0,
+    "CaughtStealing" integer not null default 0,
+    "RunnerOuts" integer not null default 0,
+    primary key ("Season", "PlayerID", "Role")
+);
+
+-- Add deltas to one player's game line and season line.
+create or replace function _rollup_line(
+    p_game bigint, p_player bigint, p_role text,
+    d_pitches integer default 0, d_strikes_called integer default 0, d_swing_miss integer default 0,
+    d_balls_called integer default 0, d_fouls integer default 0, d_in_play integer default 0,
+    d_velo_n integer default 0, d_velo_sum double precision default 0,
+    d_pa integer default 0, d_runs integer default 0, d_earned integer default 0,
+    d_sb integer default 0, d_cs integer default 0, d_runner_outs integer default 0
+) returns void
+language plpgsql
+as $$
+declare
+    v_season integer;
+begin
+    if p_player is null or p_game is null then
+        return;
+    end if;
+    select coalesce(extract(year from "GameDate"::date)::integer, 0) into v_season
+      from "Games" where "GameID" = p_game;
+
+    insert into "GameLines" as l (
+        "GameID", "PlayerID", "Role", "Pitches", "StrikesCalled", "SwingMiss", "BallsCalled", "Fouls",
+        "InPlay", "VeloN", "VeloSum", "PA", "RunsScored", "EarnedRuns", "StolenBases", "CaughtStealing",
+        "RunnerOuts")
+    values (
+        p_game, p_player, p_role, d_pitches, d_strikes_called, d_swing_miss, d_balls_called, d_fouls,
+        d_in_play, d_velo_n, d_velo_sum, d_pa, d_runs, d_earned, d_sb, d_cs, d_runner_outs)
+    on conflict ("GameID", "PlayerID", "Role") do update set
+        "Pitches" = l."Pitches" + excluded."Pitches",
+        "StrikesCalled" = l."StrikesCalled" + excluded."StrikesCalled",
+        "SwingMiss" = l."SwingMiss" + excluded."SwingMiss",
+        "BallsCalled" = l."BallsCalled" + excluded."BallsCalled",
+        "Fouls" = l."Fouls" + excluded."Fouls",
+        "InPlay" = l."InPlay" + excluded."InPlay",
+        "VeloN" = l."VeloN" + excluded."VeloN",
+        "VeloSum" = l."VeloSum" + excluded."VeloSum",
+        "PA" = l."PA" + excluded."PA",
+        "RunsScored" = l."RunsScored" + excluded."RunsScored",
+        "EarnedRuns" = l."EarnedRuns" + excluded."EarnedRuns",
+        "StolenBases" = l."StolenBases" + excluded."StolenBases",
+        "CaughtStealing" = l."CaughtStealing" + excluded."CaughtStealing",
+        "RunnerOuts" = l."RunnerOuts" + excluded."RunnerOuts";
+
+    insert into "SeasonLines" as l (
+        "Season", "PlayerID", "Role", "Pitches", "StrikesCalled", "SwingMiss", "BallsCalled", "Fouls",
+        "InPlay", "VeloN", "VeloSum", "PA", "RunsScored", "EarnedRuns", "StolenBases", "CaughtStealing",
+        "RunnerOuts")
+    values (
+        v_season, p_player, p_role, d_pitches, d_strikes_called, d_swing_miss, d_balls_called, d_fouls,
+        d_in_play, d_velo_n, d_velo_sum, d_pa, d_runs, d_earned, d_sb, d_cs, d_runner_outs)
+    on conflict ("Season", "PlayerID", "Role") do update set
+        "Pitches" = l."Pitches" + excluded."Pitches",
+        "StrikesCalled" = l."StrikesCalled" + excluded."StrikesCalled",
+        "SwingMiss" = l."SwingMiss" + excluded."SwingMiss",
+        "BallsCalled" = l."BallsCalled" + excluded."BallsCalled",
+        "Fouls" = l."Fouls" + excluded."Fouls",
+        "InPlay" = l."InPlay" + excluded."InPlay",
+        "VeloN" = l."VeloN" + excluded."VeloN",
+        "VeloSum" = l."VeloSum" + excluded."VeloSum",
+        "PA" = l."PA" + excluded."PA",
+        "RunsScored" = l."RunsScored" + excluded."RunsScored",
+        "EarnedRuns" = l."EarnedRuns" + excluded."EarnedRuns",
+        "StolenBases" = l."StolenBases" + excluded."StolenBases",
+        "CaughtStealing" = l."CaughtStealing" + excluded."CaughtStealing",
+        "RunnerOuts" = l."RunnerOuts" + excluded."RunnerOuts";
+end;
+$$;
+
+create or replace function _rollup_pitch(p "Pitches", mult integer) returns void
+language plpgsql
+as $$
+declare
+    ab "AtBats";
+    velo double precision := coalesce(p."Velocity", 0);
+    c text := p."PitchCalled";
+begin
+    select * into ab from "AtBats" where "AtBatID" = p."AtBatID";
+    if not found then
+        return;
+    end if;
+
+    insert into "PitchRollup" as r ("GameID", "PitcherID", "BatterID", "PitchType", "PitchCalled",
+                                    "Pitches", "VeloN", "VeloSum")
+    values (ab."GameID", coalesce(ab."PitcherID", 0), coalesce(ab."BatterID", 0),
+            coalesce(p."PitchType", ''), coalesce(c, ''), mult, mult * (velo > 0)::integer, mult * velo)
+    on conflict ("GameID", "PitcherID", "BatterID", "PitchType", "PitchCalled") do update set
+        "Pitches" = r."Pitches" + excluded."Pitches",
+        "VeloN" = r."VeloN" + excluded."VeloN",
+        "VeloSum" = r."VeloSum" + excluded."VeloSum";
+
+    perform _rollup_line(ab."GameID", pid, role,
+        d_pitches => mult,
+        d_strikes_called => mult * (c is not distinct from 'Strike Called')::integer,
+        d_swing_miss => mult * (c is not distinct from 'Strike Swing Miss')::integer,
+        d_balls_called => mult * (c is not distinct from 'Ball Called')::integer,
+        d_fouls => mult * (c is not distinct from 'Foul Ball')::integer,
+        d_in_play => mult * (c is not distinct from 'In Play')::integer,
+        d_velo_n => mult * (velo > 0)::integer,
+        d_velo_sum => mult * velo)
+    from (values (ab."PitcherID", 'P'), (ab."BatterID", 'B')) as who (pid, role);
+end;
+$$;
+
+create or replace function _rollup_atbat(ab "AtBats", mult integer) returns void
+language plpgsql
+as $$
+begin
+    if ab."PlayResult" is not null then
+        insert into "PlayResultRollup" as r ("GameID", "PitcherID", "BatterID", "PlayResult", "N")
+        values (ab."GameID", coalesce(ab."PitcherID", 0), coalesce(ab."BatterID", 0), ab."PlayResult", mult)
+        on conflict ("GameID", "PitcherID", "BatterID", "PlayResult") do update set
+            "N" = r."N" + excluded."N";
+    end if;
+
+    perform _rollup_line(ab."GameID", pid, role,
+        d_pa => mult * (ab."PlayResult" is not null)::integer,
+        d_runs => mult * coalesce(ab."RunsScored", 0),
+        d_earned => mult * coalesce(ab."EarnedRuns", 0))
+    from (values (ab."PitcherID", 'P'), (ab."BatterID", 'B')) as who (pid, role);
+end;
+$$;
+
+create or replace function _rollup_runner(e "RunnerEvents", mult integer) returns void
+language plpgsql
+as $$
+declare
+    ab "AtBats";
+begin
+    select a.* into ab
+      from "Pitches" p join "AtBats" a on a."AtBatID" = p."AtBatID"
+     where p."PitchID" = e."PitchID";
+    if not found then
+        return;
+    end if;
+
+    perform _rollup_line(ab."GameID", pid, role,
+        d_sb => mult * (e."EventType" is not distinct from 'Stolen Base')::integer,
+        d_cs => mult * (e."EventType" is not distinct from 'Caught Stealing')::integer,
+        d_runner_outs => mult * coalesce(e."OutRecorded", false)::integer)
+    from (values (ab."PitcherID", 'P'), (e."RunnerID", 'B')) as who (pid, role);
+end;
+$$;
+
+create or replace function pitches_rollup_trg() returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform _rollup_pitch(old, -1);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform _rollup_pitch(new, 1);
+    end if;
+    return null;
+end;
+$$;
+
+create or replace function atbats_rollup_trg() returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform _rollup_atbat(old, -1);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform _rollup_atbat(new, 1);
+    end if;
+    return null;
+end;
+$$;
+
+create or replace function runnerevents_rollup_trg() returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform _rollup_runner(old, -1);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform _rollup_runner(new, 1);
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists pitches_rollup on "Pitches";
+create trigger pitches_rollup after insert or update or delete on "Pitches"
+    for each row execute function pitches_rollup_trg();
+
+drop trigger if exists atbats_rollup on "AtBats";
+create trigger atbats_rollup after insert or update or delete on "AtBats"
+    for each row execute function atbats_rollup_trg();
+
+drop trigger if exists runnerevents_rollup on "RunnerEvents";
+create trigger runnerevents_rollup after insert or update or delete on "RunnerEvents"
+    for each row execute function runnerevents_rollup_trg();
+
+-- Recompute the rollups of one game (or of every game when game_id is null)
+-- by replaying its rows through the same functions; season lines of the
+-- affected seasons are then re-summed from their game lines.
+create or replace function rebuild_rollups(game_id bigint default null) returns integer
+language plpgsql
+as $$
+declare
+    n integer;
+    seasons integer[];
+begin
+    select array_agg(distinct coalesce(extract(year from g."GameDate"::date)::integer, 0)), count(*)
+      into seasons, n
+      from "Games" g where rebuild_rollups.game_id is null or g."GameID" = rebuild_rollups.game_id;
+
+    delete from "PitchRollup" r where rebuild_rollups.game_id is null or r."GameID" = rebuild_rollups.game_id;
+    delete from "PlayResultRollup" r where rebuild_rollups.game_id is null or r."GameID" = rebuild_rollups.game_id;
+    delete from "GameLines" r where rebuild_rollups.game_id is null or r."GameID" = rebuild_rollups.game_id;
+
+    perform _rollup_atbat(a, 1) from "AtBats" a
+     where rebuild_rollups.game_id is null or a."GameID" = rebuild_rollups.game_id;
+    perform _rollup_pitch(p, 1) from "Pitches" p join "AtBats" a on a."AtBatID" = p."AtBatID"
+     where rebuild_rollups.game_id is null or a."GameID" = rebuild_rollups.game_id;
+    perform _rollup_runner(e, 1) from "RunnerEvents" e
+      join "Pitches" p on p."PitchID" = e."PitchID"
+      join "AtBats" a on a."AtBatID" = p."AtBatID"
+     where rebuild_rollups.game_id is null or a."GameID" = rebuild_rollups.game_id;
+
+    delete from "SeasonLines" where "Season" = any(seasons);
+    insert into "SeasonLines" (
+        "Season", "PlayerID", "Role", "Pitches", "StrikesCalled", "SwingMiss", "BallsCalled", "Fouls",
+        "InPlay", "VeloN", "VeloSum", "PA", "RunsScored", "EarnedRuns", "StolenBases", "CaughtStealing",
+        "RunnerOuts")
+    select coalesce(extract(year from g."GameDate"::date)::integer, 0), l."PlayerID", l."Role",
+           sum(l."Pitches"), sum(l."StrikesCalled"), sum(l."SwingMiss"), sum(l."BallsCalled"), sum(l."Fouls"),
+           sum(l."InPlay"), sum(l."VeloN"), sum(l."VeloSum"), sum(l."PA"), sum(l."RunsScored"),
+           sum(l."EarnedRuns"), sum(l."StolenBases"), sum(l."CaughtStealing"), sum(l."RunnerOuts")
+      from "GameLines" l join "Games" g on g."GameID" = l."GameID"
+     where coalesce(extract(year from g."GameDate"::date)::integer, 0) = any(seasons)
+     group by 1, 2, 3;
+    return n;
+end;
+$$;
+
+select rebuild_rollups();
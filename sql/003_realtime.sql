@@ -0,0 +1,28 @@
+-- Publish pitch-tracking changes to Supabase Realtime (core/live.py).
+--
+-- The Live page subscribes to postgres_changes on these tables; one
+-- subscription per app process is fanned out to every viewer in memory.
+-- replica identity full makes deletes carry the whole old row, so a viewer
+-- can tell which game a removed pitch belonged to.
+
+alter table "AtBats" replica identity full;
+alter table "Pitches" replica identity full;
+alter table "RunnerEvents" replica identity full;
+
+do $$
+declare
+    t text;
+begin
+    if not exists (select 1 from pg_publication where pubname = 'supabase_realtime') then
+        create publication supabase_realtime;
+    end if;
+    foreach t in array array['AtBats', 'Pitches', 'RunnerEvents'] loop
+        if not exists (
+            select 1 from pg_publication_tables
+            where pubname = 'supabase_realtime' and schemaname = 'public' and tablename = t
+        ) then
+            execute format('alter publication supabase_realtime add table public.%I', t);
+        end if;
+    end loop;
+end;
+$$;
@@ -0,0 +1,43 @@
+-- One-call write paths for the Tracker (core/db.py log_pitches).
+--
+-- log_pitches(pitches) inserts a batch of pitches, each with the runner
+-- events listed under its "RunnerEvents" key, in one transaction, so a pitch
+-- and the stolen base on it land together or not at all. Returns the pitch
+-- rows, each with its inserted "RunnerEvents" rows, as a JSON array in input
+-- order. core/backends/sqlite_backend.py mirrors it as rpc_log_pitches.
+
+create or replace function log_pitches(pitches jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    p jsonb;
+    pitch "Pitches";
+    events jsonb;
+    out jsonb := '[]'::jsonb;
+begin
+    for p in select value from jsonb_array_elements(pitches) loop
+        insert into "Pitches" (
+            "AtBatID", "PitchNo", "PitchOfAB", "PitchType", "Velocity", "Zone", "PitchCalled",
+            "WEL", "Balls", "Strikes", "TaggedHit", "HitDirection", "KPI"
+        )
+        select r."AtBatID", r."PitchNo", r."PitchOfAB", r."PitchType", r."Velocity", r."Zone", r."PitchCalled",
+               r."WEL", r."Balls", r."Strikes", r."TaggedHit", r."HitDirection", r."KPI"
+          from jsonb_populate_record(null::"Pitches", p) r
+        returning * into pitch;
+
+        with inserted as (
+            insert into "RunnerEvents" ("PitchID", "RunnerID", "StartBase", "EndBase", "EventType", "OutRecorded")
+            select pitch."PitchID", e."RunnerID", e."StartBase", e."EndBase", e."EventType",
+                   coalesce(e."OutRecorded", false)
+              from jsonb_populate_recordset(null::"RunnerEvents", coalesce(p -> 'RunnerEvents', '[]'::jsonb)) e
+            returning *
+        )
+        select coalesce(jsonb_agg(to_jsonb(inserted) order by "RunnerEventID"), '[]'::jsonb)
+          into events from inserted;
+
+        out := out || jsonb_build_array(to_jsonb(pitch) || jsonb_build_object('RunnerEvents', events));
+    end loop;
+    return out;
+end;
+$$;
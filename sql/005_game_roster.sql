@@ -0,0 +1,21 @@
+-- Per-game lineup and pitching staff shared by every device (core/roster.py).
+--
+-- Role is 'H' (hitter) or 'P' (pitcher); a two-way player has one row per
+-- role. Hitters carry their BatOrder slot; a substitution deactivates the
+-- slot's current row (Active false, ExitedInning set) and adds the new
+-- player to the same slot. Pitchers on the staff are listed up front; the
+-- one on the mound is the row with EnteredInning set and ExitedInning null.
+-- core/backends/sqlite_backend.py mirrors this table.
+
+create table if not exists "GameRoster" (
+    "RosterID" bigint generated by default as identity primary key,
+    "GameID" bigint not null references "Games" ("GameID") on delete cascade,
+    "PlayerID" bigint not null references "Players" ("PlayerID"),
+    "Role" text not null check ("Role" in ('H', 'P')),
+    "BatOrder" integer,
+    "Active" boolean not null default true,
+    "EnteredInning" integer,
+    "ExitedInning" integer
+);
+
+create unique index if not exists gameroster_player_key on "GameRoster" ("GameID", "Role", "PlayerID");
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core import backends, db  # noqa: E402
+from core.backends.sqlite_backend import SQLiteBackend  # noqa: E402
+
+
+@pytest.fixture
+def backend(tmp_path):
+    """A fresh SQLite backend (a file, so other threads can share it) installed as the app's backend."""
+    previous = backends._backend
+    be = db.set_backend(SQLiteBackend(str(tmp_path / "app.sqlite3")))
+    yield be
+    db.set_backend(previous)
+
+
+@pytest.fixture
+def atbat(backend):
+    """(GameID, AtBatID) of an open at-bat with a batter and a pitcher."""
+    ids = db.ensure_players([{"Name": "Test Hitter"}, {"Name": "Test Pitcher"}])
+    game_id = db.create_game("Home", "Away", "2026-06-01")
+    return game_id, db.create_atbat(game_id, ids["Test Hitter"], ids["Test Pitcher"], 1)
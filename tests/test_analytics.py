@@ -0,0 +1,50 @@
+import pytest
+
+from core import analytics, db
+from core.backends import write_listeners
+
+pytest.importorskip("pandas")
+
+
+def pitch(atbat_id, no, called="Strike Called"):
+    return {"AtBatID": atbat_id, "PitchNo": no, "PitchOfAB": no, "PitchType": "Fastball", "PitchCalled": called}
+
+
+@pytest.fixture
+def cache():
+    c = analytics.AnalyticsCache()
+    db.on_write(c.on_write)
+    yield c
+    write_listeners.remove(c.on_write)
+
+
+def test_a_pitch_written_during_the_load_is_counted(backend, atbat, cache, monkeypatch):
+    game_id, atbat_id = atbat
+    pitcher_id = db.get_backend().select("AtBats", "PitcherID", where=[("AtBatID", "eq", atbat_id)])[0]["PitcherID"]
+    backend.insert("Pitches", [pitch(atbat_id, 1)])
+    load_pitches = db.load_pitches
+
+    def racing_load(**kw):
+        rows = load_pitches(**kw)
+        backend.insert("Pitches", [pitch(atbat_id, 2, "Ball Called")])  # lands after the load's select
+        return rows
+
+    monkeypatch.setattr(db, "load_pitches", racing_load)
+    assert cache.pitcher(game_id, pitcher_id)["pitches"] == 2
+    monkeypatch.setattr(db, "load_pitches", load_pitches)
+    backend.insert("Pitches", [pitch(atbat_id, 3)])
+    assert cache.pitcher(game_id, pitcher_id)["pitches"] == 3
+
+
+def test_a_correction_during_the_load_marks_the_game_stale(backend, atbat, cache, monkeypatch):
+    game_id, atbat_id = atbat
+    first = backend.insert("Pitches", [pitch(atbat_id, 1)])[0]["PitchID"]
+    load_pitches = db.load_pitches
+
+    def racing_load(**kw):
+        rows = load_pitches(**kw)
+        backend.update("Pitches", {"PitchCalled": "Ball Called"}, where=[("PitchID", "eq", first)])
+        return rows
+
+    monkeypatch.setattr(db, "load_pitches", racing_load)
+    assert cache.game(game_id).stale
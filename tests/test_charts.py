@@ -0,0 +1,15 @@
+import numpy as np
+import pytest
+
+from core import charts
+
+pytest.importorskip("altair")
+
+
+def test_heatmap_draws_every_zone_the_caption_counts():
+    counts = np.arange(charts.N_ZONES)
+    spec = charts.heatmap_chart(counts).to_dict()
+    cells = spec["data"]["values"] if "values" in spec["data"] else spec["datasets"][spec["data"]["name"]]
+    drawn = {c["Zone"]: c["Pitches"] for c in cells}
+    assert sorted(drawn) == list(range(1, charts.N_ZONES))
+    assert sum(drawn.values()) == counts[1:].sum()
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from bench.common import play_atbat, setup_session, synthetic_game
+from core import counts, db
+from core.outbox import DirectWriter
+
+pd = pytest.importorskip("pandas")
+
+
+def scalar(pitches):
+    """Balls/Strikes/WEL/PitchOfAB of each pitch via the one-pitch-at-a-time engine."""
+    out = {}
+    for _, ab in pitches.sort_values(["AtBatID", "PitchNo"]).groupby("AtBatID"):
+        state = (0, 0)
+        for i, (pid, called) in enumerate(zip(ab["PitchID"], ab["PitchCalled"]), 1):
+            state = counts.apply_call(*state, called)
+            out[pid] = (*state, counts.compute_wel(*state), i)
+    return out
+
+
+def vectorized(pitches):
+    fixed = counts.recompute(pitches)
+    return {r.PitchID: (r.Balls, r.Strikes, r.WEL, r.PitchOfAB) for r in fixed.itertuples()}
+
+
+def test_recompute_matches_the_tracker_on_a_replayed_game(backend):
+    state = setup_session("Counts")
+    timings = {"start_atbat": [], "pitch": [], "finish_atbat": []}
+    for play in synthetic_game(seed=9, atbats=30):
+        play_atbat(state, DirectWriter(), play, timings)
+    pitches = pd.DataFrame(db.load_pitches(game_ids=[state["selected_game_id"]]))
+
+    assert vectorized(pitches) == scalar(pitches)
+    stored = {r.PitchID: (r.Balls, r.Strikes, r.WEL, r.PitchOfAB) for r in pitches.itertuples()}
+    assert vectorized(pitches) == stored
+    assert counts.diff(pitches).empty
+
+
+def test_recompute_matches_the_scalar_engine_on_shuffled_rows():
+    rng = random.Random(4)
+    calls = list(counts.CALLS) + [None, "HitByPitch"]
+    rows = [{"PitchID": i, "AtBatID": rng.randint(1, 40), "PitchNo": i, "PitchCalled": rng.choice(calls)}
+            for i in range(1, 600)]
+    rng.shuffle(rows)
+    pitches = pd.DataFrame(rows)
+    assert vectorized(pitches) == scalar(pitches)
+
+
+def test_recount_tail_after_an_edit_matches_a_full_replay():
+    rng = random.Random(7)
+    for _ in range(200):
+        atbat = [{"PitchCalled": rng.choice(counts.CALLS)} for _ in range(rng.randint(1, 9))]
+        counts.recount_tail(atbat)
+        edit = rng.randrange(len(atbat))
+        atbat[edit]["PitchCalled"] = rng.choice(counts.CALLS)
+        changed = counts.recount_tail(atbat, edit)
+
+        expected = list(counts.replay(p["PitchCalled"] for p in atbat))
+        assert [(p["Balls"], p["Strikes"], p["WEL"]) for p in atbat] == expected
+        assert all(i >= edit for i in changed)
+
+
+def test_diff_finds_corrupted_rows(backend):
+    state = setup_session("Diff")
+    timings = {"start_atbat": [], "pitch": [], "finish_atbat": []}
+    for play in synthetic_game(seed=3, atbats=5):
+        play_atbat(state, DirectWriter(), play, timings)
+    pitches = pd.DataFrame(db.load_pitches(game_ids=[state["selected_game_id"]]))
+    bad = pitches["PitchID"].iloc[[1, 4]].tolist()
+    pitches.loc[pitches["PitchID"].isin(bad), "Strikes"] = 3
+    assert sorted(counts.diff(pitches)["PitchID"]) == sorted(bad)
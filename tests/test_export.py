@@ -0,0 +1,22 @@
+import pytest
+
+from bench.common import play_atbat, setup_session, synthetic_game
+from core import export
+from core.outbox import DirectWriter
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def test_small_pages_are_buffered_into_page_size_row_groups(backend, tmp_path):
+    state = setup_session("Export")
+    timings = {"start_atbat": [], "pitch": [], "finish_atbat": []}
+    for play in synthetic_game(seed=3, atbats=60, runner_rate=0.3):
+        play_atbat(state, DirectWriter(), play, timings)
+
+    counts = export.export(tmp_path, "parquet", page_size=50)
+
+    assert counts["Pitches"] == len(timings["pitch"])
+    for table, n in counts.items():
+        meta = pq.ParquetFile(tmp_path / f"{table}.parquet").metadata
+        assert meta.num_rows == n
+        assert meta.num_row_groups <= max(1, -(-n // 50))
@@ -0,0 +1,79 @@
+import sqlite3
+
+import pytest
+
+from bench.import_season import write_season
+from core import counts, db, importer
+from core.backends.sqlite_backend import SQLiteBackend
+
+
+def table_counts():
+    be = db.get_backend()
+    return {t: len(be.select(t, "*")) for t in ("Games", "Players", "AtBats", "Pitches")}
+
+
+@pytest.fixture
+def season(tmp_path):
+    path = tmp_path / "season.csv"
+    rows = write_season(path, 1500, seed=2)
+    with open(path, newline="") as f:
+        atbats = list(importer.read_atbats(f))
+    return path, rows, atbats
+
+
+def test_an_interrupted_import_resumes_without_duplicates(backend, season, tmp_path, monkeypatch):
+    path, rows, atbats = season
+    checkpoint = tmp_path / "checkpoint.sqlite3"
+    monkeypatch.setattr(importer, "INSERT_BATCH", 100)
+
+    # The connection drops part way through a chunk's pitches and nothing can be undone.
+    insert, delete, sent = backend._insert, backend._delete, []
+
+    def flaky_insert(table, rows):
+        if table == "Pitches":
+            sent.append(len(rows))
+            if len(sent) >= 8:
+                raise RuntimeError("connection lost")
+        return insert(table, rows)
+
+    def flaky_delete(table, where):
+        if len(sent) >= 8:
+            raise RuntimeError("connection lost")
+        return delete(table, where)
+
+    monkeypatch.setattr(backend, "_insert", flaky_insert)
+    monkeypatch.setattr(backend, "_delete", flaky_delete)
+    with pytest.raises(RuntimeError):
+        importer.Importer(checkpoint, workers=1, chunk=300).run(path)
+    assert 0 < table_counts()["Pitches"] < rows
+    with sqlite3.connect(checkpoint) as ck:
+        assert ck.execute("SELECT count(*) FROM import_chunks WHERE status = 'started'").fetchone()[0] >= 1
+
+    # A new process (fresh backend on the same database) runs the same import again.
+    db.set_backend(SQLiteBackend(backend.path))
+    report = importer.Importer(checkpoint, workers=2, chunk=300).run(path)
+    assert report["skipped_chunks"] > 0
+    after = table_counts()
+    assert after["Pitches"] == rows
+    assert after["AtBats"] == len(atbats)
+    assert after["Games"] == len({ab["game"] for ab in atbats})
+    assert after["Players"] == len({n for ab in atbats for n in (ab["batter"], ab["pitcher"])})
+
+    # Running a finished import again changes nothing.
+    again = importer.Importer(checkpoint, workers=2, chunk=300).run(path)
+    assert (again["atbats"], again["pitches"]) == (0, 0)
+    assert table_counts() == after
+
+
+def test_imported_counts_match_the_tracker_rules(backend, season, tmp_path):
+    path, rows, _ = season
+    importer.Importer(tmp_path / "checkpoint.sqlite3", workers=1, chunk=500).run(path)
+    pitches = db.get_backend().select("Pitches", order=("AtBatID", "PitchOfAB"))
+    assert len(pitches) == rows
+    assert len({p["PitchNo"] for p in pitches}) == rows
+    by_atbat = {}
+    for p in pitches:
+        by_atbat.setdefault(p["AtBatID"], []).append(p)
+    for atbat in by_atbat.values():
+        expected = list(counts.replay(p["PitchCalled"] for p in atbat))
+        assert [(p["Balls"], p["Strikes"], p["WEL"]) for p in atbat] == expected
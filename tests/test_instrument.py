@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from bench.common import setup_session
+
+pytest.importorskip("streamlit")
+
+TRACKER_PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pages", "2_Tracker.py")
+
+
+@pytest.fixture
+def fragment_reruns(monkeypatch):
+    """Let AppTest run a single fragment, as a click inside one does in the browser.
+
+    AppTest always reruns the whole script with a fresh fragment storage, so
+    share one storage across runs and scope the next run to fragment["id"].
+    """
+    from streamlit.runtime import fragment
+    from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+    from streamlit.testing.v1 import local_script_runner
+
+    shared = fragment.MemoryFragmentStorage()
+    state = {"id": None, "registered": []}
+    original_set = fragment.MemoryFragmentStorage.set
+
+    def record(self, key, value):
+        state["registered"].append(key)
+        return original_set(self, key, value)
+
+    def rerun_data(**kwargs):
+        if state["id"]:
+            kwargs.update(fragment_id_queue=[state["id"]], is_fragment_scoped_rerun=True)
+        return RerunData(**kwargs)
+
+    monkeypatch.setattr(fragment.MemoryFragmentStorage, "set", record)
+    monkeypatch.setattr(local_script_runner, "MemoryFragmentStorage", lambda: shared)
+    monkeypatch.setattr(local_script_runner, "RerunData", rerun_data)
+    return state
+
+
+def widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def test_fragment_only_submit_pitch_is_traced(backend, tmp_path, monkeypatch, fragment_reruns):
+    from streamlit.testing.v1 import AppTest
+
+    monkeypatch.setenv("PITCH_OUTBOX_PATH", str(tmp_path / "outbox.sqlite3"))
+    game = setup_session("Trace")
+    at = AppTest.from_file(TRACKER_PAGE, default_timeout=60)
+    at.session_state["selected_game_id"] = game["selected_game_id"]
+    at.session_state["instrumentation_on"] = True
+    at.run()
+    widget(at.selectbox, "Select Batter").set_value(game["roster"].lineup[0]["Name"])
+    widget(at.selectbox, "Select Pitcher").set_value(game["roster"].pitchers[0]["Name"])
+    widget(at.button, "Start AtBat").click().run()
+
+    fragment_reruns["registered"].clear()
+    at.run()
+    fragment_reruns["id"] = fragment_reruns["registered"][1]  # select_atbat, pitch_entry, ...
+    widget(at.radio, "Select Type").set_value("Fastball")
+    widget(at.radio, "Select Result").set_value("Ball Called")
+    widget(at.button, "Submit Pitch").click().run()
+
+    assert not at.exception
+    assert at.session_state["balls"] == 1
+    latest = at.session_state["instrument_history"][0]
+    assert latest["name"] == "Tracker: Pitch Entry" and latest["status"] == "ok"
+    assert [s["name"] for s in latest["sections"]] == ["Pitch Entry"]
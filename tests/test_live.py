@@ -0,0 +1,29 @@
+import time
+
+import pytest
+
+from core import live
+
+pytest.importorskip("realtime")
+pytest.importorskip("websockets")
+
+
+def test_realtime_url_matches_supabase_py():
+    assert live.realtime_url("https://abc.supabase.co/") == "wss://abc.supabase.co/realtime/v1"
+    assert live.realtime_url("http://127.0.0.1:54321") == "ws://127.0.0.1:54321/realtime/v1"
+
+
+def test_feed_subscribes_only_on_the_realtime_path(backend):
+    server = live.LocalRealtimeServer().start()
+    wrong = live.RealtimeSource(live.LiveHub(), server.url, "key")
+    right = live.RealtimeSource(live.LiveHub(), live.realtime_url(server.url), "key")
+    try:
+        assert right.wait_ready(5) and right.status == "SUBSCRIBED"
+        time.sleep(0.2)
+        assert wrong.status != "SUBSCRIBED"
+    finally:
+        for source in (wrong, right):
+            source.close()
+        server.stop()
+    # Nothing left pending: both sources (one still retrying) and the server shut down their loops.
+    assert all(x._loop.is_closed() for x in (wrong, right, server))
@@ -0,0 +1,68 @@
+import pytest
+
+from core import db
+from core.outbox import Outbox
+
+
+def pitch(atbat_id, pitch_no, pitch_of_ab):
+    return db.pitch_payload(atbat_id, pitch_no, pitch_of_ab, "Fastball", 90.0, 5, "Ball Called",
+                            1, 0, "E", None, None, None)
+
+
+def flush_all(outbox):
+    while outbox.flush_once():
+        pass
+
+
+def stored(backend):
+    return sorted(r["PitchNo"] for r in backend.select("Pitches", "PitchNo"))
+
+
+def test_rejected_pitch_is_set_aside_and_the_queue_keeps_flowing(backend, atbat, tmp_path):
+    _, atbat_id = atbat
+    db.log_pitches([pitch(atbat_id, 1, 1)])
+    outbox = Outbox(tmp_path / "outbox.sqlite3")
+    outbox.enqueue("pitch", pitch(atbat_id, 2, 2))
+    bad = outbox.enqueue("pitch", pitch(atbat_id, 1, 3))  # PitchNo 1 is already taken
+    outbox.enqueue("runner_event", {"_pitch_ref": bad, "RunnerID": 1, "StartBase": 1, "EventType": "Pickoff"})
+    outbox.enqueue("pitch", pitch(atbat_id, 3, 4))
+
+    flush_all(outbox)
+
+    assert stored(backend) == [1, 2, 3]
+    assert outbox.pending_count() == 0
+    assert outbox.dead_count() == 2
+    dead = outbox.dead()
+    assert [(ref, kind) for ref, kind, _, _ in dead] == [(bad, "pitch"), (bad + 1, "runner_event")]
+    assert "UNIQUE" in dead[0][3]
+    assert backend.select("RunnerEvents", "*") == []
+
+
+def test_requeued_dead_letters_are_sent_once_fixed(backend, atbat, tmp_path):
+    _, atbat_id = atbat
+    db.log_pitches([pitch(atbat_id, 1, 1)])
+    outbox = Outbox(tmp_path / "outbox.sqlite3")
+    outbox.enqueue("pitch", pitch(atbat_id, 1, 2))
+    flush_all(outbox)
+    assert outbox.dead_count() == 1
+
+    backend.delete("Pitches", where=[("PitchNo", "eq", 1)])
+    assert outbox.requeue_dead() == 1
+    flush_all(outbox)
+
+    assert outbox.dead_count() == 0 and outbox.pending_count() == 0
+    assert stored(backend) == [1]
+
+
+def test_transient_failure_keeps_the_batch_queued(backend, atbat, tmp_path, monkeypatch):
+    _, atbat_id = atbat
+    outbox = Outbox(tmp_path / "outbox.sqlite3")
+    outbox.enqueue("pitch", pitch(atbat_id, 1, 1))
+
+    def unreachable(*args):
+        raise ConnectionRefusedError("connection refused")
+
+    monkeypatch.setattr(backend, "_rpc", unreachable)
+    with pytest.raises(ConnectionRefusedError):
+        outbox.flush_once()
+    assert outbox.pending_count() == 1 and outbox.dead_count() == 0
@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from core import db
+from core.backends.sqlite_backend import SQLiteBackend
+from core.numbering import PitchNumbers
+
+
+def run_sessions(n, target):
+    errors = []
+
+    def guarded(i):
+        try:
+            target(i)
+        except Exception as e:  # surfaced by the assertion below
+            errors.append(e)
+
+    threads = [threading.Thread(target=guarded, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+
+
+def test_concurrent_sessions_never_share_a_pitch_no(backend, atbat):
+    game_id, _ = atbat
+    ids = db.ensure_players([{"Name": "Test Hitter"}, {"Name": "Test Pitcher"}])
+    sessions, pitches = 8, 30
+
+    def scout(i):
+        atbat_id = db.create_atbat(game_id, ids["Test Hitter"], ids["Test Pitcher"], i + 1)
+        numbers = PitchNumbers(db.reserve_pitch_numbers, block_size=7)
+        numbers.start_atbat(atbat_id)
+        for _ in range(pitches):
+            pno, poab = numbers.take()
+            db.log_pitches([db.pitch_payload(atbat_id, pno, poab, "Fastball", None, None, "Ball Called",
+                                             0, 0, "E", None, None, None)])
+
+    run_sessions(sessions, scout)
+
+    rows = backend.select("Pitches", "AtBatID, PitchNo, PitchOfAB")
+    assert len(rows) == sessions * pitches
+    assert len({r["PitchNo"] for r in rows}) == len(rows)
+    by_atbat = {}
+    for r in rows:
+        by_atbat.setdefault(r["AtBatID"], []).append(r["PitchOfAB"])
+    assert all(sorted(v) == list(range(1, pitches + 1)) for v in by_atbat.values())
+
+
+def test_counter_rpc_hands_out_disjoint_blocks_across_connections(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    servers = [SQLiteBackend(path) for _ in range(6)]  # one connection each, like separate server processes
+    blocks = []
+
+    def server(i):
+        be = servers[i]
+        for _ in range(40):
+            blocks.append(be.rpc_reserve_pitch_numbers(n=3))
+
+    run_sessions(6, server)
+
+    numbers = [first + k for first in blocks for k in range(3)]
+    assert len(numbers) == len(set(numbers)) == 6 * 40 * 3
+
+
+def test_reserve_falls_back_only_when_the_rpc_is_missing(backend, atbat, monkeypatch):
+    _, atbat_id = atbat
+    monkeypatch.setattr(db, "_missing_rpcs", set())
+    db.log_pitches([db.pitch_payload(atbat_id, 41, 1, "Fastball", None, None, "Ball Called",
+                                     1, 0, "E", None, None, None)])
+
+    def unreachable(fn, params):
+        raise ConnectionRefusedError("connection refused")
+
+    monkeypatch.setattr(backend, "_rpc", unreachable)
+    with pytest.raises(ConnectionRefusedError):
+        db.reserve_pitch_numbers(20)
+    assert db._missing_rpcs == set()
+
+    def missing(fn, params):
+        raise ValueError(f"Unknown RPC: {fn}")
+
+    monkeypatch.setattr(backend, "_rpc", missing)
+    assert db.reserve_pitch_numbers(20) == 42
+    assert "reserve_pitch_numbers" in db._missing_rpcs
@@ -0,0 +1,32 @@
+import pytest
+
+from core.backends import resilience, stats
+
+httpx = pytest.importorskip("httpx")
+
+
+@pytest.mark.parametrize("exc", [
+    httpx.ReadTimeout("read"), httpx.WriteTimeout("write"), httpx.PoolTimeout("pool"),
+    httpx.ConnectTimeout("connect"), resilience.DeadlineExceeded("deadline"), TimeoutError("builtin"),
+])
+def test_httpx_and_builtin_timeouts_count_as_timeouts(exc):
+    assert resilience.is_timeout(exc)
+
+
+def test_other_errors_are_not_timeouts():
+    assert not resilience.is_timeout(httpx.ConnectError("refused"))
+    assert not resilience.is_timeout(ValueError("bad row"))
+
+
+def test_read_timeouts_reach_the_timeouts_counter(backend, monkeypatch):
+    monkeypatch.setattr(resilience, "ATTEMPTS", 2)
+
+    def slow(*args):
+        raise httpx.ReadTimeout("timed out")
+
+    monkeypatch.setattr(backend, "_select", slow)
+    stats.reset()
+    with pytest.raises(httpx.ReadTimeout):
+        backend.select("Games", "GameID")
+    row = next(r for r in stats.snapshot() if r["table"] == "Games" and r["op"] == "select")
+    assert row["timeouts"] == 2 and row["retries"] == 1
@@ -0,0 +1,95 @@
+from collections import Counter
+
+import pytest
+
+from bench.common import play_atbat, setup_session, synthetic_game
+from core import db, rollups
+from core.backends.sqlite_rollups import LINE_COLUMNS, ROLLUP_TABLES
+from core.outbox import DirectWriter
+
+
+def play(label, gamedate, seed):
+    state = setup_session(label, gamedate)
+    timings = {"start_atbat": [], "pitch": [], "finish_atbat": []}
+    for p in synthetic_game(seed=seed, atbats=20, runner_rate=0.3):
+        play_atbat(state, DirectWriter(), p, timings)
+    return state
+
+
+def expected_pitching(game_ids):
+    """Pitcher lines counted straight from Pitches, AtBats and RunnerEvents: {(GameID, PitcherID): Counter}."""
+    be = db.get_backend()
+    atbats = {a["AtBatID"]: a for a in be.select("AtBats", where=[("GameID", "in", game_ids)])}
+    pitches = be.select("Pitches", where=[("AtBatID", "in", list(atbats))])
+    events = be.select("RunnerEvents", where=[("PitchID", "in", [p["PitchID"] for p in pitches])])
+    pitch_atbat = {p["PitchID"]: atbats[p["AtBatID"]] for p in pitches}
+    lines = {}
+
+    def line(ab):
+        return lines.setdefault((ab["GameID"], ab["PitcherID"]), Counter())
+
+    for ab in atbats.values():
+        line(ab).update(PA=ab["PlayResult"] is not None, RunsScored=ab["RunsScored"] or 0)
+    for p in pitches:
+        c = line(atbats[p["AtBatID"]])
+        c.update(Pitches=1, BallsCalled=p["PitchCalled"] == "Ball Called", InPlay=p["PitchCalled"] == "In Play",
+                 VeloN=bool(p["Velocity"]))
+    for e in events:
+        line(pitch_atbat[e["PitchID"]]).update(StolenBases=e["EventType"] == "Stolen Base",
+                                               RunnerOuts=bool(e["OutRecorded"]))
+    return lines
+
+
+def assert_lines_match(game_ids):
+    for (game_id, pitcher_id), want in expected_pitching(game_ids).items():
+        got = rollups.game_line(game_id, pitcher_id)
+        assert {k: got[k] for k in want} == dict(want), (game_id, pitcher_id)
+
+
+def snapshot():
+    """Every rollup row that is not all zeros, with float sums rounded."""
+    be = db.get_backend()
+    out = {}
+    for table in ROLLUP_TABLES:
+        rows = set()
+        for r in be.select(table):
+            values = {k: round(v, 6) if isinstance(v, float) else v for k, v in r.items()}
+            if any(values.get(c) for c in (*LINE_COLUMNS, "N")):
+                rows.add(tuple(sorted(values.items())))
+        out[table] = rows
+    return out
+
+
+def test_rollups_follow_inserts_edits_and_deletes(backend):
+    games = [play("Roll A", "2026-05-01", 1)["selected_game_id"], play("Roll B", "2026-05-02", 2)["selected_game_id"]]
+    assert_lines_match(games)
+
+    be = db.get_backend()
+    pitches = be.select("Pitches", order=("PitchID",))
+    atbat = be.select("AtBats", order=("AtBatID",), limit=1)[0]
+    # Edits: a call and a velocity, an at-bat's result and runs.
+    be.update("Pitches", {"PitchCalled": "In Play", "Velocity": 0}, where=[("PitchID", "eq", pitches[3]["PitchID"])])
+    be.update("AtBats", {"PlayResult": None, "RunsScored": 2}, where=[("AtBatID", "eq", atbat["AtBatID"])])
+    # Deletes: a pitch that carries a runner event, and the event.
+    event = be.select("RunnerEvents", order=("RunnerEventID",), limit=1)[0]
+    be.delete("RunnerEvents", where=[("PitchID", "eq", event["PitchID"])])
+    be.delete("Pitches", where=[("PitchID", "eq", event["PitchID"])])
+    assert_lines_match(games)
+
+    incremental = snapshot()
+    assert incremental["SeasonLines"]
+    rollups.rebuild()
+    assert snapshot() == incremental
+
+
+def test_season_line_sums_the_games(backend):
+    # Same label, so the same players, in two games of one season.
+    a = play("Season", "2026-05-01", 5)
+    b = play("Season", "2026-05-08", 6)
+    pitcher = a["roster"].pitchers[0]["PlayerID"]
+    assert b["roster"].pitchers[0]["PlayerID"] == pitcher
+    games = [rollups.game_line(s["selected_game_id"], pitcher) for s in (a, b)]
+    season = rollups.season_line(pitcher, 2026)
+    for col in LINE_COLUMNS:
+        assert season[col] == pytest.approx(sum(g[col] for g in games)), col
+    assert season["Pitches"] > games[0]["Pitches"] > 0
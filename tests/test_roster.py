@@ -0,0 +1,59 @@
+from core import db, roster
+
+
+def lineup(*names):
+    return [{"Name": n, "Bats": "Right", "Order": i} for i, n in enumerate(names, 1)]
+
+
+def staff(*names):
+    return [{"Name": n, "Throws": "Right"} for n in names]
+
+
+def test_reregistering_keeps_substitution_history(backend):
+    game_id = db.create_game("Home", "Away", "2026-06-01")
+    first = roster.register_roster(game_id, lineup("Ada", "Bo", "Cy"), staff("Pat"))
+    bench = db.ensure_player("Dee")
+    assert roster.substitute(first, 2, bench, 5)
+    roster.cache.invalidate(game_id)
+    ids = {r["RosterID"] for r in db.game_roster(game_id)}
+
+    # Re-entering the lineup drops Cy and brings Dee in as the #3 hitter.
+    second = roster.register_roster(game_id, lineup("Ada", "Bo", "Dee"), staff("Pat", "Sam"))
+    rows = {(r["Role"], r["player"]["Name"]): r for r in db.game_roster(game_id)}
+    assert ids <= {r["RosterID"] for r in rows.values()}
+    assert rows[("H", "Cy")]["Active"] is False
+    assert rows[("H", "Bo")]["Active"] is True and rows[("H", "Bo")]["ExitedInning"] == 5
+    assert rows[("H", "Dee")]["EnteredInning"] == 5 and rows[("H", "Dee")]["BatOrder"] == 3
+    assert [e["Name"] for e in second.lineup] == ["Ada", "Bo", "Dee"]
+    assert [e["Name"] for e in second.pitchers] == ["Pat", "Sam"]
+
+    third = roster.register_roster(game_id, [], staff("Sam"))
+    assert [e["Name"] for e in third.pitchers] == ["Sam"]
+    assert len(third.lineup) == 3
+
+
+def test_find_takes_a_role_and_prefers_active_rows(backend):
+    game_id = db.create_game("Home", "Away", "2026-06-01")
+    r = roster.register_roster(game_id, lineup("Ada", "Bo"), staff("Bo"))
+    assert r.find("bo", "H")["Role"] == "H"
+    assert r.find("Bo", "P")["Role"] == "P"
+    assert r.find("Ada", "P") is None
+
+    # A second Ada (a different player) takes slot 1; the first one is inactive.
+    other = db.get_backend().insert("Players", [{"Name": "Ada"}])[0]["PlayerID"]
+    assert roster.substitute(r, 1, other, 3)
+    roster.cache.invalidate(game_id)
+    ada = roster.cache.get(game_id).find("Ada", "H")
+    assert ada["PlayerID"] == other and ada["Active"]
+
+
+def test_a_pitcher_left_off_the_staff_is_not_on_the_mound(backend):
+    game_id = db.create_game("Home", "Away", "2026-06-01")
+    r = roster.register_roster(game_id, lineup("Ada"), staff("Pat", "Sam"))
+    assert roster.pitching_change(r, r.find("Pat", "P")["PlayerID"], 1)
+    roster.cache.invalidate(game_id)
+    assert roster.cache.get(game_id).current_pitcher["Name"] == "Pat"
+
+    r = roster.register_roster(game_id, [], staff("Sam"))
+    assert [e["Name"] for e in r.pitchers] == ["Sam"]
+    assert r.current_pitcher is None
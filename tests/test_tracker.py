@@ -0,0 +1,76 @@
+from bench.common import setup_session
+from core import db, tracker
+from core.backends import stats
+from core.outbox import Outbox
+
+
+def scout(label):
+    state = setup_session(label)
+    state["current_batter_id"] = state["roster"].lineup[0]["PlayerID"]
+    state["current_pitcher_id"] = state["roster"].pitchers[0]["PlayerID"]
+    return state
+
+
+def fresh(state):
+    return tracker.init_state({"roster": state["roster"]})
+
+
+def test_restore_finds_an_open_atbat_older_than_the_recent_ones(backend, tmp_path):
+    state = scout("Restore")
+    outbox = Outbox(tmp_path / "outbox.sqlite3")
+    open_id = tracker.start_atbat(state, 1)
+    tracker.submit_pitch(state, outbox, "Fastball", "Ball Called")
+    while outbox.flush_once():
+        pass
+    # Quick outs logged from another device after it.
+    for slot in range(1, 8):
+        other = db.create_atbat(state["selected_game_id"], state["roster"].lineup[slot]["PlayerID"],
+                                state["current_pitcher_id"], 2)
+        db.update_atbat(other, {"PlayResult": "GroundOut"})
+
+    restored = fresh(state)
+    assert tracker.restore(restored, outbox, state["selected_game_id"], recent=5) == open_id
+    assert (restored["balls"], restored["strikes"]) == (1, 0)
+    assert restored["pitch_numbers"].peek()[1] == 2
+
+
+def test_restore_merges_queued_runner_events(backend, tmp_path):
+    state = scout("Queued")
+    outbox = Outbox(tmp_path / "outbox.sqlite3")
+    tracker.start_atbat(state, 1)
+    runner = state["roster"].lineup[8]
+    tracker.submit_pitch(state, outbox, "Fastball", "Ball Called")
+    tracker.save_runner_event(state, outbox, runner["Name"], runner["PlayerID"], 1, 2, "Stolen Base", False)
+    outbox.flush_once()  # the pitch lands, its runner event is still queued
+    tracker.submit_pitch(state, outbox, "Slider", "Strike Called")
+    tracker.save_runner_event(state, outbox, runner["Name"], runner["PlayerID"], 2, 0, "Pickoff", True)
+    assert outbox.pending_count() == 3
+
+    restored = fresh(state)
+    tracker.restore(restored, outbox, state["selected_game_id"])
+
+    runner_lines = [line for line in restored["event_log"] if line.startswith("Runner")]
+    assert runner_lines == [line for line in state["event_log"] if line.startswith("Runner")]
+    assert [len(p["log"]) for p in restored["atbat_pitches"]] == [2, 2]
+
+
+def test_restore_of_a_recent_open_atbat_is_one_select(backend, tmp_path):
+    state = scout("OneQuery")
+    outbox = Outbox(tmp_path / "outbox.sqlite3")
+    for slot in range(6):
+        done = db.create_atbat(state["selected_game_id"], state["roster"].lineup[slot]["PlayerID"],
+                               state["current_pitcher_id"], 1)
+        db.update_atbat(done, {"PlayResult": "GroundOut"})
+    open_id = tracker.start_atbat(state, 2)
+    tracker.submit_pitch(state, outbox, "Fastball", "Ball Called")
+    while outbox.flush_once():
+        pass
+
+    stats.reset()
+    assert tracker.restore(fresh(state), outbox, state["selected_game_id"], open_id) == open_id
+    assert stats.total_calls() == 1
+
+    db.update_atbat(open_id, {"PlayResult": "Single"})
+    stats.reset()
+    assert tracker.restore(fresh(state), outbox, state["selected_game_id"]) is None
+    assert stats.total_calls() == 2